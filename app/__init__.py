@@ -1,8 +1,19 @@
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
+from app import backend
+import os
 
 app = Flask(__name__)
 
-# SQLAlchemy configuration (can update with AWS RDS settings)
-app.config.from_pyfile('awsdbconfig.py')
-db = SQLAlchemy(app)
+# SQLAlchemy configuration (can update with AWS RDS settings). A different
+# settings file, such as one pointing at a local database for load testing,
+# can be named in the LBJAPP_SETTINGS environment variable instead, or a
+# local SQLite file in the LBJAPP_LOCAL_DB environment variable.
+if backend.LOCAL_DB_ENV in os.environ:
+    app.config.from_mapping(backend.local_settings(
+            os.environ[backend.LOCAL_DB_ENV]))
+elif 'LBJAPP_SETTINGS' in os.environ:
+    app.config.from_envvar('LBJAPP_SETTINGS')
+else:
+    app.config.from_pyfile('awsdbconfig.py')
+db = SQLAlchemy(app)
\ No newline at end of file
@@ -0,0 +1,112 @@
+"""Functions for serving the game and prediction history as paginated JSON.
+
+Pages are selected with keyset pagination: rows are ordered by date and id,
+newest first, and each page ends with a cursor holding the date and id of its
+last row. The next page starts strictly after that row, so every page is a
+range scan of the date index no matter how far back it is.
+"""
+
+from sqlalchemy import and_, or_
+from app.models import json_value
+from datetime import datetime
+import json
+
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(row, date_column):
+    """Function to build the cursor pointing just past a row.
+
+    Args:
+        row: last row of a page
+        date_column (sqlalchemy.Column): column the rows are ordered by
+
+    Returns:
+        cursor (str): cursor string like '2018-03-10T00:00:00_152'
+    """
+    cursor = getattr(row, date_column.name).isoformat() + '_' + str(row.id)
+    return cursor
+
+
+def decode_cursor(cursor):
+    """Function to read a cursor built by encode_cursor.
+
+    Args:
+        cursor (str): cursor string
+
+    Returns:
+        position (tuple): the date and id the cursor points past. A ValueError
+            is raised if the cursor is malformed.
+    """
+    date_text, row_id = cursor.rsplit('_', 1)
+    position = (datetime.strptime(date_text, '%Y-%m-%dT%H:%M:%S'),
+                int(row_id))
+    return position
+
+
+def page_size(value):
+    """Function to read the requested page size, within allowed limits.
+
+    Args:
+        value (str): value of the limit query parameter, or None
+
+    Returns:
+        size (int): number of rows to return
+    """
+    if value is None:
+        return DEFAULT_PAGE_SIZE
+    size = min(max(int(value), 1), MAX_PAGE_SIZE)
+    return size
+
+
+def fetch_page(query, model, date_column, cursor, size):
+    """Function to fetch one page of rows, newest first.
+
+    Args:
+        query (sqlalchemy.orm.Query): query with any filters already applied
+        model (flask_sqlalchemy.Model): model the rows belong to
+        date_column (sqlalchemy.Column): column to order the rows by
+        cursor (str): cursor returned with the previous page, or None for the
+            first page
+        size (int): number of rows in the page
+
+    Returns:
+        rows (list): rows of the page
+        next_cursor (str): cursor for the following page, or None if this is
+            the last page
+    """
+    if cursor is not None:
+        cursor_date, cursor_id = decode_cursor(cursor)
+        query = query.filter(or_(date_column < cursor_date,
+                                 and_(date_column == cursor_date,
+                                      model.id < cursor_id)))
+    rows = query.order_by(date_column.desc(), model.id.desc()).limit(
+            size + 1).all()
+    next_cursor = None
+    if len(rows) > size:
+        rows = rows[:size]
+        next_cursor = encode_cursor(rows[-1], date_column)
+    return rows, next_cursor
+
+
+def page_json(rows, columns, next_cursor):
+    """Function to serialize a page compactly.
+
+    Column names are written once rather than repeated for every row.
+
+    Args:
+        rows (list): rows of the page
+        columns (list): names of the columns to include
+        next_cursor (str): cursor for the following page, or None
+
+    Returns:
+        body (str): JSON text with keys 'columns', 'rows' and 'next'
+    """
+    body = json.dumps({'columns': columns,
+                       'rows': [[json_value(getattr(row, column))
+                                 for column in columns] for row in rows],
+                       'next': next_cursor},
+                      separators=(',', ':'))
+    return body
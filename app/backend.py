@@ -0,0 +1,93 @@
+"""Embedded database backend for running the app and pipeline locally.
+
+The app is configured for a MySQL database on AWS RDS, so every local run
+pays the latency of a remote database. Setting the LBJAPP_LOCAL_DB
+environment variable to a file path instead runs the app, the updates and the
+model training against an SQLite file in that place, with no settings file
+needed. Every SQLite connection, local or not, is put in write-ahead logging
+mode, so the web app can read while the daily update writes, and waits for a
+lock instead of failing when two processes write at once.
+
+The analytic read of the whole games table by modelTrainingFunctions can
+optionally go through DuckDB, by setting ANALYTIC_BACKEND to 'duckdb' in the
+settings or the LBJAPP_ANALYTIC_BACKEND environment variable. DuckDB reads
+the SQLite file directly; it is only needed when that option is used.
+Likewise, FEATURE_SOURCE, or the LBJAPP_FEATURE_SOURCE environment variable,
+is read by featureView.
+"""
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+import sqlite3
+import os
+
+
+LOCAL_DB_ENV = 'LBJAPP_LOCAL_DB'
+ANALYTIC_BACKEND_ENV = 'LBJAPP_ANALYTIC_BACKEND'
+FEATURE_SOURCE_ENV = 'LBJAPP_FEATURE_SOURCE'
+# milliseconds an SQLite connection waits for another writer to finish
+SQLITE_BUSY_TIMEOUT_MS = 30000
+
+
+def local_settings(path):
+    """Function to make the app's settings for a local SQLite database.
+
+    Args:
+        path (str): path of the SQLite file, created if it does not exist
+
+    Returns:
+        settings (dict): settings to load into the app's config
+    """
+    return {'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + os.path.abspath(path),
+            'SQLALCHEMY_TRACK_MODIFICATIONS': False,
+            'ANALYTIC_BACKEND': os.environ.get(ANALYTIC_BACKEND_ENV,
+                                               'sqlalchemy'),
+            'FEATURE_SOURCE': os.environ.get(FEATURE_SOURCE_ENV, 'python')}
+
+
+@event.listens_for(Engine, 'connect')
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Puts every new SQLite connection in write-ahead logging mode."""
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cursor = dbapi_connection.cursor()
+    cursor.execute('PRAGMA journal_mode=WAL')
+    # with WAL, syncing at checkpoints only is safe from corruption
+    cursor.execute('PRAGMA synchronous=NORMAL')
+    cursor.execute('PRAGMA busy_timeout={}'.format(SQLITE_BUSY_TIMEOUT_MS))
+    cursor.close()
+
+
+def read_frame(sql, engine, analytic_backend='sqlalchemy'):
+    """Function to read the result of a query into a DataFrame.
+
+    Args:
+        sql (str): query to run, such as 'select * from game'
+        engine (sqlalchemy.engine.Engine): engine of the database
+        analytic_backend (str): 'duckdb' to run the query with DuckDB when
+            the database is an SQLite file, otherwise it is run through the
+            engine
+
+    Returns:
+        data (pd.DataFrame): result of the query, with the 'date' column
+            parsed as datetimes if there is one
+    """
+    # pandas is imported here so importing the app does not load it
+    import pandas as pd
+    if (analytic_backend == 'duckdb' and engine.dialect.name == 'sqlite' and
+            engine.url.database):
+        import duckdb
+        connection = duckdb.connect()
+        try:
+            connection.execute("ATTACH '{}' AS lbj (TYPE SQLITE, READ_ONLY)"
+                               .format(engine.url.database.replace("'", "''")))
+            connection.execute('USE lbj')
+            data = connection.execute(sql).df()
+        finally:
+            connection.close()
+    else:
+        data = pd.read_sql_query(sql, con=engine)
+    # SQLite returns datetimes as strings
+    if 'date' in data.columns:
+        data['date'] = pd.to_datetime(data['date'])
+    return data
@@ -0,0 +1,70 @@
+"""Functions for invalidating what the web app caches between requests.
+
+The data shown by the web app only changes when the daily update runs. The
+daily update calls invalidate_render_cache when it finishes, which rewrites a
+small stamp file. The web app compares the modification time of that file with
+the one it saw when it last rendered a page, so it only queries the database
+again after an update. If the app is being served by serve.py, the daily
+update also calls reload_server so the workers are gracefully replaced by
+ones that have loaded the new files.
+"""
+
+import os
+import signal
+import time
+import logging
+
+
+RENDER_STAMP_PATH = 'render_stamp'
+SERVER_PID_PATH = 'lbjapp.pid'
+
+
+def invalidate_render_cache(path=RENDER_STAMP_PATH):
+    """Function to tell the web app that the data it shows has changed.
+
+    Args:
+        path (str): stamp file watched by the web app
+
+    Returns:
+        None
+    """
+    with open(path + '.tmp', 'w') as f:
+        f.write(str(time.time()))
+    os.replace(path + '.tmp', path)
+
+
+def render_stamp(path=RENDER_STAMP_PATH):
+    """Function to find when the data shown by the web app last changed.
+
+    Args:
+        path (str): stamp file written by invalidate_render_cache
+
+    Returns:
+        stamp (float): modification time of the stamp file, or None if the
+            daily update has never written it
+    """
+    try:
+        stamp = os.stat(path).st_mtime
+    except OSError:
+        stamp = None
+    return stamp
+
+
+def reload_server(path=SERVER_PID_PATH):
+    """Function to ask a running serve.py to reload its workers.
+
+    Args:
+        path (str): file serve.py writes its process id to
+
+    Returns:
+        reloaded (bool): True if a running server was signalled, False if no
+            server is running
+    """
+    try:
+        with open(path) as f:
+            pid = int(f.read())
+        os.kill(pid, signal.SIGHUP)
+    except (OSError, ValueError):
+        return False
+    logging.info('Asked server %d to reload.', pid)
+    return True
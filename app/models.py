@@ -1,10 +1,29 @@
 from app import db
+from datetime import date
+
+
+def json_value(value):
+    """Converts a column value into a value that can be written as JSON."""
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
+def row_to_dict(row):
+    """Converts a row of any table into a dictionary keyed by column name."""
+    return {column.name: json_value(getattr(row, column.name))
+            for column in row.__table__.columns}
 
 
 class Game(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    date = db.Column(db.DateTime, unique=True, nullable=False)
+    date = db.Column(db.DateTime, unique=False, nullable=False)
     season = db.Column(db.String(20), unique=False, nullable=False)
+    # player whose stats are in the lbj_ columns, and the player's team
+    player = db.Column(db.String(40), unique=False, nullable=False,
+                       default='lebron-james')
+    team = db.Column(db.String(3), unique=False, nullable=False,
+                     default='CLE')
     opponent = db.Column(db.String(3), unique=False, nullable=False)
     home_away = db.Column(db.String(4), unique=False, nullable=False)
     lbj_days_rest = db.Column(db.Integer, unique=False, nullable=False)
@@ -29,19 +48,97 @@ class Game(db.Model):
     lbj_games_missed = db.Column(db.Integer, unique=False, nullable=False)
     lbj_DNP = db.Column(db.Boolean, unique=False, nullable=True)
     lbj_inactive = db.Column(db.Boolean, unique=False, nullable=True)
+    lbj_pts_lastn = db.Column(db.Float, unique=False, nullable=True)
+    lbj_rbs_lastn = db.Column(db.Float, unique=False, nullable=True)
+    lbj_ast_lastn = db.Column(db.Float, unique=False, nullable=True)
+    lbj_fg_pct_lastn = db.Column(db.Float, unique=False, nullable=True)
+    lbj_pts_ewma = db.Column(db.Float, unique=False, nullable=True)
+    lbj_rbs_ewma = db.Column(db.Float, unique=False, nullable=True)
+    lbj_ast_ewma = db.Column(db.Float, unique=False, nullable=True)
+    lbj_fg_pct_ewma = db.Column(db.Float, unique=False, nullable=True)
+    # 'lastUpdatedOn' stamp of the API's game log feed when the player's stats
+    # were written, and the dppf.stats_hash of the stats written
+    stats_updated_on = db.Column(db.String(30), unique=False, nullable=True)
+    stats_hash = db.Column(db.String(40), unique=False, nullable=True)
+    # incremented by SQLAlchemy on every update of the row
+    version = db.Column(db.Integer, unique=False, nullable=False, default=1,
+                        server_default='1')
+
+    __mapper_args__ = {'version_id_col': version}
+    __table_args__ = (db.Index('ix_game_date', 'date'),
+                      db.Index('ix_game_season_date', 'season', 'date'),
+                      db.Index('ix_game_opponent_date', 'opponent', 'date'),
+                      db.UniqueConstraint('player', 'date'))
 
     def __repr__(self):
         return '<Game on %r>' % (str(self.date))
 
 
+class GameFact(db.Model):
+    """Raw facts about a game, from which featureView derives the features.
+
+    Unlike Game, rows hold only what is known about the game itself: who
+    played, the player's box score and whether the team won. Stats are None
+    until the game has been played, and for games the player was inactive.
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    date = db.Column(db.DateTime, unique=False, nullable=False)
+    season = db.Column(db.String(20), unique=False, nullable=False)
+    player = db.Column(db.String(40), unique=False, nullable=False)
+    team = db.Column(db.String(3), unique=False, nullable=False)
+    opponent = db.Column(db.String(3), unique=False, nullable=False)
+    home_away = db.Column(db.String(4), unique=False, nullable=False)
+    team_won = db.Column(db.Boolean, unique=False, nullable=True)
+    lbj_DNP = db.Column(db.Boolean, unique=False, nullable=True)
+    pts = db.Column(db.Integer, unique=False, nullable=True)
+    rbs = db.Column(db.Integer, unique=False, nullable=True)
+    ast = db.Column(db.Integer, unique=False, nullable=True)
+    fg2a = db.Column(db.Integer, unique=False, nullable=True)
+    fg2m = db.Column(db.Integer, unique=False, nullable=True)
+    fg3a = db.Column(db.Integer, unique=False, nullable=True)
+    fg3m = db.Column(db.Integer, unique=False, nullable=True)
+    fta = db.Column(db.Integer, unique=False, nullable=True)
+    ftm = db.Column(db.Integer, unique=False, nullable=True)
+    plusminus = db.Column(db.Integer, unique=False, nullable=True)
+
+    __table_args__ = (db.Index('ix_game_fact_season_date', 'season', 'date'),
+                      db.UniqueConstraint('player', 'date'))
+
+    def __repr__(self):
+        return '<GameFact on %r>' % (str(self.date))
+
+
 class Predictions(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    game_date = db.Column(db.DateTime, unique=False, nullable=False)
-    predict_date = db.Column(db.DateTime, unique=False, nullable=False)
+    game_date = db.Column(db.DateTime, unique=False, nullable=False,
+                          index=True)
+    predict_date = db.Column(db.DateTime, unique=False, nullable=False,
+                             index=True)
     predicted_pts = db.Column(db.Float, unique=False, nullable=False)
     predicted_rbs = db.Column(db.Float, unique=False, nullable=False)
     predicted_ast = db.Column(db.Float, unique=False, nullable=False)
+    predicted_pts_lower = db.Column(db.Float, unique=False, nullable=True)
+    predicted_pts_upper = db.Column(db.Float, unique=False, nullable=True)
+    predicted_rbs_lower = db.Column(db.Float, unique=False, nullable=True)
+    predicted_rbs_upper = db.Column(db.Float, unique=False, nullable=True)
+    predicted_ast_lower = db.Column(db.Float, unique=False, nullable=True)
+    predicted_ast_upper = db.Column(db.Float, unique=False, nullable=True)
 
     def __repr__(self):
         return('<Lebron James predicted to score %r>' % (
                 str(self.predicted_pts)))
+
+
+class HorizonPredictions(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    predict_date = db.Column(db.DateTime, unique=False, nullable=False)
+    game_date = db.Column(db.DateTime, unique=False, nullable=False)
+    opponent = db.Column(db.String(3), unique=False, nullable=False)
+    home_away = db.Column(db.String(4), unique=False, nullable=False)
+    days_rest = db.Column(db.Integer, unique=False, nullable=False)
+    predicted_pts = db.Column(db.Float, unique=False, nullable=False)
+    predicted_rbs = db.Column(db.Float, unique=False, nullable=False)
+    predicted_ast = db.Column(db.Float, unique=False, nullable=False)
+
+    def __repr__(self):
+        return '<Horizon prediction for game on %r>' % (str(self.game_date))
@@ -0,0 +1,87 @@
+"""Functions for publishing the web app's page as static files.
+
+The page shown by the web app only changes when the daily update runs, so
+after each update the page is rendered once and written to a snapshot
+directory together with a JSON payload of the same information. Any static
+file server can then serve the snapshot, and lbjapp.py can be run in a mode
+that serves it without connecting to the database at all.
+"""
+
+from flask import render_template
+from app import app
+from app.models import Game, Predictions, row_to_dict
+from develop import dataPullProcessFunctions as dppf
+import json
+import os
+import shutil
+import logging
+
+
+SNAPSHOT_DIR = 'snapshot'
+SNAPSHOT_PAGE = 'index.html'
+SNAPSHOT_PAYLOAD = 'predictions.json'
+
+
+def write_atomic(path, data):
+    """Function to write a file so readers only ever see a complete version.
+
+    The data is written to a temporary file in the same directory, which is
+    then renamed over the destination.
+
+    Args:
+        path (str): file to write
+        data (bytes): contents of the file
+
+    Returns:
+        None
+    """
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def snapshot_payload(next_game, predictions):
+    """Function to build the JSON payload published with the page.
+
+    Args:
+        next_game (app.models.Game): bottom row of the game table
+        predictions (app.models.Predictions): latest row of the predictions
+            table
+
+    Returns:
+        payload (dict): dictionary with the next game and its predictions
+    """
+    payload = {'next_game': row_to_dict(next_game),
+               'predictions': row_to_dict(predictions)}
+    return payload
+
+
+def publish_snapshot(directory=SNAPSHOT_DIR):
+    """Function to render the page and its JSON payload to static files.
+
+    Args:
+        directory (str): directory to publish the snapshot to. The page's
+            stylesheet is copied to its static subdirectory.
+
+    Returns:
+        None
+    """
+    with app.app_context():
+        next_game = Game.query.filter_by(player=dppf.PLAYER).order_by(
+                Game.date.desc()).first()
+        predictions = Predictions.query.order_by(
+                Predictions.predict_date.desc()).first()
+        page = render_template('index.html', next_game=next_game,
+                               predictions=predictions)
+        payload = snapshot_payload(next_game, predictions)
+    static_dir = os.path.join(directory, 'static')
+    os.makedirs(static_dir, exist_ok=True)
+    shutil.copyfile(os.path.join(app.static_folder, 'basic.css'),
+                    os.path.join(static_dir, 'basic.css.tmp'))
+    os.replace(os.path.join(static_dir, 'basic.css.tmp'),
+               os.path.join(static_dir, 'basic.css'))
+    write_atomic(os.path.join(directory, SNAPSHOT_PAYLOAD),
+                 json.dumps(payload, separators=(',', ':')).encode('utf-8'))
+    write_atomic(os.path.join(directory, SNAPSHOT_PAGE), page.encode('utf-8'))
+    logging.info('Snapshot published to %s', directory)
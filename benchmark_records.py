@@ -0,0 +1,110 @@
+"""Benchmarks game records against the dictionaries they replace.
+
+Builds the same synthetic games, with every field of gameRecord's FIELDS set,
+once as dictionaries and once as game_record objects, and reports the memory
+they take, the time to build them, the time to read every field of every game
+and the time to turn them into a DataFrame.
+
+Example:
+    python benchmark_records.py --games 50000
+"""
+
+from develop import gameRecord as gR
+from datetime import date, timedelta
+import argparse
+import tracemalloc
+import time
+import pandas as pd
+
+
+def game_values(n_games):
+    """Function to make the field values of synthetic games.
+
+    Args:
+        n_games (int): number of games
+
+    Returns:
+        values (list): list of dictionaries keyed by field name
+    """
+    start = date(2017, 10, 17)
+    values = []
+    for i in range(n_games):
+        game = {field: float(i % 97) + j / 10 for j, field in
+                enumerate(gR.FIELDS)}
+        game.update(date=start + timedelta(days=i % 180),
+                    last_meeting_date=start, opponent='BOS',
+                    home_away='home', DNP=False)
+        values.append(game)
+    return values
+
+
+def measure(build, read, to_dataframe, values):
+    """Function to time building, reading and converting one representation.
+
+    Args:
+        build (function): function making the list of games from the values
+        read (function): function reading every field of a game
+        to_dataframe (function): function making a DataFrame from the games
+        values (list): values returned by game_values
+
+    Returns:
+        results (dict): memory in MB and times in seconds
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    games = build(values)
+    build_seconds = time.perf_counter() - start
+    memory = tracemalloc.get_traced_memory()[0] / 1e6
+    tracemalloc.stop()
+    start = time.perf_counter()
+    for game in games:
+        read(game)
+    read_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    to_dataframe(games)
+    dataframe_seconds = time.perf_counter() - start
+    return {'memory MB': memory, 'build s': build_seconds,
+            'read s': read_seconds, 'DataFrame s': dataframe_seconds}
+
+
+def run(n_games):
+    """Function to run the benchmark and print a table of the results.
+
+    Args:
+        n_games (int): number of games to build
+
+    Returns:
+        results (dict): dictionary keyed by representation whose values are
+            the results returned by measure
+    """
+    values = game_values(n_games)
+    keys = [{'home_away': 'home/away'}.get(field, field) for field in
+            gR.FIELDS]
+    results = {
+            'dict': measure(
+                    lambda values: [{key: game[field] for key, field in
+                                     zip(keys, gR.FIELDS)} for game in values],
+                    lambda game: [game[key] for key in keys],
+                    pd.DataFrame,
+                    values),
+            'game_record': measure(
+                    lambda values: [gR.game_record(**game) for game in
+                                    values],
+                    gR.all_fields,
+                    gR.records_to_dataframe,
+                    values)}
+    columns = list(results['dict'])
+    print('%-12s' % 'games' + ''.join('%14s' % c for c in columns))
+    for name, result in results.items():
+        print('%-12s' % name + ''.join('%14.3f' % result[c] for c in columns))
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+            description='Compare the memory and speed of game records and '
+            'dictionaries.')
+    parser.add_argument('--games', type=int, default=50000,
+                        help='number of synthetic games to build')
+    args = parser.parse_args()
+    run(args.games)
@@ -5,14 +5,38 @@ the games table in the database using all data from the 2015-16 and 2016-17
 seasons as well as every game that has been completed as of the day before
 runtime in the 2017-18 season. Because this requires many API pulls this
 process will take several hours.
+
+Run with --profile to write a report of the time spent in each stage of the
+build to the logs directory.
+
+Seasons can be pulled in parallel with --workers. The threads share the
+API's rate limit, the cached box scores and scoreboards, and any request in
+flight, so the build is bounded by the API quota rather than by the latency
+of each season's requests. --interval sets the seconds between calls; 1.2
+uses the whole quota of 250 requests every 5 minutes.
 """
 from app import db
 from develop import dataPullProcessFunctions as dppf
-from app.models import Game
+from develop import formFunctions as fF
+from develop import updateFunctions as uf
+from develop import apiMetrics as aM
+from develop import stageProfiler as sP
+from develop import featureView as fV
+from app.models import Game, GameFact
+import concurrent.futures
+import argparse
 import logging
 
 
-def build_db():
+# seasons to add, with the dates of each to add as for dppf.schedule
+SEASONS = [('2015-2016-regular', None),
+           ('2016-2017-regular', None),
+           ('2017-2018-regular', 'until-yesterday')]
+TEAM = dppf.TEAM
+PLAYERS = [dppf.PLAYER]
+
+
+def build_db(workers=1):
     """Creates initial database with historical data.
 
     Builds database with full data from 2015-2016 and 2016-2017 seasons, as
@@ -20,120 +44,168 @@ def build_db():
     season.
 
     Args:
-        None
+        workers (int): number of seasons to pull at the same time
 
     Returns:
         None
     """
     db.drop_all()
     db.create_all()
+    fV.create_feature_view(db.engine)
     logging.info('Database created.')
-    schedule2015 = dppf.schedule('2015-2016-regular', None)
-    logging.debug('2015-16 season data retrieved, adding to database.')
-    for game in schedule2015.games:
-        game_stats = Game(date=game['date'],
-                          season=schedule2015.season,
-                          opponent=game['opponent'],
-                          home_away=game['home/away'],
-                          lbj_days_rest=game['days_rest'],
-                          lbj_2pt_pct=game['season_2pt_pct'],
-                          lbj_3pt_pct=game['season_3pt_pct'],
-                          lbj_ft_pct=game['season_ft_pct'],
-                          lbj_2pt_mpg=game['season_2ptpg'],
-                          lbj_3pt_mpg=game['season_3ptpg'],
-                          lbj_ft_mpg=game['season_ftpg'],
-                          lbj_rbs_pgm=game['season_rpg'],
-                          lbj_ast_pgm=game['season_apg'],
-                          lbj_plusminpg=game['season_plusminpg'],
-                          opp_def_eff=game['opp_def_eff'],
-                          opp_off_eff=game['opp_off_eff'],
-                          cavsWins=game['cavsWins'],
-                          cavsLosses=game['cavsLosses'],
-                          oppWins=game['OPPW'],
-                          oppLosses=game['OPPL'],
-                          lbj_games_missed=game['gamesMissed'])
-        try:
-            game_stats.pts = game['lbj_pts']
-            game_stats.rbs = game['lbj_rbs']
-            game_stats.ast = game['lbj_ast']
-            game_stats.lbj_DNP = game['DNP']
-        except:
-            game_stats.lbj_inactive = True
-        db.session.add(game_stats)
-        db.session.commit()
-    logging.info('2015-16 season data added.')
-    schedule2016 = dppf.schedule('2016-2017-regular', None)
-    logging.debug('2016-17 season data retrieved, adding to database.')
-    for game in schedule2016.games:
-        game_stats = Game(date=game['date'],
-                          season=schedule2016.season,
-                          opponent=game['opponent'],
-                          home_away=game['home/away'],
-                          lbj_days_rest=game['days_rest'],
-                          lbj_2pt_pct=game['season_2pt_pct'],
-                          lbj_3pt_pct=game['season_3pt_pct'],
-                          lbj_ft_pct=game['season_ft_pct'],
-                          lbj_2pt_mpg=game['season_2ptpg'],
-                          lbj_3pt_mpg=game['season_3ptpg'],
-                          lbj_ft_mpg=game['season_ftpg'],
-                          lbj_rbs_pgm=game['season_rpg'],
-                          lbj_ast_pgm=game['season_apg'],
-                          lbj_plusminpg=game['season_plusminpg'],
-                          opp_def_eff=game['opp_def_eff'],
-                          opp_off_eff=game['opp_off_eff'],
-                          cavsWins=game['cavsWins'],
-                          cavsLosses=game['cavsLosses'],
-                          oppWins=game['OPPW'],
-                          oppLosses=game['OPPL'],
-                          lbj_games_missed=game['gamesMissed'])
-        try:
-            game_stats.pts = game['lbj_pts']
-            game_stats.rbs = game['lbj_rbs']
-            game_stats.ast = game['lbj_ast']
-            game_stats.lbj_DNP = game['DNP']
-        except:
-            game_stats.lbj_inactive = True
-        db.session.add(game_stats)
-        db.session.commit()
-    logging.info('2016-17 season data added.')
-    schedule2017 = dppf.schedule('2017-2018-regular', 'until-yesterday')
-    logging.debug('2017-18 season data through yesterday retrieved, adding to database.')
-    for game in schedule2017.games:
-        game_stats = Game(date=game['date'],
-                          season=schedule2017.season,
-                          opponent=game['opponent'],
-                          home_away=game['home/away'],
-                          lbj_days_rest=game['days_rest'],
-                          lbj_2pt_pct=game['season_2pt_pct'],
-                          lbj_3pt_pct=game['season_3pt_pct'],
-                          lbj_ft_pct=game['season_ft_pct'],
-                          lbj_2pt_mpg=game['season_2ptpg'],
-                          lbj_3pt_mpg=game['season_3ptpg'],
-                          lbj_ft_mpg=game['season_ftpg'],
-                          lbj_rbs_pgm=game['season_rpg'],
-                          lbj_ast_pgm=game['season_apg'],
-                          lbj_plusminpg=game['season_plusminpg'],
-                          opp_def_eff=game['opp_def_eff'],
-                          opp_off_eff=game['opp_off_eff'],
-                          cavsWins=game['cavsWins'],
-                          cavsLosses=game['cavsLosses'],
-                          oppWins=game['OPPW'],
-                          oppLosses=game['OPPL'],
-                          lbj_games_missed=game['gamesMissed'])
-        try:
-            game_stats.pts = game['lbj_pts']
-            game_stats.rbs = game['lbj_rbs']
-            game_stats.ast = game['lbj_ast']
-            game_stats.lbj_DNP = game['DNP']
-        except:
-            game_stats.lbj_inactive = True
+    add_historical_games(workers=workers)
+
+
+def add_historical_games(team=TEAM, players=PLAYERS, workers=1):
+    """Adds the historical games to the empty games table.
+
+    Pulls and processes each season as described for build_db, for every
+    player, and saves each player's recent form state as of the last game
+    added. The game logs of all the players are pulled in one call per season
+    and the opponent stats are shared between them. A season whose data
+    cannot be pulled is queued in the dead letter queue, to be added by
+    drain_dead_letters.py, and the other seasons are still added. If that is
+    the last season, the form state is saved when it is added instead.
+
+    With more than one worker, seasons are pulled in parallel threads, which
+    share dppf's rate limiter and caches. Only the pulls run in the threads:
+    each season is added to the database from this thread, in order, once
+    it and the seasons before it have been pulled.
+
+    Args:
+        team (str): 3 letter abbreviation of the players' team
+        players (list): players to add games for, such as ['lebron-james']
+        workers (int): number of seasons to pull at the same time
+
+    Returns:
+        None
+    """
+    schedules = {}
+    with concurrent.futures.ThreadPoolExecutor(workers) as executor:
+        pulls = [(season, until_date,
+                  executor.submit(dppf.team_schedules, season, until_date,
+                                  team, players))
+                 for season, until_date in SEASONS]
+        for season, until_date, pull in pulls:
+            try:
+                schedules = add_schedules(season, pull.result())
+            except dppf.RequestFailedError as error:
+                dppf.dead_letter(error, {'kind': 'season', 'season': season,
+                                         'until_date': until_date,
+                                         'team': team, 'players': players})
+                # the form state of an earlier season is not the current one
+                schedules = {}
+    for player, player_schedule in schedules.items():
+        fF.save_form_state(player_schedule.form_state,
+                           uf.form_state_path(player))
+    db.session.close()
+
+
+def add_season(season, until_date, team=TEAM, players=PLAYERS):
+    """Adds the games of one season to the games table.
+
+    Args:
+        season (str): season to add, like '2015-2016-regular'
+        until_date (str): dates of the season to add, as for dppf.schedule
+        team (str): 3 letter abbreviation of the players' team
+        players (list): players to add games for
+
+    Returns:
+        schedules (dict): dictionary keyed by player of the schedule objects
+            added
+    """
+    return add_schedules(season, dppf.team_schedules(season, until_date,
+                                                     team, players))
+
+
+def add_schedules(season, schedules):
+    """Adds the schedule objects pulled for a season to the games table.
+
+    Args:
+        season (str): season of the schedules
+        schedules (dict): dictionary keyed by player of schedule objects, as
+            returned by dppf.team_schedules
+
+    Returns:
+        schedules (dict): the schedules added
+    """
+    logging.debug('%s season data retrieved, adding to database.', season)
+    for player_schedule in schedules.values():
+        add_schedule(player_schedule)
+    logging.info('%s season data added.', season)
+    return schedules
+
+
+def add_schedule(season_schedule):
+    """Adds the games of a schedule object to the games and game_fact tables.
+
+    The game_fact table is only written, and the games' features derived
+    from it, when features come from the view.
+
+    Args:
+        season_schedule (dppf.schedule): schedule of a player's season
+
+    Returns:
+        None
+    """
+    for game in season_schedule.games:
+        game_stats = Game(season=season_schedule.season,
+                          player=season_schedule.player,
+                          team=season_schedule.team,
+                          **game.game_columns())
         db.session.add(game_stats)
+        if fV.feature_source() == 'view':
+            db.session.add(GameFact(**fV.record_facts(
+                    game, season_schedule.season, season_schedule.player,
+                    season_schedule.team)))
         db.session.commit()
-    logging.info('2017-18 season data added.')
-    db.session.close()
+    fV.refresh_features(db, season_schedule.season, season_schedule.player)
+
+
+def profile_stages():
+    """Times each stage of building the database with stageProfiler's profiler.
+
+    Args:
+        None
+
+    Returns:
+        None
+    """
+    sP.profiler.instrument(dppf.schedule, [
+            'find_lebron_stats_all_games', 'sum_lebron_season_stats',
+            'find_recent_form', 'find_days_rest',
+            'find_last_game_per_opponent', 'find_stats_since_last_meeting',
+            'calc_opp_efficiency'])
+    # the methods are wrapped on the class before the class itself is
+    sP.profiler.instrument(dppf, ['schedule'], 'build_schedule')
+    sP.profiler.instrument(dppf, ['find_opponent_stats'])
+    sP.profiler.instrument(dppf, ['send_request'], 'api_request')
+    sP.profiler.instrument(db.session, ['commit'], 'db_commit')
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+            description='Build the database from historical data.')
+    parser.add_argument('--profile', action='store_true',
+                        help='write a report of the time spent in each stage')
+    parser.add_argument('--cprofile', metavar='PATH',
+                        help='with --profile, also write cProfile stats of '
+                        'the whole run to PATH')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='number of seasons to pull at the same time')
+    parser.add_argument('--interval', type=float,
+                        default=dppf.REQUEST_INTERVAL,
+                        help='seconds between calls to the API')
+    args = parser.parse_args()
+    dppf.limiter.interval = args.interval
     logging.basicConfig(filename="logs/initial_db_creation.log",
                         level=logging.DEBUG)
-    build_db()
+    if args.profile:
+        profile_stages()
+        sP.profiler.start(args.cprofile)
+    try:
+        build_db(args.workers)
+    finally:
+        aM.registry.dump()
+        if args.profile:
+            sP.profiler.finish('create_initial_db')
@@ -0,0 +1,63 @@
+"""Derives the features of the games table from the game_fact table in SQL.
+
+Creates, or replaces, featureView's game_features view and writes the days of
+rest, games missed, team record and season stats it derives into the games
+table, one UPDATE per season and player. This recomputes those features for
+whole seasons inside the database, for instance after facts were corrected,
+without requesting anything from the API. The game_fact table is only filled
+when the FEATURE_SOURCE setting is 'view'.
+
+Example:
+    python derive_features.py --season 2017-2018-regular
+"""
+
+from app import app, db
+from app.models import GameFact
+from develop import featureView as fV
+import argparse
+import logging
+
+
+def derive_features(seasons=None, players=None):
+    """Writes the features derived from game facts into the games table.
+
+    Args:
+        seasons (list): seasons to derive, like ['2017-2018-regular'], or
+            None for every season in the game_fact table
+        players (list): players to derive, like ['lebron-james'], or None
+            for every player in the game_fact table
+
+    Returns:
+        updated (dict): dictionary keyed by (season, player) with the number
+            of rows of the games table updated
+    """
+    db.create_all()
+    fV.create_feature_view(db.engine)
+    pairs = db.session.query(GameFact.season, GameFact.player).distinct()
+    updated = {}
+    for season, player in sorted(pairs):
+        if ((seasons is None or season in seasons) and
+                (players is None or player in players)):
+            updated[(season, player)] = fV.apply_features(db, season, player)
+            logging.info('%d games of %s %s updated.',
+                         updated[(season, player)], season, player)
+    return updated
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+            description='Derive the features of the games table from game '
+            'facts.')
+    parser.add_argument('--season', action='append',
+                        help='season to derive, may be repeated. Defaults '
+                        'to every season.')
+    parser.add_argument('--player', action='append',
+                        help='player to derive, may be repeated. Defaults '
+                        'to every player.')
+    args = parser.parse_args()
+    logging.basicConfig(filename="logs/derive_features.log",
+                        level=logging.DEBUG)
+    with app.app_context():
+        for (season, player), n_rows in derive_features(
+                args.season, args.player).items():
+            print('{} {}: {} games updated'.format(season, player, n_rows))
@@ -0,0 +1,189 @@
+"""In-process registry of metrics about calls to the MySportsFeeds API.
+
+This module keeps, for every API endpoint, the number of calls made, calls
+answered without a network request (cache hits), failed calls, bytes received,
+a histogram of response latencies and the time spent sleeping to stay under
+the API's rate limit. It also tracks how many requests have been made in each
+5-minute window the API uses for its quota. At the end of a run the registry
+is written to a JSON file and to a Prometheus textfile so it can be inspected
+or scraped.
+"""
+
+import json
+import os
+import threading
+import time
+
+
+LATENCY_BUCKETS = [0.1, 0.25, 0.5, 1, 2.5, 5, 10]
+QUOTA_REQUESTS = 250
+QUOTA_WINDOW_SECONDS = 300
+METRICS_JSON_PATH = 'logs/api_metrics.json'
+METRICS_PROM_PATH = 'logs/api_metrics.prom'
+
+
+class metrics_registry:
+    """Class recording metrics about API calls.
+
+    Attributes:
+        endpoints (dict): dictionary keyed by endpoint name, like
+            'player_gamelogs', whose values are dictionaries of that
+            endpoint's metrics
+        windows (dict): dictionary keyed by the start time of each 5-minute
+            quota window with the number of requests made in it
+    """
+
+    def __init__(self):
+        """Constructor for an empty metrics_registry object."""
+        self.endpoints = {}
+        self.windows = {}
+        self.lock = threading.Lock()
+
+    def _endpoint(self, endpoint):
+        """Returns the metrics of an endpoint, creating them if needed."""
+        if endpoint not in self.endpoints:
+            self.endpoints[endpoint] = {
+                    'calls': 0,
+                    'cache_hits': 0,
+                    'errors': 0,
+                    'bytes': 0,
+                    'latency_seconds': 0.0,
+                    'latency_buckets': [0] * (len(LATENCY_BUCKETS) + 1),
+                    'sleep_seconds': 0.0}
+        return self.endpoints[endpoint]
+
+    def record_call(self, endpoint, latency, n_bytes, now=None):
+        """Method to record a request sent to the API.
+
+        Args:
+            endpoint (str): name of the endpoint called
+            latency (float): seconds until the response was received
+            n_bytes (int): size of the response body
+            now (float): time of the call, defaults to the current time
+
+        Returns:
+            None
+        """
+        now = time.time() if now is None else now
+        window = int(now // QUOTA_WINDOW_SECONDS) * QUOTA_WINDOW_SECONDS
+        bucket = len([bound for bound in LATENCY_BUCKETS if latency > bound])
+        with self.lock:
+            metrics = self._endpoint(endpoint)
+            metrics['calls'] += 1
+            metrics['bytes'] += n_bytes
+            metrics['latency_seconds'] += latency
+            metrics['latency_buckets'][bucket] += 1
+            self.windows[window] = self.windows.get(window, 0) + 1
+
+    def record_error(self, endpoint):
+        """Method to record a request to the API that failed."""
+        with self.lock:
+            self._endpoint(endpoint)['errors'] += 1
+
+    def record_cache_hit(self, endpoint):
+        """Method to record a call answered without a request to the API."""
+        with self.lock:
+            self._endpoint(endpoint)['cache_hits'] += 1
+
+    def record_sleep(self, endpoint, seconds):
+        """Method to record time spent waiting to respect the rate limit."""
+        with self.lock:
+            self._endpoint(endpoint)['sleep_seconds'] += seconds
+
+    def remaining_quota(self, now=None):
+        """Method to find how many requests are left in the current window.
+
+        Args:
+            now (float): time to check the quota at, defaults to the current
+                time
+
+        Returns:
+            remaining (int): requests that can still be made before the
+                current 5-minute window ends
+        """
+        now = time.time() if now is None else now
+        window = int(now // QUOTA_WINDOW_SECONDS) * QUOTA_WINDOW_SECONDS
+        with self.lock:
+            remaining = QUOTA_REQUESTS - self.windows.get(window, 0)
+        return remaining
+
+    def to_dict(self):
+        """Method to give the registry's contents as a JSON-ready dictionary.
+
+        Args:
+            None
+
+        Returns:
+            contents (dict): dictionary with keys 'endpoints', 'windows' and
+                'remaining_quota'
+        """
+        with self.lock:
+            contents = {'endpoints': json.loads(json.dumps(self.endpoints)),
+                        'windows': {str(window): count for window, count in
+                                    sorted(self.windows.items())}}
+        contents['remaining_quota'] = self.remaining_quota()
+        return contents
+
+    def to_prometheus(self):
+        """Method to give the registry's contents in Prometheus text format.
+
+        Args:
+            None
+
+        Returns:
+            text (str): metrics in the Prometheus exposition format
+        """
+        contents = self.to_dict()
+        lines = []
+        for name, key in (('calls_total', 'calls'),
+                          ('cache_hits_total', 'cache_hits'),
+                          ('errors_total', 'errors'),
+                          ('response_bytes_total', 'bytes'),
+                          ('rate_limit_sleep_seconds_total',
+                           'sleep_seconds')):
+            lines.append('# TYPE msf_api_%s counter' % name)
+            for endpoint, metrics in sorted(contents['endpoints'].items()):
+                lines.append('msf_api_%s{endpoint="%s"} %s' % (
+                        name, endpoint, metrics[key]))
+        lines.append('# TYPE msf_api_latency_seconds histogram')
+        for endpoint, metrics in sorted(contents['endpoints'].items()):
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS + ['+Inf'],
+                                    metrics['latency_buckets']):
+                cumulative += count
+                lines.append(
+                        'msf_api_latency_seconds_bucket{endpoint="%s",'
+                        'le="%s"} %d' % (endpoint, bound, cumulative))
+            lines.append('msf_api_latency_seconds_sum{endpoint="%s"} %s' % (
+                    endpoint, metrics['latency_seconds']))
+            lines.append('msf_api_latency_seconds_count{endpoint="%s"} %d' % (
+                    endpoint, metrics['calls']))
+        lines.append('# TYPE msf_api_quota_remaining gauge')
+        lines.append('msf_api_quota_remaining %d' % contents[
+                'remaining_quota'])
+        text = '\n'.join(lines) + '\n'
+        return text
+
+    def dump(self, json_path=METRICS_JSON_PATH,
+             prom_path=METRICS_PROM_PATH):
+        """Method to write the registry to a JSON file and a Prometheus file.
+
+        Each file is written to a temporary path and then renamed, so a
+        Prometheus textfile collector never reads a partial file.
+
+        Args:
+            json_path (str): file to write the JSON version to
+            prom_path (str): file to write the Prometheus version to
+
+        Returns:
+            None
+        """
+        for path, text in ((json_path, json.dumps(self.to_dict(), indent=2)),
+                           (prom_path, self.to_prometheus())):
+            with open(path + '.tmp', 'w') as f:
+                f.write(text)
+            os.replace(path + '.tmp', path)
+
+
+# registry shared by every API call made in this process
+registry = metrics_registry()
@@ -9,11 +9,105 @@ suitable for storage in a database, depending on the case.
 
 import requests
 import base64
+import codecs
+import hashlib
+import json
 from datetime import datetime, timedelta
 import time
 import logging
 
 from develop import config
+from develop import formFunctions as fF
+from develop import apiMetrics as aM
+from develop import responseArchive as rA
+from develop import gameRecord as gR
+from develop import jsonStream as jS
+from develop import deadLetters as dL
+from develop import singleFlight as sF
+from develop import rateLimiter as rL
+
+
+PLAYER = 'lebron-james'
+TEAM = 'CLE'
+# bytes read from the API at a time when a response is streamed
+STREAM_CHUNK_BYTES = 64 * 1024
+
+# minimum seconds between two calls to the API, from any thread
+REQUEST_INTERVAL = 3
+# priority of the calls to each endpoint when threads wait for the rate
+# limit, lower first. The game logs and schedules that start a season, and
+# the opponent schedules that list the box scores to request, come first.
+ENDPOINT_PRIORITY = {'player_gamelogs': 0,
+                     'full_game_schedule': 1,
+                     'team_gamelogs': 1,
+                     'scoreboard': 2,
+                     'game_boxscore': 3}
+
+# reused by every API call so connections to the API are kept alive
+session = requests.Session()
+# responses about completed games, shared by every player and team whose
+# data is pulled in this process, keyed by responseArchive's request_key
+response_cache = {}
+# rate limit shared by every thread calling the API
+limiter = rL.rate_limiter(REQUEST_INTERVAL, aM.QUOTA_REQUESTS,
+                          aM.QUOTA_WINDOW_SECONDS)
+# requests being sent, so that threads making an identical request at the
+# same time share one call to the API
+flights = sF.single_flight()
+# results of find_opponent_stats, keyed by its arguments
+opponent_stats_cache = {}
+# keys of the cumulative stats used by find_opponent_stats, and the fields of
+# gameRecord's game_record they are stored in
+OPPONENT_STAT_FIELDS = [('FGAttAgainst', 'FGAA'),
+                        ('FTAttAgainst', 'FTAA'),
+                        ('OffRbsAgainst', 'OREBA'),
+                        ('PtsAgainst', 'PTSA'),
+                        ('TOVAgainst', 'TOVA'),
+                        ('FGAtt', 'FGA'),
+                        ('FTAtt', 'FTA'),
+                        ('OffRbs', 'OREB'),
+                        ('Pts', 'PTS'),
+                        ('TOV', 'TOV'),
+                        ('OppWins', 'OPPW'),
+                        ('OppLosses', 'OPPL')]
+# stats of a player in a game the player has no game log for, as returned by
+# extract_lbj_stats for a game the player did not play in
+DNP_STATS = {'Pts': 0, 'Rbs': 0, 'Ast': 0, '2ptAtt': 0, '2ptMade': 0,
+             '3ptAtt': 0, '3ptMade': 0, 'FtAtt': 0, 'FtMade': 0,
+             'PlusMinus': 0, 'MinutesPlayed': 0}
+
+
+class RequestFailedError(Exception):
+    """Raised when a call to the API fails or returns an error status.
+
+    Attributes:
+        endpoint (str): name of the endpoint called
+        url (str): URL of the request
+        params (dict): query parameters of the request
+    """
+
+    def __init__(self, endpoint, url, params, reason):
+        super().__init__('Request to {} failed: {}'.format(endpoint, reason))
+        self.endpoint = endpoint
+        self.url = url
+        self.params = params
+
+
+def dead_letter(error, affects):
+    """Function to queue a failed request so the rows built without it can
+    be patched once it succeeds.
+
+    Args:
+        error (RequestFailedError): the failure
+        affects (dict): description of the rows built without the response,
+            as read by drain_dead_letters.py
+
+    Returns:
+        None
+    """
+    logging.warning('%s. Continuing without it.', error)
+    dL.queue.add(error.endpoint, error.url, error.params, str(error),
+                 affects)
 
 
 def date_to_api_format(date):
@@ -29,7 +123,156 @@ def date_to_api_format(date):
     return(convert)
 
 
-def send_request_schedule(season, team, daterange):
+def send_request(endpoint, url, params, cacheable=False):
+    """Function to call the API and record the call in the metrics registry
+
+    Every call first waits for the rate limiter shared by all threads, which
+    spaces calls REQUEST_INTERVAL seconds apart, granting waiting calls in
+    the order of ENDPOINT_PRIORITY. The call's latency, the size of the
+    response and the time spent waiting are recorded in apiMetrics' registry
+    under the endpoint's name, and successful responses are appended to
+    responseArchive's archive. If the archive is in offline mode the request
+    is answered from it instead, without calling the API, and recorded as a
+    cache hit. A request made while an identical one is in flight in another
+    thread waits for it and shares its response, or its failure, and is also
+    recorded as a cache hit.
+
+    Args:
+        endpoint (str): name of the endpoint called, such as 'player_gamelogs'
+        url (str): URL of the API call
+        params (dict): query parameters of the API call
+        cacheable (bool): whether the response cannot change, as for the box
+            score of a completed game. Successful responses to such requests
+            are kept in response_cache and reused for identical requests.
+
+    Returns:
+        response (requests.models.Response): Response from API call
+
+    Raises:
+        RequestFailedError: if the request failed or the API returned an
+            error status
+    """
+    if rA.archive.offline:
+        aM.registry.record_cache_hit(endpoint)
+        return rA.archive.replay(endpoint, url, params)
+    key = rA.request_key(endpoint, url, params)
+    if cacheable and key in response_cache:
+        aM.registry.record_cache_hit(endpoint)
+        return response_cache[key]
+    response, shared = flights.do(key, lambda: _get(endpoint, url, params,
+                                                    key, cacheable))
+    if shared:
+        aM.registry.record_cache_hit(endpoint)
+    if response.status_code >= 400:
+        if not shared:
+            aM.registry.record_error(endpoint)
+        raise RequestFailedError(endpoint, url, params,
+                                 'HTTP status {}'.format(
+                                         response.status_code))
+    return response
+
+
+def _get(endpoint, url, params, key, cacheable):
+    """Sends a request to the API, recording, archiving and caching it."""
+    wait_for_rate_limit(endpoint)
+    try:
+        start = time.perf_counter()
+        response = session.get(
+                url=url,
+                params=params,
+                headers=auth_headers()
+        )
+        aM.registry.record_call(endpoint, time.perf_counter() - start,
+                                len(response.content))
+    except requests.exceptions.RequestException as error:
+        aM.registry.record_error(endpoint)
+        logging.error('HTTP Request failed')
+        raise RequestFailedError(endpoint, url, params, error)
+    logging.debug('Response HTTP Status Code: {status_code}'.format(
+        status_code=response.status_code))
+    if response.status_code == 200:
+        rA.archive.append(endpoint, url, params, response.text)
+        if cacheable:
+            response_cache[key] = response
+    return response
+
+
+def wait_for_rate_limit(endpoint):
+    """Waits for the shared rate limiter and records the time spent waiting."""
+    aM.registry.record_sleep(endpoint, limiter.acquire(
+            ENDPOINT_PRIORITY.get(endpoint, max(ENDPOINT_PRIORITY.values()))))
+
+
+def auth_headers():
+    """Function to build the headers authenticating a call to the API."""
+    return {"Authorization": "Basic " + base64.b64encode('{}:{}'.format(
+            config.username, config.password).encode('utf-8')).decode('ascii')}
+
+
+def stream_request(endpoint, url, params):
+    """Function to call the API without reading the whole response at once
+
+    Like send_request, but the body of the response is read from the
+    connection a chunk at a time as the returned iterator is consumed, and
+    is archived as it is read. The call waits for the rate limiter as for
+    send_request, and is recorded in apiMetrics' registry once the body has
+    been read.
+
+    Args:
+        endpoint (str): name of the endpoint called, such as 'player_gamelogs'
+        url (str): URL of the API call
+        params (dict): query parameters of the API call
+
+    Returns:
+        chunks (iterator): chunks of the body of the response as str
+
+    Raises:
+        RequestFailedError: if the request failed or the API returned an
+            error status
+    """
+    if rA.archive.offline:
+        aM.registry.record_cache_hit(endpoint)
+        return rA.archive.replay(endpoint, url, params).iter_content(
+                STREAM_CHUNK_BYTES)
+    wait_for_rate_limit(endpoint)
+    try:
+        start = time.perf_counter()
+        response = session.get(url=url, params=params,
+                               headers=auth_headers(), stream=True)
+        latency = time.perf_counter() - start
+    except requests.exceptions.RequestException as error:
+        aM.registry.record_error(endpoint)
+        logging.error('HTTP Request failed')
+        raise RequestFailedError(endpoint, url, params, error)
+    logging.debug('Response HTTP Status Code: {status_code}'.format(
+        status_code=response.status_code))
+    if response.status_code >= 400:
+        response.close()
+        aM.registry.record_error(endpoint)
+        raise RequestFailedError(endpoint, url, params,
+                                 'HTTP status {}'.format(
+                                         response.status_code))
+    chunks = _response_chunks(endpoint, response, latency)
+    if response.status_code == 200:
+        chunks = rA.archive.append_stream(endpoint, url, params, chunks)
+    return chunks
+
+
+def _response_chunks(endpoint, response, latency):
+    """Yields the decoded body of a streamed response, then records the call."""
+    decoder = codecs.getincrementaldecoder(response.encoding or 'utf-8')()
+    n_bytes = 0
+    try:
+        for data in response.iter_content(STREAM_CHUNK_BYTES):
+            n_bytes += len(data)
+            yield decoder.decode(data)
+        yield decoder.decode(b'', final=True)
+    finally:
+        response.close()
+        aM.registry.record_call(endpoint, latency, n_bytes)
+
+
+def send_request_schedule(season, team, daterange, stream=False):
     """Function to call API for a schedule
 
     Args:
@@ -41,32 +284,21 @@ def send_request_schedule(season, team, daterange):
             must be in form such as '20151027' for Oct 27, 2015. 'today' also
             works. For range, use 'from-20151027-to-20160401'. 'until-today'
             also works. If None object is passed, full season is requested.
+        stream (bool): whether to return the body as chunks, as read by
+            stream_request, instead of the response
 
     Returns:
         response (requests.models.Response): Response from API call
     """
-    try:
-        response = requests.get(
-            url='https://api.mysportsfeeds.com/v1.2/pull/nba/' + season +
+    response = (stream_request if stream else send_request)(
+            'full_game_schedule',
+            'https://api.mysportsfeeds.com/v1.2/pull/nba/' + season +
             '/full_game_schedule.json',
-            params={
-                    "team": team,
-                    "date": daterange
-                    },
-            headers={
-                    "Authorization": "Basic " +
-                    base64.b64encode('{}:{}'.format(
-                            config.username,
-                            config.password
-                            ).encode('utf-8')).decode('ascii')
-                    }
-        )
-        logging.debug('Response HTTP Status Code: {status_code}'.format(
-            status_code=response.status_code))
-        time.sleep(3)
-        return response
-    except requests.exceptions.RequestException:
-        logging.error('HTTP Request failed')
+            {
+                "team": team,
+                "date": daterange
+            })
+    return response
 
 
 def send_request_lbj(season, daterange):
@@ -84,28 +316,141 @@ def send_request_lbj(season, daterange):
     Returns:
         response (requests.models.Response): Response from API call
     """
-    try:
-        response = requests.get(
-                url='https://api.mysportsfeeds.com/v1.2/pull/nba/' +
-                season + '/player_gamelogs.json',
-                params={
-                        "player": ['lebron-james'],
-                        "date": daterange
-                        },
-                headers={
-                        "Authorization": "Basic " +
-                        base64.b64encode('{}:{}'.format(
-                                config.username,
-                                config.password
-                                ).encode('utf-8')).decode('ascii')
-                        }
-        )
-        logging.debug('Response HTTP Status Code: {status_code}'.format(
-            status_code=response.status_code))
-        time.sleep(3)
-        return response
-    except requests.exceptions.RequestException:
-        logging.error('HTTP Request failed')
+    return send_request_gamelogs(season, daterange, [PLAYER])
+
+
+def send_request_gamelogs(season, daterange, players, stream=False):
+    """Function to call API for the game statistics of several players at once
+
+    Args:
+        season (str): Season for the stats, like '2015-2016-regular'
+        daterange (str): Dates for which the stats are requested, in the same
+            formats as for send_request_lbj
+        players (list): players to request stats for, identified as by the
+            API, such as 'lebron-james'
+        stream (bool): whether to return the body as chunks, as read by
+            stream_request, instead of the response
+
+    Returns:
+        response (requests.models.Response): Response from API call
+    """
+    response = (stream_request if stream else send_request)(
+            'player_gamelogs',
+            'https://api.mysportsfeeds.com/v1.2/pull/nba/' +
+            season + '/player_gamelogs.json',
+            {
+                "player": [','.join(players)],
+                "date": daterange
+            })
+    return response
+
+
+def send_request_team_gamelogs(season, daterange, teams):
+    """Function to call API for the team statistics of every game of teams
+
+    Args:
+        season (str): Season for the stats, like '2015-2016-regular'
+        daterange (str): Dates for which the stats are requested, in the same
+            formats as for send_request_lbj
+        teams (list): 3 letter abbreviations of the teams, such as ['CLE']
+
+    Returns:
+        response (requests.models.Response): Response from API call
+    """
+    response = send_request(
+            'team_gamelogs',
+            'https://api.mysportsfeeds.com/v1.2/pull/nba/' +
+            season + '/team_gamelogs.json',
+            {
+                "team": [','.join(teams)],
+                "date": daterange
+            })
+    return response
+
+
+def player_slug(json_player):
+    """Function to identify the player of a game log as the API does in calls
+
+    Args:
+        json_player (dict): dictionary associated with the key 'player' of a
+            game log, with keys including 'FirstName' and 'LastName'
+
+    Returns:
+        slug (str): player identifier, such as 'lebron-james'
+    """
+    slug = '{}-{}'.format(json_player['FirstName'], json_player[
+            'LastName']).lower().replace(' ', '-').replace('.', '').replace(
+                    "'", '')
+    return slug
+
+
+def gamelogs_by_player(gamelogs_json, players):
+    """Function to split the game logs of a batched call by player
+
+    Args:
+        gamelogs_json (dict): output of the .json() method applied to the
+            response returned by send_request_gamelogs
+        players (list): players the game logs were requested for
+
+    Returns:
+        gamelogs (dict): dictionary keyed by player whose values are that
+            player's game logs, in the order returned by the API
+    """
+    gamelogs = {player: [] for player in players}
+    for gamelog in gamelogs_json['playergamelogs'].get('gamelogs', []):
+        slug = player_slug(gamelog['player'])
+        if slug in gamelogs:
+            gamelogs[slug].append(gamelog)
+    return gamelogs
+
+
+def gamelog_stats_by_player(season, daterange, players):
+    """Function to stream the game logs of several players and extract stats
+
+    The game logs are parsed one at a time as the response is read, and only
+    the stats returned by extract_lbj_stats are kept, so the whole response
+    is never held in memory.
+
+    Args:
+        season (str): Season for the stats, like '2015-2016-regular'
+        daterange (str): Dates for which the stats are requested, in the same
+            formats as for send_request_lbj
+        players (list): players to request stats for, such as
+            ['lebron-james']
+
+    Returns:
+        stats (dict): dictionary keyed by player whose values are
+            dictionaries keyed by the datetime.date() of each game the player
+            has a game log for, with the player's stats in the game as
+            returned by extract_lbj_stats
+    """
+    stats = {player: {} for player in players}
+    for gamelog in jS.iter_items(
+            send_request_gamelogs(season, daterange, players, stream=True),
+            ['playergamelogs', 'gamelogs']):
+        slug = player_slug(gamelog['player'])
+        if slug in stats:
+            game_date = datetime.strptime(gamelog['game']['date'],
+                                          '%Y-%m-%d').date()
+            stats[slug][game_date] = extract_lbj_stats(gamelog)
+    return stats
+
+
+def stream_schedule(season, team, daterange):
+    """Generator streaming the games of a team's schedule
+
+    Args:
+        season (str): Season for the schedule, like '2015-2016-regular'
+        team (str): 3 letter abbreviation of the team, such as 'CLE'
+        daterange (str): Dates for the schedule, as for send_request_schedule
+
+    Yields:
+        game (dict): each entry of the 'gameentry' list of the schedule, as
+            it is read from the response
+    """
+    yield from jS.iter_items(
+            send_request_schedule(season, team, daterange, stream=True),
+            ['fullgameschedule', 'gameentry'])
 
 
 def request_opponent_stats(season, gameID):
@@ -121,28 +466,18 @@ def request_opponent_stats(season, gameID):
         response (requests.models.Response): Response from API call
     """
 
-    try:
-        response = requests.get(
-                url='https://api.mysportsfeeds.com/v1.2/pull/nba/' +
-                season + '/game_boxscore.json?gameid=' + gameID,
-                params={
-                        # "teamstats":['FGA','FTA','OREB','PTS','TOV'],
-                        "playerstats": 'none'
-                        },
-                headers={
-                        "Authorization": "Basic " +
-                        base64.b64encode('{}:{}'.format(
-                                config.username,
-                                config.password
-                                ).encode('utf-8')).decode('ascii')
-                        }
-        )
-        logging.debug('Response HTTP Status Code: {status_code}'.format(
-            status_code=response.status_code))
-        time.sleep(3)
-        return response
-    except requests.exceptions.RequestException:
-        logging.error('HTTP Request failed')
+    # box scores are only requested for completed games, so they are cached
+    # and shared between every team that played in the game
+    response = send_request(
+            'game_boxscore',
+            'https://api.mysportsfeeds.com/v1.2/pull/nba/' +
+            season + '/game_boxscore.json?gameid=' + gameID,
+            {
+                # "teamstats":['FGA','FTA','OREB','PTS','TOV'],
+                "playerstats": 'none'
+            },
+            cacheable=True)
+    return response
 
 
 def extract_lbj_stats(json_game):
@@ -179,41 +514,62 @@ def extract_lbj_stats(json_game):
     return(stats_dict)
 
 
-def send_request_cavsgame(season, date):
+def stats_hash(stats_dict):
+    """Function to fingerprint a player's stats for a game
+
+    Args:
+        stats_dict (dict): stats as returned by extract_lbj_stats
+
+    Returns:
+        hash (str): SHA-1 hex digest of the stats, which changes whenever any
+            of the stats is corrected
+    """
+    return hashlib.sha1(json.dumps(stats_dict, sort_keys=True).encode(
+            'utf-8')).hexdigest()
+
+
+def send_request_cavsgame(season, date, team=TEAM):
     """Function to call API for Cleveland Cavs game scores.
 
-    This function is used to determine the winner of a Cavs game.
+    This function is used to determine the winner of a Cavs game. Scores of
+    past dates are cached, so they are only requested once per team and date.
 
     Args:
         season (str): Season for the game results.
         daterange (str): Date of the game for which the results are requested.
             Given date must be in form such as '20151027' for Oct 27, 2015.
             'today' also works.
+        team (str): 3 letter abbreviation of the team, 'CLE' by default
 
     Returns:
         response (requests.models.Response): Response from API call
     """
-    try:
-        response = requests.get(
-                url='https://api.mysportsfeeds.com/v1.2/pull/nba/' +
-                season + '/scoreboard.json?fordate=' + date,
-                params={
-                        "team": ['CLE'],
-                        },
-                headers={
-                        "Authorization": "Basic " +
-                        base64.b64encode('{}:{}'.format(
-                                config.username,
-                                config.password
-                                ).encode('utf-8')).decode('ascii')
-                        }
-        )
-        logging.debug('Response HTTP Status Code: {status_code}'.format(
-            status_code=response.status_code))
-        time.sleep(3)
-        return response
-    except requests.exceptions.RequestException:
-        logging.error('HTTP Request failed')
+    response = send_request(
+            'scoreboard',
+            'https://api.mysportsfeeds.com/v1.2/pull/nba/' +
+            season + '/scoreboard.json?fordate=' + date,
+            {
+                "team": [team],
+            },
+            cacheable=date != 'today')
+    return response
+
+
+def team_won(scoreboard_json, team):
+    """Function to find whether a team won the game on a scoreboard.
+
+    Args:
+        scoreboard_json (dict): output of the .json() method applied to the
+            response returned by send_request_cavsgame
+        team (str): 3 letter abbreviation of the team
+
+    Returns:
+        won (bool): whether the team scored more points than its opponent
+    """
+    game_score = scoreboard_json['scoreboard']['gameScore'][0]
+    if game_score['game']['homeTeam']['Abbreviation'] == team:
+        return int(game_score['homeScore']) > int(game_score['awayScore'])
+    return int(game_score['awayScore']) > int(game_score['homeScore'])
 
 
 def find_opponent_stats(season, from_date, to_date, starting_values, opponent):
@@ -237,13 +593,30 @@ def find_opponent_stats(season, from_date, to_date, starting_values, opponent):
             no games occured for the opponent during the specified timeframe
             the inputed values will be returned to reflect so. This is useful
             for the daily updates that will occur when the app is live.
+            Requests that fail are queued in the dead letter queue and the
+            games they are for are left out, so the stats of the other games
+            are still added. If the opponent's schedule cannot be requested,
+            None is returned instead, as the stats are unavailable.
     """
+    # the same opponent stats are needed for every player on a team, so they
+    # are only computed once per process
+    key = (season, str(from_date), str(to_date), opponent,
+           tuple(sorted(starting_values.items())))
+    if key in opponent_stats_cache:
+        starting_values.update(opponent_stats_cache[key])
+        return starting_values
     daterange = 'from-' + date_to_api_format(
             from_date) + '-to-' + date_to_api_format(
                 to_date)
     # call API for opponent's schedule since last meeting
-    opponent_games_json = send_request_schedule(
-            season, opponent, daterange).json()
+    try:
+        opponent_games_json = send_request_schedule(
+                season, opponent, daterange).json()
+    except RequestFailedError as error:
+        dead_letter(error, {'kind': 'opponent_stats', 'season': season,
+                            'date': str(from_date), 'teams': [opponent]})
+        return None
+    complete = True
     # make sure opponent has played at least 1 game,
     # otherwise there will only be 'last_updated_on' key
     if len(opponent_games_json['fullgameschedule'].keys()) > 1:
@@ -260,8 +633,18 @@ def find_opponent_stats(season, from_date, to_date, starting_values, opponent):
             # call API for each box score of every game the
             # opponent had between the two dates specified (inclusive)
             logging.debug("Requesting stats for %s", opp_game_ID)
-            box_score_json = request_opponent_stats(
-                    season, opp_game_ID).json()
+            try:
+                box_score_json = request_opponent_stats(
+                        season, opp_game_ID).json()
+            except RequestFailedError as error:
+                game_date, away_team, home_team = opp_game_ID.split('-')
+                dead_letter(error, {
+                        'kind': 'opponent_stats', 'season': season,
+                        'date': str(datetime.strptime(game_date,
+                                                      '%Y%m%d').date()),
+                        'teams': [away_team, home_team]})
+                complete = False
+                continue
             # record stats
             hometeamstats = {
                      "FGA": box_score_json[
@@ -339,6 +722,8 @@ def find_opponent_stats(season, from_date, to_date, starting_values, opponent):
                     starting_values['OppWins'] += 1
                 else:
                     starting_values['OppLosses'] += 1
+    if complete:
+        opponent_stats_cache[key] = dict(starting_values)
     return starting_values
 
 
@@ -348,11 +733,17 @@ class schedule:
     Attributes:
         season (str): string representing the season for which this object
             contains data.
-        games (list): list of dictionaries, each dictionary is for a particular
-            game.
+        team (str): 3 letter abbreviation of the team whose games these are.
+        player (str): player whose stats are in the data, such as
+            'lebron-james'. The stats use the same keys for any player.
+        games (list): list of gameRecord.game_record objects, each record is
+            for a particular game.
+        form_state (dict): LeBron James' recent form state after the last game
+            he played in, as built by formFunctions' season_form_state.
     """
 
-    def __init__(self, season, until_date):
+    def __init__(self, season, until_date, team=TEAM, player=PLAYER,
+                 schedule_games=None, gamelog_stats=None):
         """Constructor for a schedule object.
 
         Args:
@@ -364,31 +755,41 @@ class schedule:
                 Must be in format as is required for send_request_schedule()
                 function. If a None object is passed, the full season of data
                 will be assembled.
+            team (str): 3 letter abbreviation of the team, 'CLE' by default
+            player (str): player on the team, 'lebron-james' by default
+            schedule_games (list): the entries of the team's schedule, as
+                yielded by stream_schedule, if already requested
+            gamelog_stats (dict): the player's stats in each game of the
+                season keyed by date, as returned by gamelog_stats_by_player,
+                if already requested
         """
 
         # set until_date = None for entire season,
         # otherwise use format 'until-yesterday',etc.
         self.season = season
+        self.team = team
+        self.player = player
+        self.gamelog_stats = gamelog_stats
         game_list = []
-        # call API for Cavs' season schedule
-        data = send_request_schedule(season,
-                                     'cleveland-cavaliers',
-                                     until_date).json()
+        # call API for team's season schedule, reading it a game at a time
+        if schedule_games is None:
+            schedule_games = stream_schedule(season, team, until_date)
         # add each game to game list
-        for game in data['fullgameschedule']['gameentry']:
-            if game['homeTeam']['Abbreviation'] == 'CLE':
-                game_list.append({'date': datetime.strptime(
+        for game in schedule_games:
+            if game['homeTeam']['Abbreviation'] == team:
+                game_list.append(gR.game_record(date=datetime.strptime(
                         game['date'], '%Y-%m-%d').date(),
-                        'opponent': game['awayTeam']['Abbreviation'],
-                        'home/away': 'home'})
+                        opponent=game['awayTeam']['Abbreviation'],
+                        home_away='home'))
             else:
-                game_list.append({'date': datetime.strptime(
+                game_list.append(gR.game_record(date=datetime.strptime(
                         game['date'], '%Y-%m-%d').date(),
-                        'opponent': game['homeTeam']['Abbreviation'],
-                        'home/away': 'away'})
+                        opponent=game['homeTeam']['Abbreviation'],
+                        home_away='away'))
         self.games = game_list
         self.find_lebron_stats_all_games()
         self.sum_lebron_season_stats()
+        self.find_recent_form()
         self.find_days_rest()
         self.find_last_game_per_opponent()
         self.find_stats_since_last_meeting()
@@ -397,8 +798,10 @@ class schedule:
     def find_lebron_stats_all_games(self):
         """Adds LeBron James individual game stats to data.
 
-        Modifies dicts inside games attribute so that they include LeBron James
-        stats for each individual game.
+        Modifies records inside games attribute so that they include LeBron
+        James stats for each individual game. Each game log is matched to its
+        game by date. The API has no game log for a game the player did not
+        play in, so such a game is recorded as a DNP.
 
         Args:
             None
@@ -406,46 +809,38 @@ class schedule:
         Returns:
             None
         """
-        firstgamedate = self.games[0]['date']
-        lastgamedate = self.games[len(self.games)-1]['date']
-        # request games logs for lebron james for all games this season
-        all_games_json = send_request_lbj(
-                self.season, 'from-' + date_to_api_format(firstgamedate) +
-                '-to-' + date_to_api_format(lastgamedate)).json()
-        json_game_list = all_games_json['playergamelogs']['gamelogs']
-        for game in json_game_list:
-            this_game_stats = extract_lbj_stats(game)
-            self.games[json_game_list.index(game)][
-                    'lbj_pts'] = this_game_stats['Pts']
-            self.games[json_game_list.index(game)][
-                    'lbj_rbs'] = this_game_stats['Rbs']
-            self.games[json_game_list.index(game)][
-                    'lbj_ast'] = this_game_stats['Ast']
-            self.games[json_game_list.index(game)][
-                    'lbj_2pta'] = this_game_stats['2ptAtt']
-            self.games[json_game_list.index(game)][
-                    'lbj_2ptm'] = this_game_stats['2ptMade']
-            self.games[json_game_list.index(game)][
-                    'lbj_3pta'] = this_game_stats['3ptAtt']
-            self.games[json_game_list.index(game)][
-                    'lbj_3ptm'] = this_game_stats['3ptMade']
-            self.games[json_game_list.index(game)][
-                    'lbj_fta'] = this_game_stats['FtAtt']
-            self.games[json_game_list.index(game)][
-                    'lbj_ftm'] = this_game_stats['FtMade']
-            self.games[json_game_list.index(game)][
-                    'lbj_plusminus'] = this_game_stats['PlusMinus']
-            if this_game_stats['MinutesPlayed'] == 0:
-                self.games[json_game_list.index(game)]['DNP'] = True
-            else:
-                self.games[json_game_list.index(game)]['DNP'] = False
+        firstgamedate = self.games[0].date
+        lastgamedate = self.games[len(self.games)-1].date
+        if self.gamelog_stats is None:
+            # request games logs for the player for all games this season
+            self.gamelog_stats = gamelog_stats_by_player(
+                    self.season, 'from-' + date_to_api_format(firstgamedate) +
+                    '-to-' + date_to_api_format(lastgamedate),
+                    [self.player])[self.player]
+        for game in self.games:
+            this_game_stats = self.gamelog_stats.get(game.date)
+            if this_game_stats is None:
+                logging.info('No game log of %s on %s, recorded as DNP.',
+                             self.player, game.date)
+                this_game_stats = DNP_STATS
+            game.lbj_pts = this_game_stats['Pts']
+            game.lbj_rbs = this_game_stats['Rbs']
+            game.lbj_ast = this_game_stats['Ast']
+            game.lbj_2pta = this_game_stats['2ptAtt']
+            game.lbj_2ptm = this_game_stats['2ptMade']
+            game.lbj_3pta = this_game_stats['3ptAtt']
+            game.lbj_3ptm = this_game_stats['3ptMade']
+            game.lbj_fta = this_game_stats['FtAtt']
+            game.lbj_ftm = this_game_stats['FtMade']
+            game.lbj_plusminus = this_game_stats['PlusMinus']
+            game.DNP = this_game_stats['MinutesPlayed'] == 0
 
     def sum_lebron_season_stats(self):
         """Adds LeBron James cumulative stats to data.
 
-        Modifies dicts inside games attribute so that they include LeBron James
-        cumulative stats for the season at the point of the beginning of each
-        particular game.
+        Modifies records inside games attribute so that they include LeBron
+        James cumulative stats for the season at the point of the beginning of
+        each particular game.
 
         Args:
             None
@@ -453,98 +848,121 @@ class schedule:
         Returns:
             None
         """
-        for game in self.games:
-            game_index = self.games.index(game)
+        for game_index, game in enumerate(self.games):
             if game_index == 0:
-                game['season_2pta'] = 0
-                game['season_2ptm'] = 0
-                game['season_3pta'] = 0
-                game['season_3ptm'] = 0
-                game['season_fta'] = 0
-                game['season_ftm'] = 0
-                game['season_plusminus'] = 0
-                game['season_rbs'] = 0
-                game['season_ast'] = 0
-                game['season_2pt_pct'] = 0
-                game['season_3pt_pct'] = 0
-                game['season_ft_pct'] = 0
-                game['season_2ptpg'] = 0
-                game['season_3ptpg'] = 0
-                game['season_ftpg'] = 0
-                game['season_rpg'] = 0
-                game['season_apg'] = 0
-                game['season_plusminpg'] = 0
-                game['cavsWins'] = 0
-                game['cavsLosses'] = 0
-                game['gamesMissed'] = 0
+                game.season_2pta = 0
+                game.season_2ptm = 0
+                game.season_3pta = 0
+                game.season_3ptm = 0
+                game.season_fta = 0
+                game.season_ftm = 0
+                game.season_plusminus = 0
+                game.season_rbs = 0
+                game.season_ast = 0
+                game.season_2pt_pct = 0
+                game.season_3pt_pct = 0
+                game.season_ft_pct = 0
+                game.season_2ptpg = 0
+                game.season_3ptpg = 0
+                game.season_ftpg = 0
+                game.season_rpg = 0
+                game.season_apg = 0
+                game.season_plusminpg = 0
+                game.cavsWins = 0
+                game.cavsLosses = 0
+                game.gamesMissed = 0
             else:
                 last_game = self.games[game_index - 1]
-                game['season_2pta'] = last_game[
-                        'lbj_2pta'] + last_game['season_2pta']
-                game['season_2ptm'] = last_game[
-                        'lbj_2ptm'] + last_game['season_2ptm']
-                game['season_3pta'] = last_game[
-                        'lbj_3pta'] + last_game['season_3pta']
-                game['season_3ptm'] = last_game[
-                        'lbj_3ptm'] + last_game['season_3ptm']
-                game['season_fta'] = last_game[
-                        'lbj_fta'] + last_game['season_fta']
-                game['season_ftm'] = last_game[
-                        'lbj_ftm'] + last_game['season_ftm']
-                game['season_plusminus'] = last_game[
-                        'lbj_plusminus'] + last_game['season_plusminus']
-                game['season_rbs'] = last_game[
-                        'lbj_rbs'] + last_game['season_rbs']
-                game['season_ast'] = last_game[
-                        'lbj_ast'] + last_game['season_ast']
-                game['season_2pt_pct'] = game[
-                        'season_2ptm'] / game['season_2pta']
-                game['season_3pt_pct'] = game[
-                        'season_3ptm'] / game['season_3pta']
-                game['season_ft_pct'] = game[
-                        'season_ftm'] / game['season_fta']
-                game['gamesMissed'] = last_game[
-                        'gamesMissed'] + last_game['DNP']
-                game['season_2ptpg'] = game['season_2ptm'] / game_index - game[
-                        'gamesMissed']
-                game['season_3ptpg'] = game['season_3ptm'] / game_index - game[
-                        'gamesMissed']
-                game['season_ftpg'] = game['season_ftm'] / game_index - game[
-                        'gamesMissed']
-                game['season_rpg'] = game['season_rbs'] / game_index - game[
-                        'gamesMissed']
-                game['season_apg'] = game['season_ast'] / game_index - game[
-                        'gamesMissed']
-                game['season_plusminpg'] = game[
-                        'season_plusminus'] / game_index
-                last_game_date = date_to_api_format(last_game['date'])
-                last_game_json = send_request_cavsgame(
-                        self.season, last_game_date).json()
-                if last_game_json['scoreboard']['gameScore'][0][
-                        'game']['homeTeam']['Abbreviation'] == "CLE":
-                    last_game_cavs = int(last_game_json[
-                            'scoreboard']['gameScore'][0]['homeScore'])
-                    last_game_opp = int(last_game_json[
-                            'scoreboard']['gameScore'][0]['awayScore'])
-                else:
-                    last_game_cavs = int(last_game_json['scoreboard'][
-                            'gameScore'][0]['awayScore'])
-                    last_game_opp = int(last_game_json['scoreboard'][
-                            'gameScore'][0]['homeScore'])
-                if last_game_cavs > last_game_opp:
-                    game['cavsWins'] = last_game['cavsWins'] + 1
-                    game['cavsLosses'] = last_game['cavsLosses']
+                game.season_2pta = last_game.lbj_2pta + last_game.season_2pta
+                game.season_2ptm = last_game.lbj_2ptm + last_game.season_2ptm
+                game.season_3pta = last_game.lbj_3pta + last_game.season_3pta
+                game.season_3ptm = last_game.lbj_3ptm + last_game.season_3ptm
+                game.season_fta = last_game.lbj_fta + last_game.season_fta
+                game.season_ftm = last_game.lbj_ftm + last_game.season_ftm
+                game.season_plusminus = (last_game.lbj_plusminus +
+                                         last_game.season_plusminus)
+                game.season_rbs = last_game.lbj_rbs + last_game.season_rbs
+                game.season_ast = last_game.lbj_ast + last_game.season_ast
+                game.season_2pt_pct = game.season_2ptm / game.season_2pta
+                game.season_3pt_pct = game.season_3ptm / game.season_3pta
+                game.season_ft_pct = game.season_ftm / game.season_fta
+                game.gamesMissed = last_game.gamesMissed + last_game.DNP
+                game.season_2ptpg = game.season_2ptm / game_index - (
+                        game.gamesMissed)
+                game.season_3ptpg = game.season_3ptm / game_index - (
+                        game.gamesMissed)
+                game.season_ftpg = game.season_ftm / game_index - (
+                        game.gamesMissed)
+                game.season_rpg = game.season_rbs / game_index - (
+                        game.gamesMissed)
+                game.season_apg = game.season_ast / game_index - (
+                        game.gamesMissed)
+                game.season_plusminpg = game.season_plusminus / game_index
+                last_game_date = date_to_api_format(last_game.date)
+                try:
+                    last_game_json = send_request_cavsgame(
+                            self.season, last_game_date, self.team).json()
+                except RequestFailedError as error:
+                    # the record is carried over and the games after this
+                    # one are patched once the score is found
+                    dead_letter(error, {'kind': 'team_record',
+                                        'season': self.season,
+                                        'team': self.team,
+                                        'date': str(last_game.date)})
+                    game.cavsWins = last_game.cavsWins
+                    game.cavsLosses = last_game.cavsLosses
+                    continue
+                last_game.won = team_won(last_game_json, self.team)
+                if last_game.won:
+                    game.cavsWins = last_game.cavsWins + 1
+                    game.cavsLosses = last_game.cavsLosses
                 else:
-                    game['cavsWins'] = last_game['cavsWins']
-                    game['cavsLosses'] = last_game['cavsLosses'] + 1
+                    game.cavsWins = last_game.cavsWins
+                    game.cavsLosses = last_game.cavsLosses + 1
+
+    def find_recent_form(self):
+        """Adds LeBron James recent form features to data.
+
+        Modifies records inside games attribute so that they include rolling
+        and exponentially weighted averages of LeBron James' stats over the
+        games he played before each game, computed for the whole season at
+        once. Also records the recent form state after the last game so the
+        daily updates can continue from it.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        stats = []
+        played = []
+        for game in self.games:
+            if game.DNP is False:
+                stats.append([game.lbj_pts,
+                              game.lbj_rbs,
+                              game.lbj_ast,
+                              game.lbj_2ptm + game.lbj_3ptm,
+                              game.lbj_2pta + game.lbj_3pta])
+                played.append(True)
+            else:
+                stats.append([0] * len(fF.FORM_STATS))
+                played.append(False)
+        features = fF.season_form_features(stats, played)
+        for game, game_features in zip(self.games, features.tolist()):
+            for column, value in zip(fF.FORM_COLUMNS, game_features):
+                setattr(game, column, value)
+        self.form_state = fF.season_form_state(
+                self.season, stats, played,
+                [game.date for game in self.games])
 
     def find_days_rest(self):
         """Adds days of rest to data.
 
-        Modifies dicts inside games attribute so that they include the number
-        of days of rest the Cavaliers had before each game. The first game uses
-        0 for this value, which will be irrelevant because that game will not
-        be used in model training or validation.
+        Modifies records inside games attribute so that they include the
+        number of days of rest the Cavaliers had before each game. The first
+        game uses 0 for this value, which will be irrelevant because that game
+        will not be used in model training or validation.
 
         Args:
             None
@@ -552,20 +970,19 @@ class schedule:
         Returns:
             None
         """
-        for game in self.games:
-            game_index = self.games.index(game)
+        for game_index, game in enumerate(self.games):
             if game_index == 0:
-                game['days_rest'] = 0
+                game.days_rest = 0
             else:
                 last_game = self.games[game_index - 1]
-                delta = game['date'] - last_game['date']
-                game['days_rest'] = delta.days - 1
+                delta = game.date - last_game.date
+                game.days_rest = delta.days - 1
 
     def find_last_game_per_opponent(self):
         """Adds date the Cavs last played each opponent to the data.
 
-        Modifies dicts inside games attribute so that they include the date of
-        the Cavs' last meeting with the opponent of each game. If the teams
+        Modifies records inside games attribute so that they include the date
+        of the Cavs' last meeting with the opponent of each game. If the teams
         have not yet met in the given season, the first day of the season is
         used.
 
@@ -575,23 +992,23 @@ class schedule:
         Returns:
             None
         """
-        for game in self.games:
+        for game_index, game in enumerate(self.games):
             prev_game_date = None
             # iterate through Cavs' schedule to find last date
             # these 2 teams played
-            for prev_game_index in range(1, self.games.index(game) - 1):
-                if self.games[prev_game_index]['opponent'] == game['opponent']:
-                    prev_game_date = self.games[prev_game_index]['date']
+            for prev_game_index in range(1, game_index - 1):
+                if self.games[prev_game_index].opponent == game.opponent:
+                    prev_game_date = self.games[prev_game_index].date
             if prev_game_date is None:
                 # if teams haven't played before this season,
                 # use first day of season as last time they played
-                prev_game_date = self.games[0]['date']
-            game['last_meeting_date'] = prev_game_date
+                prev_game_date = self.games[0].date
+            game.last_meeting_date = prev_game_date
 
     def find_stats_since_last_meeting(self):
         """Adds opponent team cumulative stats to the data.
 
-        Modifies dicts inside games attribute so that they include each
+        Modifies records inside games attribute so that they include each
         opponent team's cumulative stats at the point of the beginning of the
         particular game.
 
@@ -601,67 +1018,38 @@ class schedule:
         Returns:
             None
         """
+        games_by_date = {}
         for game in self.games:
-            opponent = game['opponent']
-            lastgame = next((oldgame for oldgame in self.games if oldgame[
-                    'date'] == game['last_meeting_date']), None)
+            games_by_date.setdefault(game.date, game)
+        for game_index, game in enumerate(self.games):
             # get starting values based on what we had last time Cavs played
             # this team
-            game_index = self.games.index(game)
-            last_stats = {}
             if game_index == 0:
-                last_stats['FGAttAgainst'] = 0
-                last_stats['FTAttAgainst'] = 0
-                last_stats['OffRbsAgainst'] = 0
-                last_stats['PtsAgainst'] = 0
-                last_stats['TOVAgainst'] = 0
-                last_stats['FGAtt'] = 0
-                last_stats['FTAtt'] = 0
-                last_stats['OffRbs'] = 0
-                last_stats['Pts'] = 0
-                last_stats['TOV'] = 0
-                last_stats['OppWins'] = 0
-                last_stats['OppLosses'] = 0
-                stat_update = last_stats
+                stat_update = {stat: 0 for stat, _ in OPPONENT_STAT_FIELDS}
             else:
-                last_stats['FGAttAgainst'] = lastgame['FGAA']
-                last_stats['FTAttAgainst'] = lastgame['FTAA']
-                last_stats['OffRbsAgainst'] = lastgame['OREBA']
-                last_stats['PtsAgainst'] = lastgame['PTSA']
-                last_stats['TOVAgainst'] = lastgame['TOVA']
-                last_stats['FGAtt'] = lastgame['FGA']
-                last_stats['FTAtt'] = lastgame['FTA']
-                last_stats['OffRbs'] = lastgame['OREB']
-                last_stats['Pts'] = lastgame['PTS']
-                last_stats['TOV'] = lastgame['TOV']
-                last_stats['OppWins'] = lastgame['OPPW']
-                last_stats['OppLosses'] = lastgame['OPPL']
+                lastgame = games_by_date.get(game.last_meeting_date)
+                last_stats = {stat: getattr(lastgame, field)
+                              for stat, field in OPPONENT_STAT_FIELDS}
                 # get range of dates between last meeting with Cavs and now
                 stat_update = find_opponent_stats(
                         self.season,
-                        game['last_meeting_date'],
-                        game['date'] - timedelta(days=1),
+                        game.last_meeting_date,
+                        game.date - timedelta(days=1),
                         last_stats,
-                        opponent)
+                        game.opponent)
+                # the schedule request is queued, keep the stats as of the
+                # last meeting until the queue is drained
+                if stat_update is None:
+                    stat_update = last_stats
             # now we have season totals for each stat at the time of this game
             # add back into main table
-            game['FGAA'] = stat_update['FGAttAgainst']
-            game['FTAA'] = stat_update['FTAttAgainst']
-            game['OREBA'] = stat_update['OffRbsAgainst']
-            game['PTSA'] = stat_update['PtsAgainst']
-            game['TOVA'] = stat_update['TOVAgainst']
-            game['FGA'] = stat_update['FGAtt']
-            game['FTA'] = stat_update['FTAtt']
-            game['OREB'] = stat_update['OffRbs']
-            game['PTS'] = stat_update['Pts']
-            game['TOV'] = stat_update['TOV']
-            game['OPPW'] = stat_update['OppWins']
-            game['OPPL'] = stat_update['OppLosses']
+            for stat, field in OPPONENT_STAT_FIELDS:
+                setattr(game, field, stat_update[stat])
 
     def calc_opp_efficiency(self):
         """Adds opponents' defensive and offensive efficiency ratings to data.
 
-        Modifies dicts inside games attribute so that they include each
+        Modifies records inside games attribute so that they include each
         opponent's season offensive and defensive efficieny ratings at the
         beginning of the particular game, based on the opponent's cumulative
         statistics as added by find_stats_since_last_meeting method.
@@ -672,23 +1060,42 @@ class schedule:
         Returns:
             None
         """
-        for game in self.games:
-            game_index = self.games.index(game)
-            if game_index == 0:
-                game['opp_def_eff'] = 0
-                game['opp_off_eff'] = 0
+        for game_index, game in enumerate(self.games):
+            if game_index == 0 or game.PTSA == 0:
+                game.opp_def_eff = 0
+                game.opp_off_eff = 0
             else:
-                if game['PTSA'] == 0:
-                    game['opp_def_eff'] = 0
-                    game['opp_off_eff'] = 0
-                else:
-                    game['opp_def_eff'] = (
-                            game['PTSA']/(
-                                    game['FGAA'] - game[
-                                            'OREBA'] + game[
-                                            'TOVA'] + 0.4*game['FTAA']))*100
-                    game['opp_off_eff'] = (
-                            game['PTS']/(
-                                    game['FGA'] - game[
-                                            'OREB'] + game[
-                                            'TOV'] + 0.4*game['FTA']))*100
+                game.opp_def_eff = (game.PTSA / (
+                        game.FGAA - game.OREBA + game.TOVA +
+                        0.4 * game.FTAA)) * 100
+                game.opp_off_eff = (game.PTS / (
+                        game.FGA - game.OREB + game.TOV +
+                        0.4 * game.FTA)) * 100
+
+
+def team_schedules(season, until_date, team, players):
+    """Function to build schedule objects for several players on one team.
+
+    The team's schedule and the game logs of all the players are each
+    requested once, and the box scores and opponent stats they need are
+    shared through response_cache and opponent_stats_cache, so each added
+    player only costs the requests that are specific to them.
+
+    Args:
+        season (str): season of the schedules, like '2015-2016-regular'
+        until_date (str): dates to build the schedules for, as for schedule
+        team (str): 3 letter abbreviation of the team, such as 'CLE'
+        players (list): players on the team, such as ['lebron-james']
+
+    Returns:
+        schedules (dict): dictionary keyed by player whose values are
+            schedule objects
+    """
+    games = list(stream_schedule(season, team, until_date))
+    gamelog_stats = gamelog_stats_by_player(
+            season, 'from-' + games[0]['date'].replace('-', '') + '-to-' +
+            games[-1]['date'].replace('-', ''), players)
+    schedules = {player: schedule(season, until_date, team, player, games,
+                                  gamelog_stats[player])
+                 for player in players}
+    return schedules
@@ -0,0 +1,131 @@
+"""Persistent queue of the API requests that failed while building data.
+
+When a request for a box score or a scoreboard fails while the games table
+is being built or updated, the games that do not depend on it can still be
+built. This module records each failed request in a JSON lines file, with the
+exact endpoint, URL and parameters of the request and a description of the
+rows of the games table that were built without it. drain_dead_letters.py
+later retries the requests and patches only those rows.
+"""
+
+import threading
+import json
+import os
+from datetime import datetime
+
+
+DEAD_LETTER_PATH = 'dead_letters.jsonl'
+
+
+def entry_key(entry):
+    """Function to identify an entry by its request and the rows it affects."""
+    return json.dumps([entry['endpoint'], entry['url'], entry['params'],
+                       entry['affects']], sort_keys=True)
+
+
+class dead_letter_queue:
+    """Class keeping failed requests in a JSON lines file until retried.
+
+    Attributes:
+        path (str): file the entries are kept in
+    """
+
+    def __init__(self, path=DEAD_LETTER_PATH):
+        """Constructor for a dead_letter_queue object.
+
+        Args:
+            path (str): file the entries are kept in
+
+        Returns:
+            None
+        """
+        self.path = path
+        self.lock = threading.Lock()
+
+    def entries(self):
+        """Method to read every entry in the queue, oldest first.
+
+        Args:
+            None
+
+        Returns:
+            entries (list): list of dictionaries with the 'endpoint', 'url'
+                and 'params' of each failed request, the 'error', the time
+                it first 'failed_at', the number of 'attempts' made and the
+                'affects' description of the rows built without it
+        """
+        if not os.path.exists(self.path):
+            return []
+        with open(self.path) as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def add(self, endpoint, url, params, error, affects):
+        """Method to add a failed request to the queue.
+
+        A request that is already queued for the same rows is not added
+        again.
+
+        Args:
+            endpoint (str): name of the endpoint called
+            url (str): URL of the request
+            params (dict): query parameters of the request
+            error (str): description of the failure
+            affects (dict): description of the rows built without the
+                response, with at least a 'kind' key naming how to patch them
+
+        Returns:
+            added (bool): False if the entry was already queued
+        """
+        entry = {'endpoint': endpoint,
+                 'url': url,
+                 'params': params,
+                 'error': error,
+                 'failed_at': str(datetime.now()),
+                 'attempts': 1,
+                 'affects': affects}
+        with self.lock:
+            if entry_key(entry) in {entry_key(queued) for queued in
+                                    self.entries()}:
+                return False
+            with open(self.path, 'a') as f:
+                f.write(json.dumps(entry) + '\n')
+        return True
+
+    def drain(self, retry):
+        """Method to retry every entry, keeping those that fail again.
+
+        Args:
+            retry (function): function passed each entry, which retries the
+                request and patches the affected rows. It raises an exception
+                if the entry could not be resolved.
+
+        Returns:
+            resolved (list): entries resolved
+            remaining (list): entries still in the queue
+        """
+        resolved = []
+        remaining = []
+        for entry in self.entries():
+            try:
+                retry(entry)
+            except Exception as error:
+                entry['attempts'] += 1
+                entry['error'] = str(error)
+                remaining.append(entry)
+            else:
+                resolved.append(entry)
+        with self.lock:
+            # entries added while draining, such as requests that failed
+            # while patching, are kept as well
+            drained = {entry_key(entry) for entry in resolved + remaining}
+            remaining += [entry for entry in self.entries()
+                          if entry_key(entry) not in drained]
+            with open(self.path + '.tmp', 'w') as f:
+                for entry in remaining:
+                    f.write(json.dumps(entry) + '\n')
+            os.replace(self.path + '.tmp', self.path)
+        return resolved, remaining
+
+
+# queue shared by every API call made in this process
+queue = dead_letter_queue()
@@ -0,0 +1,322 @@
+"""Features of the games table derived in the database from raw game facts.
+
+The days of rest, games missed, win-loss record and season stats going into
+each game are computed in Python while games are pulled, and stored in the
+games table next to the facts they come from. This module instead derives
+them from the game_fact table, which holds only the facts about each game,
+with SQL window functions: the days since the previous game come from LAG and
+the season totals from SUM over the games before each one. The derivation is
+kept in the game_features view, so a season's features are found with one
+query, and written back to the games table with one UPDATE, rather than
+rebuilt game by game.
+
+The facts are only written when the FEATURE_SOURCE setting is 'view'. The
+features of every season and player written to are then derived from them
+in SQL after each write, with the games table as the materialized result of
+the view. With the default, 'python', only the games table is written, with
+the features computed in Python.
+
+The season stats use the same formulas as the daily update and
+refreshFunctions' season_features. Window functions need SQLite 3.25 or
+MySQL 8.
+"""
+
+import sys
+sys.path.append("../")
+from app import app
+from app.models import Game, GameFact
+from sqlalchemy import and_, case, cast, func, select, text, Integer
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ColumnElement
+
+
+VIEW_NAME = 'game_features'
+# keys of the stats returned by dppf.extract_lbj_stats, and the game_fact
+# columns they are stored in
+STAT_FACTS = [('Pts', 'pts'),
+              ('Rbs', 'rbs'),
+              ('Ast', 'ast'),
+              ('2ptAtt', 'fg2a'),
+              ('2ptMade', 'fg2m'),
+              ('3ptAtt', 'fg3a'),
+              ('3ptMade', 'fg3m'),
+              ('FtAtt', 'fta'),
+              ('FtMade', 'ftm'),
+              ('PlusMinus', 'plusminus')]
+# fields of gameRecord's game_record, and the game_fact columns they are
+# stored in
+RECORD_FACTS = [('lbj_pts', 'pts'),
+                ('lbj_rbs', 'rbs'),
+                ('lbj_ast', 'ast'),
+                ('lbj_2pta', 'fg2a'),
+                ('lbj_2ptm', 'fg2m'),
+                ('lbj_3pta', 'fg3a'),
+                ('lbj_3ptm', 'fg3m'),
+                ('lbj_fta', 'fta'),
+                ('lbj_ftm', 'ftm'),
+                ('lbj_plusminus', 'plusminus'),
+                ('DNP', 'lbj_DNP'),
+                ('won', 'team_won')]
+
+
+class days_between(ColumnElement):
+    """Expression for the whole number of days from one datetime to another.
+
+    Attributes:
+        start: expression of the earlier datetime
+        end: expression of the later datetime
+    """
+
+    type = Integer()
+    inherit_cache = True
+
+    def __init__(self, start, end):
+        """Constructor for a days_between expression."""
+        self.start = start
+        self.end = end
+
+
+@compiles(days_between)
+def _days_between_sqlite(element, compiler, **kw):
+    """Compiles days_between with SQLite's julianday function."""
+    return 'CAST(julianday(date({})) - julianday(date({})) AS INTEGER)'.format(
+            compiler.process(element.end, **kw),
+            compiler.process(element.start, **kw))
+
+
+@compiles(days_between, 'mysql')
+def _days_between_mysql(element, compiler, **kw):
+    """Compiles days_between with MySQL's DATEDIFF function."""
+    return 'DATEDIFF({}, {})'.format(compiler.process(element.end, **kw),
+                                     compiler.process(element.start, **kw))
+
+
+def feature_source():
+    """Finds whether features come from 'python' or the 'view'."""
+    return app.config.get('FEATURE_SOURCE', 'python')
+
+
+def record_facts(record, season, player, team):
+    """Function to find the game_fact columns of a game record.
+
+    Args:
+        record (gameRecord.game_record): record of the game
+        season (str): season of the game
+        player (str): player the record is for
+        team (str): the player's team
+
+    Returns:
+        facts (dict): dictionary of column names and values that can be
+            passed to the GameFact constructor as keyword arguments
+    """
+    facts = {'date': record.date, 'season': season, 'player': player,
+             'team': team, 'opponent': record.opponent,
+             'home_away': record.home_away}
+    for field, column in RECORD_FACTS:
+        facts[column] = getattr(record, field)
+    if record.DNP is None:
+        # the player was inactive, so the record's stats are not his
+        for _, column in STAT_FACTS:
+            facts[column] = None
+    return facts
+
+
+def stats_facts(game_stats):
+    """Function to find the game_fact columns of a player's stats in a game.
+
+    Args:
+        game_stats (dict): the player's stats, as returned by
+            dppf.extract_lbj_stats
+
+    Returns:
+        facts (dict): dictionary of column names and values
+    """
+    facts = {column: game_stats[stat] for stat, column in STAT_FACTS}
+    facts['lbj_DNP'] = game_stats['MinutesPlayed'] == 0
+    return facts
+
+
+def save_facts(database, game, **facts):
+    """Function to write facts about a game, adding its row if needed.
+
+    The row is added to the session but not committed. Nothing is written
+    unless features come from the view.
+
+    Args:
+        database (flask_sqlalchemy.SQLAlchemy): database to write to
+        game (app.models.Game): row of the game in the games table
+        **facts: values of game_fact columns to set
+
+    Returns:
+        fact (app.models.GameFact): row of the game's facts, or None if
+            nothing was written
+    """
+    if feature_source() != 'view':
+        return None
+    fact = GameFact.query.filter_by(player=game.player,
+                                    date=game.date).first()
+    if fact is None:
+        fact = GameFact(date=game.date, season=game.season,
+                        player=game.player, team=game.team,
+                        opponent=game.opponent, home_away=game.home_away)
+        database.session.add(fact)
+    for column, value in facts.items():
+        setattr(fact, column, value)
+    return fact
+
+
+def _before(expression):
+    """Sums an expression over the games of the season before each game."""
+    return func.coalesce(func.sum(expression).over(
+            partition_by=[GameFact.season, GameFact.player],
+            order_by=GameFact.date, rows=(None, -1)), 0)
+
+
+def _ratio(numerator, denominator):
+    """Divides numerator by denominator, giving 0 when the denominator is 0."""
+    return case((denominator > 0, 1.0 * numerator / denominator), else_=0)
+
+
+def feature_select(season=None, player=None):
+    """Function to build the query deriving every game's features from facts.
+
+    Args:
+        season (str): season to limit the query to, or None for every season
+        player (str): player to limit the query to, or None for every player
+
+    Returns:
+        query (sqlalchemy.sql.Select): query with the season, player and date
+            of each game in game_fact and, named as in the games table, its
+            days of rest, games missed, team record and the player's season
+            stats going into it
+    """
+    previous_date = func.lag(GameFact.date).over(
+            partition_by=[GameFact.season, GameFact.player],
+            order_by=GameFact.date)
+    was_played = GameFact.lbj_DNP.is_(False)
+    missed = case((was_played, 0), else_=1)
+    stat_totals = [_before(case((was_played, column), else_=0)).label(
+            column.key) for column in [GameFact.rbs, GameFact.ast,
+                                       GameFact.plusminus, GameFact.fg2a,
+                                       GameFact.fg2m, GameFact.fg3a,
+                                       GameFact.fg3m, GameFact.fta,
+                                       GameFact.ftm]]
+    facts = select(
+            GameFact.season, GameFact.player, GameFact.date,
+            func.coalesce(days_between(previous_date, GameFact.date) - 1,
+                          0).label('lbj_days_rest'),
+            _before(missed).label('lbj_games_missed'),
+            _before(case((GameFact.team_won.is_(True), 1),
+                         else_=0)).label('cavsWins'),
+            _before(case((GameFact.team_won.is_(False), 1),
+                         else_=0)).label('cavsLosses'),
+            _before(1 - missed).label('played'),
+            *stat_totals)
+    # the windows are partitioned by season and player, so limiting them
+    # before the windows are computed does not change the features
+    if season is not None:
+        facts = facts.where(GameFact.season == season)
+    if player is not None:
+        facts = facts.where(GameFact.player == player)
+    totals = facts.subquery()
+    return select(
+            totals.c.season, totals.c.player, totals.c.date,
+            totals.c.lbj_days_rest,
+            cast(totals.c.lbj_games_missed, Integer).label('lbj_games_missed'),
+            cast(totals.c.cavsWins, Integer).label('cavsWins'),
+            cast(totals.c.cavsLosses, Integer).label('cavsLosses'),
+            _ratio(totals.c.fg2m, totals.c.fg2a).label('lbj_2pt_pct'),
+            _ratio(totals.c.fg3m, totals.c.fg3a).label('lbj_3pt_pct'),
+            _ratio(totals.c.ftm, totals.c.fta).label('lbj_ft_pct'),
+            _ratio(totals.c.fg2m, totals.c.played).label('lbj_2pt_mpg'),
+            _ratio(totals.c.fg3m, totals.c.played).label('lbj_3pt_mpg'),
+            _ratio(totals.c.ftm, totals.c.played).label('lbj_ft_mpg'),
+            _ratio(totals.c.rbs, totals.c.played).label('lbj_rbs_pgm'),
+            _ratio(totals.c.ast, totals.c.played).label('lbj_ast_pgm'),
+            _ratio(totals.c.plusminus, totals.c.played).label(
+                    'lbj_plusminpg'))
+
+
+# columns of the games table the view derives
+FEATURE_COLUMNS = [column.name for column in
+                   feature_select().selected_columns][3:]
+
+
+def create_feature_view(engine):
+    """Function to create, or replace, the game_features view.
+
+    Args:
+        engine (sqlalchemy.engine.Engine): engine of the database to create
+            it in, such as db.engine
+
+    Returns:
+        None
+    """
+    query = feature_select().compile(engine,
+                                     compile_kwargs={'literal_binds': True})
+    with engine.begin() as connection:
+        connection.execute(text('DROP VIEW IF EXISTS ' + VIEW_NAME))
+        connection.execute(text('CREATE VIEW {} AS {}'.format(VIEW_NAME,
+                                                              query)))
+
+
+def season_features(database, season, player):
+    """Function to derive the features of every game of a season.
+
+    Args:
+        database (flask_sqlalchemy.SQLAlchemy): database to query
+        season (str): season of the games, like '2017-2018-regular'
+        player (str): player the games are for
+
+    Returns:
+        features (list): list of dictionaries, one per game in date order,
+            with the 'date' of the game and its value of each column in
+            FEATURE_COLUMNS
+    """
+    features = feature_select(season, player).subquery()
+    rows = database.session.execute(
+            select(features).order_by(features.c.date)).mappings()
+    return [{column: row[column] for column in ['date'] + FEATURE_COLUMNS}
+            for row in rows]
+
+
+def apply_features(database, season, player):
+    """Function to write derived features into a season's rows of the games
+    table, with a single UPDATE.
+
+    Args:
+        database (flask_sqlalchemy.SQLAlchemy): database to write to
+        season (str): season of the games, like '2017-2018-regular'
+        player (str): player the games are for
+
+    Returns:
+        n_rows (int): number of rows of the games table updated
+    """
+    features = feature_select(season, player).subquery()
+    # the version is incremented by hand, as the update bypasses the ORM
+    result = database.session.execute(
+            Game.__table__.update().where(and_(
+                    Game.player == features.c.player,
+                    Game.date == features.c.date)).values(
+                    version=Game.version + 1,
+                    **{column: features.c[column] for column in
+                       FEATURE_COLUMNS}))
+    database.session.commit()
+    return result.rowcount
+
+
+def refresh_features(database, season, player):
+    """Function to derive a season's features from its facts, when features
+    come from the view.
+
+    Args:
+        database (flask_sqlalchemy.SQLAlchemy): database to write to
+        season (str): season of the games, like '2017-2018-regular'
+        player (str): player the games are for
+
+    Returns:
+        n_rows (int): number of rows of the games table updated
+    """
+    if feature_source() != 'view':
+        return 0
+    return apply_features(database, season, player)
@@ -0,0 +1,246 @@
+"""Functions for tracking LeBron James' recent form.
+
+This module provides functions for rolling averages over his last few games
+and exponentially weighted averages of his points, rebounds, assists and
+field goal shooting. During the daily update the averages are kept in a small
+state (a fixed-size ring buffer of recent games, running sums and the current
+exponentially weighted averages) that is saved to disk between runs, so each
+new game is added in constant time. When building a season from scratch the
+same features are computed for every game at once with array operations.
+"""
+
+import numpy as np
+import json
+import os
+import logging
+
+
+FORM_WINDOW = 5
+EWMA_ALPHA = 0.3
+FORM_STATE_PATH = 'form_state.json'
+# per-game stats tracked, fgm and fga are field goals made and attempted
+FORM_STATS = ['pts', 'rbs', 'ast', 'fgm', 'fga']
+FORM_COLUMNS = ['lbj_pts_lastn',
+                'lbj_rbs_lastn',
+                'lbj_ast_lastn',
+                'lbj_fg_pct_lastn',
+                'lbj_pts_ewma',
+                'lbj_rbs_ewma',
+                'lbj_ast_ewma',
+                'lbj_fg_pct_ewma']
+
+
+def form_stat_vector(game_stats):
+    """Function to pick the stats tracked for recent form out of a game.
+
+    Args:
+        game_stats (dict): dictionary of stats for a game as returned by
+            dataPullProcessFunctions' extract_lbj_stats
+
+    Returns:
+        stats (list): the game's points, rebounds, assists, field goals made
+            and field goals attempted
+    """
+    stats = [game_stats['Pts'],
+             game_stats['Rbs'],
+             game_stats['Ast'],
+             game_stats['2ptMade'] + game_stats['3ptMade'],
+             game_stats['2ptAtt'] + game_stats['3ptAtt']]
+    return stats
+
+
+def new_form_state(season, window=FORM_WINDOW, alpha=EWMA_ALPHA):
+    """Function to create the recent form state at the start of a season.
+
+    Args:
+        season (str): season the state is for, like '2017-2018-regular'
+        window (int): number of games in the rolling averages
+        alpha (float): weight of the newest game in the exponentially weighted
+            averages
+
+    Returns:
+        state (dict): recent form state with no games in it
+    """
+    state = {'season': season,
+             'window': window,
+             'alpha': alpha,
+             'buffer': [[0] * len(FORM_STATS) for i in range(window)],
+             'position': 0,
+             'count': 0,
+             'sums': [0] * len(FORM_STATS),
+             'ewma': None,
+             'last_game_date': None}
+    return state
+
+
+def update_form_state(state, stats, game_date):
+    """Function to add a game LeBron James played in to the recent form state.
+
+    The stats of the game replace the oldest game in the ring buffer, and the
+    running sums and exponentially weighted averages are updated from them,
+    so the cost does not depend on how many games have been played.
+
+    Args:
+        state (dict): recent form state, modified in place
+        stats (list): stats for the game as returned by form_stat_vector
+        game_date (datetime.date()): date of the game
+
+    Returns:
+        None
+    """
+    oldest = state['buffer'][state['position']]
+    if state['count'] < state['window']:
+        state['count'] += 1
+        oldest = [0] * len(FORM_STATS)
+    state['sums'] = [total + new - old for total, new, old in zip(
+            state['sums'], stats, oldest)]
+    state['buffer'][state['position']] = list(stats)
+    state['position'] = (state['position'] + 1) % state['window']
+    if state['ewma'] is None:
+        state['ewma'] = list(stats)
+    else:
+        state['ewma'] = [state['alpha'] * new + (1 - state['alpha']) * old
+                         for new, old in zip(stats, state['ewma'])]
+    state['last_game_date'] = str(game_date)
+
+
+def form_features(state):
+    """Function to find the recent form features described by a state.
+
+    Args:
+        state (dict): recent form state
+
+    Returns:
+        features (dict): dictionary keyed by the names in FORM_COLUMNS. All
+            features are 0 if LeBron James has not played yet this season.
+    """
+    if state['count'] == 0:
+        return dict.fromkeys(FORM_COLUMNS, 0)
+    means = [total / state['count'] for total in state['sums']]
+    features = _features_from_averages(means, 'lastn')
+    features.update(_features_from_averages(state['ewma'], 'ewma'))
+    return features
+
+
+def _features_from_averages(averages, suffix):
+    """Turns averages of the FORM_STATS into features named with suffix."""
+    pts, rbs, ast, fgm, fga = averages
+    features = {'lbj_pts_' + suffix: pts,
+                'lbj_rbs_' + suffix: rbs,
+                'lbj_ast_' + suffix: ast,
+                'lbj_fg_pct_' + suffix: fgm / fga if fga > 0 else 0}
+    return features
+
+
+def load_form_state(season, path=FORM_STATE_PATH):
+    """Function to read the recent form state saved by save_form_state.
+
+    Args:
+        season (str): season the state is needed for. If the saved state is
+            for a different season, or there is no saved state, a new state
+            for this season is returned.
+        path (str): file the state was saved to
+
+    Returns:
+        state (dict): recent form state
+    """
+    if not os.path.exists(path):
+        logging.warning('No recent form state found, starting a new one.')
+        return new_form_state(season)
+    with open(path) as f:
+        state = json.load(f)
+    if state['season'] != season:
+        state = new_form_state(season)
+    return state
+
+
+def save_form_state(state, path=FORM_STATE_PATH):
+    """Function to write the recent form state to disk.
+
+    Args:
+        state (dict): recent form state
+        path (str): file to write the state to
+
+    Returns:
+        None
+    """
+    with open(path + '.tmp', 'w') as f:
+        json.dump(state, f)
+    os.replace(path + '.tmp', path)
+
+
+def season_form_features(stats, played, window=FORM_WINDOW,
+                         alpha=EWMA_ALPHA):
+    """Function to find the recent form features before every game of a season.
+
+    Rolling sums come from differences of cumulative sums over the games
+    LeBron James played, and the exponentially weighted averages from a
+    single matrix product with the weights of every earlier game.
+
+    Args:
+        stats (np.ndarray): array of shape (games, 5) with the stats of each
+            game in the order of FORM_STATS. Rows of games he did not play in
+            are ignored.
+        played (np.ndarray): boolean array marking the games he played in
+        window (int): number of games in the rolling averages
+        alpha (float): weight of the newest game in the exponentially weighted
+            averages
+
+    Returns:
+        features (np.ndarray): array of shape (games, 8) with the features in
+            FORM_COLUMNS as they stood at the start of each game
+    """
+    played = np.asarray(played, dtype=bool)
+    played_stats = np.asarray(stats, dtype=float)[played]
+    n_played = played_stats.shape[0]
+    # number of games played before each game of the season
+    before = np.concatenate([[0], np.cumsum(played)[:-1]]).astype(int)
+    start = np.maximum(before - window, 0)
+    cumulative = np.vstack([np.zeros((1, len(FORM_STATS))),
+                            np.cumsum(played_stats, axis=0)])
+    counts = np.maximum(before - start, 1)[:, None]
+    means = (cumulative[before] - cumulative[start]) / counts
+    # weight of game i in the average after game j is alpha*(1-alpha)**(j-i),
+    # except the first game which starts the average
+    lags = np.subtract.outer(np.arange(n_played), np.arange(n_played))
+    weights = np.where(lags >= 0, alpha * (1 - alpha) ** np.maximum(lags, 0),
+                       0)
+    weights[:, 0] = (1 - alpha) ** np.arange(n_played)
+    ewma = np.vstack([np.zeros((1, len(FORM_STATS))),
+                      weights.dot(played_stats)])[before]
+    features = np.column_stack([
+            means[:, :3], _safe_ratio(means[:, 3], means[:, 4]),
+            ewma[:, :3], _safe_ratio(ewma[:, 3], ewma[:, 4])])
+    return features
+
+
+def _safe_ratio(made, attempted):
+    """Divides made by attempted, giving 0 where nothing was attempted."""
+    return np.where(attempted > 0, made / np.where(attempted > 0, attempted,
+                                                   1), 0)
+
+
+def season_form_state(season, stats, played, dates, window=FORM_WINDOW,
+                      alpha=EWMA_ALPHA):
+    """Function to build the recent form state at the end of a season's games.
+
+    Args:
+        season (str): season of the games, like '2017-2018-regular'
+        stats (np.ndarray): array of shape (games, 5) as for
+            season_form_features
+        played (np.ndarray): boolean array marking the games he played in
+        dates (list): list of datetime.date() objects of the games
+        window (int): number of games in the rolling averages
+        alpha (float): weight of the newest game in the exponentially weighted
+            averages
+
+    Returns:
+        state (dict): recent form state after the last game played, which can
+            be saved and then updated during the daily updates
+    """
+    state = new_form_state(season, window, alpha)
+    for game_stats, game_played, game_date in zip(np.asarray(stats).tolist(),
+                                                  played, dates):
+        if game_played:
+            update_form_state(state, game_stats, game_date)
+    return state
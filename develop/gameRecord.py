@@ -0,0 +1,181 @@
+"""Compact record of the data about one game built by the schedule class.
+
+A schedule object builds around 60 values for each game of a season, from
+the date and opponent to LeBron James' cumulative season stats and the
+opponent's cumulative box score totals. This module provides a record class
+with a fixed set of fields stored in __slots__, so a game takes a fraction of
+the memory of a dictionary holding the same values and its fields are read
+and written as attributes. Records still support the item access of the
+dictionaries they replace, with the same keys, and can be turned into the
+columns of a Game row or into a DataFrame with one getter for all fields.
+"""
+
+import sys
+sys.path.append("../")
+from develop import formFunctions as fF
+from operator import attrgetter
+
+
+# fields of a game record, in the order used for DataFrames
+FIELDS = (['date', 'opponent', 'home_away',
+           'lbj_pts', 'lbj_rbs', 'lbj_ast', 'lbj_2pta', 'lbj_2ptm',
+           'lbj_3pta', 'lbj_3ptm', 'lbj_fta', 'lbj_ftm', 'lbj_plusminus',
+           'DNP',
+           'season_2pta', 'season_2ptm', 'season_3pta', 'season_3ptm',
+           'season_fta', 'season_ftm', 'season_plusminus', 'season_rbs',
+           'season_ast', 'season_2pt_pct', 'season_3pt_pct', 'season_ft_pct',
+           'season_2ptpg', 'season_3ptpg', 'season_ftpg', 'season_rpg',
+           'season_apg', 'season_plusminpg', 'cavsWins', 'cavsLosses', 'won',
+           'gamesMissed'] +
+          fF.FORM_COLUMNS +
+          ['days_rest', 'last_meeting_date',
+           'FGAA', 'FTAA', 'OREBA', 'PTSA', 'TOVA',
+           'FGA', 'FTA', 'OREB', 'PTS', 'TOV', 'OPPW', 'OPPL',
+           'opp_def_eff', 'opp_off_eff'])
+# dictionary keys that are not valid attribute names, and their fields
+KEY_FIELDS = {'home/away': 'home_away'}
+# columns of the Game model filled from every record, and their fields
+GAME_COLUMNS = ([('date', 'date'),
+                 ('opponent', 'opponent'),
+                 ('home_away', 'home_away'),
+                 ('lbj_days_rest', 'days_rest'),
+                 ('lbj_2pt_pct', 'season_2pt_pct'),
+                 ('lbj_3pt_pct', 'season_3pt_pct'),
+                 ('lbj_ft_pct', 'season_ft_pct'),
+                 ('lbj_2pt_mpg', 'season_2ptpg'),
+                 ('lbj_3pt_mpg', 'season_3ptpg'),
+                 ('lbj_ft_mpg', 'season_ftpg'),
+                 ('lbj_rbs_pgm', 'season_rpg'),
+                 ('lbj_ast_pgm', 'season_apg'),
+                 ('lbj_plusminpg', 'season_plusminpg'),
+                 ('opp_def_eff', 'opp_def_eff'),
+                 ('opp_off_eff', 'opp_off_eff'),
+                 ('cavsWins', 'cavsWins'),
+                 ('cavsLosses', 'cavsLosses'),
+                 ('oppWins', 'OPPW'),
+                 ('oppLosses', 'OPPL'),
+                 ('lbj_games_missed', 'gamesMissed')] +
+                [(column, column) for column in fF.FORM_COLUMNS])
+# columns of the Game model filled only for games with the player's stats
+PLAYED_GAME_COLUMNS = [('pts', 'lbj_pts'),
+                       ('rbs', 'lbj_rbs'),
+                       ('ast', 'lbj_ast'),
+                       ('lbj_DNP', 'DNP')]
+
+
+class game_record:
+    """Class holding the data about one game in a fixed set of fields.
+
+    Every field in FIELDS is an attribute, None until it is set. Fields can
+    also be read and set with the keys of the dictionaries schedule objects
+    used to build, such as record['home/away'], and a key is 'in' a record
+    once its field has been set.
+    """
+
+    __slots__ = FIELDS
+
+    def __init__(self, **fields):
+        """Constructor for a game_record object.
+
+        Args:
+            **fields: initial values of fields, by field name
+
+        Returns:
+            None
+        """
+        for field in FIELDS:
+            setattr(self, field, fields.pop(field, None))
+        if fields:
+            raise TypeError('Unknown fields: {}'.format(', '.join(fields)))
+
+    def __getitem__(self, key):
+        """Reads a field by its dictionary key."""
+        try:
+            return getattr(self, KEY_FIELDS.get(key, key))
+        except AttributeError:
+            raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        """Sets a field by its dictionary key."""
+        try:
+            setattr(self, KEY_FIELDS.get(key, key), value)
+        except AttributeError:
+            raise KeyError(key)
+
+    def __contains__(self, key):
+        """Checks whether the field of a dictionary key has been set."""
+        return getattr(self, KEY_FIELDS.get(key, key), None) is not None
+
+    def __eq__(self, other):
+        """Compares every field of two records."""
+        return (isinstance(other, game_record) and
+                all_fields(self) == all_fields(other))
+
+    def __repr__(self):
+        """Shows the fields that have been set."""
+        return 'game_record({})'.format(', '.join(
+                '{}={!r}'.format(field, getattr(self, field))
+                for field in FIELDS if getattr(self, field) is not None))
+
+    def update(self, items):
+        """Method to set several fields from (key, value) pairs or a dict.
+
+        Args:
+            items (iterable): dictionary or iterable of (key, value) pairs
+
+        Returns:
+            None
+        """
+        if isinstance(items, dict):
+            items = items.items()
+        for key, value in items:
+            self[key] = value
+
+    def game_columns(self):
+        """Method to find the values of the Game model's columns.
+
+        Columns describing the game are always filled. If the player has no
+        stats for the game, because he was inactive, his stats are left out
+        and 'lbj_inactive' is True instead.
+
+        Args:
+            None
+
+        Returns:
+            columns (dict): dictionary of column names and values that can be
+                passed to the Game constructor as keyword arguments
+        """
+        columns = dict(zip([column for column, _ in GAME_COLUMNS],
+                           _game_getter(self)))
+        if self.DNP is None:
+            columns['lbj_inactive'] = True
+        else:
+            columns.update(zip([column for column, _ in PLAYED_GAME_COLUMNS],
+                               _played_getter(self)))
+        return columns
+
+
+_all_getter = attrgetter(*FIELDS)
+_game_getter = attrgetter(*[field for _, field in GAME_COLUMNS])
+_played_getter = attrgetter(*[field for _, field in PLAYED_GAME_COLUMNS])
+
+
+def all_fields(record):
+    """Function to read every field of a record, in the order of FIELDS."""
+    return _all_getter(record)
+
+
+def records_to_dataframe(records):
+    """Function to build a DataFrame with a row per record.
+
+    Args:
+        records (list): list of game_record objects
+
+    Returns:
+        df (pd.DataFrame): DataFrame with a column per field in FIELDS
+    """
+    # pandas is only needed here, and the daily update does not load it
+    import pandas as pd
+    df = pd.DataFrame.from_records([_all_getter(record) for record in records],
+                                   columns=FIELDS)
+    return df
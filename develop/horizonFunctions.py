@@ -0,0 +1,177 @@
+"""Functions for predicting every remaining game on the schedule at once.
+
+This module provides functions that take the next upcoming game in the
+database, the rest of the season schedule and each opponent's current
+efficiency ratings, and build projected predictor rows for all remaining
+games. The rows are scored with the exported model coefficients in a single
+matrix multiplication and stored in the horizon_predictions table.
+"""
+
+import sys
+sys.path.append("../")
+from app.models import HorizonPredictions
+from develop import dataPullProcessFunctions as dppf
+from develop import inferenceFunctions as iF
+from develop import leagueEfficiency as lE
+from datetime import datetime, time
+import numpy as np
+import logging
+
+
+def remaining_schedule(season, team, today):
+    """Function to find every game left on a team's schedule.
+
+    Args:
+        season (str): season of the schedule, like '2017-2018-regular'
+        team (str): 3 letter abbreviation of the team, like 'CLE'
+        today (datetime.date()): games on or after this date are returned
+
+    Returns:
+        remaining_games (list): list of dictionaries with date, opponent, and
+            home/away status of each remaining game, in date order
+    """
+    schedulejson = dppf.send_request_schedule(season, team, None).json()
+    remaining_games = []
+    if len(schedulejson['fullgameschedule']) > 1:
+        for game in schedulejson['fullgameschedule']['gameentry']:
+            game_date = datetime.strptime(game['date'], '%Y-%m-%d').date()
+            if game_date < today:
+                continue
+            if game['awayTeam']['Abbreviation'] == team:
+                remaining_games.append({
+                        'date': game_date,
+                        'opponent': game['homeTeam']['Abbreviation'],
+                        'home/away': 'away'})
+            else:
+                remaining_games.append({
+                        'date': game_date,
+                        'opponent': game['awayTeam']['Abbreviation'],
+                        'home/away': 'home'})
+    return remaining_games
+
+
+def current_opponent_efficiencies(matrix, today):
+    """Function to find the efficiency ratings of every team as of today.
+
+    Teams with no efficiency ratings yet (they have not played this season)
+    are skipped.
+
+    Args:
+        matrix (dict): dictionary as returned by leagueEfficiency's
+            efficiency_matrix for the current season
+        today (datetime.date()): only games played before this date are
+            counted
+
+    Returns:
+        efficiencies (dict): dictionary keyed by team abbreviation whose
+            values are (defensive efficiency, offensive efficiency) tuples
+    """
+    efficiencies = {}
+    for team in matrix['teams']:
+        ratings = lE.lookup(matrix, team, today)
+        if ratings['opp_def_eff'] != 0:
+            efficiencies[team] = (ratings['opp_def_eff'],
+                                  ratings['opp_off_eff'])
+    return efficiencies
+
+
+def horizon_days_rest(upcoming_game, remaining_games):
+    """Function to find days of rest before each remaining game.
+
+    Args:
+        upcoming_game (app.models.Game): bottom row of the game table, which
+            must be the first of remaining_games
+        remaining_games (list): list returned by remaining_schedule
+
+    Returns:
+        days_rest (np.ndarray): days of rest before each game in
+            remaining_games
+    """
+    dates = np.array([game['date'] for game in remaining_games],
+                     dtype='datetime64[D]')
+    days_rest = np.empty(len(remaining_games), dtype=int)
+    days_rest[0] = upcoming_game.lbj_days_rest
+    days_rest[1:] = np.diff(dates).astype(int) - 1
+    return days_rest
+
+
+def build_horizon_predictors(upcoming_game, remaining_games, efficiencies,
+                             columns):
+    """Function to build projected predictor rows for the remaining games.
+
+    Every row starts from the predictors of the next upcoming game, so
+    LeBron James' season stats are carried forward as they are today. Home/away
+    status, days of rest and opponent efficiency ratings are then replaced for
+    each game. Opponents without ratings fall back to the league average of
+    the ratings that are known, or to the upcoming game's ratings if none
+    are.
+
+    Args:
+        upcoming_game (app.models.Game): bottom row of the game table, which
+            must be the first of remaining_games
+        remaining_games (list): list returned by remaining_schedule
+        efficiencies (dict): dictionary returned by
+            current_opponent_efficiencies
+        columns (list): names of the predictor columns, as stored with the
+            exported coefficients
+
+    Returns:
+        predictors (np.ndarray): array with one row of predictors per game in
+            remaining_games
+    """
+    base = iF.game_to_predictors(upcoming_game, columns)
+    predictors = np.tile(base, (len(remaining_games), 1))
+    days_rest = horizon_days_rest(upcoming_game, remaining_games)
+    home_away = np.array([iF.HOME_AWAY_CODES[game['home/away']]
+                          for game in remaining_games])
+    if efficiencies:
+        average = np.mean(list(efficiencies.values()), axis=0)
+    else:
+        average = (upcoming_game.opp_def_eff, upcoming_game.opp_off_eff)
+    ratings = np.array([efficiencies.get(game['opponent'], average)
+                        for game in remaining_games])
+    # the upcoming game already has up-to-date ratings for its opponent
+    ratings[0] = (upcoming_game.opp_def_eff, upcoming_game.opp_off_eff)
+    for column, values in (('home_away', home_away),
+                           ('lbj_days_rest', days_rest),
+                           ('opp_def_eff', ratings[:, 0]),
+                           ('opp_off_eff', ratings[:, 1])):
+        if column in columns:
+            predictors[:, columns.index(column)] = values
+    return predictors
+
+
+def store_horizon_predictions(database, predict_date, remaining_games,
+                              days_rest, predictions):
+    """Function to write horizon predictions to the database.
+
+    Any horizon predictions already made on predict_date are replaced, so the
+    daily update can be run more than once a day.
+
+    Args:
+        database (flask_sqlalchemy.SQLAlchemy): database to write to
+        predict_date (datetime.date()): date the predictions were made on
+        remaining_games (list): list returned by remaining_schedule
+        days_rest (np.ndarray): array returned by horizon_days_rest
+        predictions (np.ndarray): array returned by inferenceFunctions'
+            predict_rows, with one row per game in remaining_games
+
+    Returns:
+        None
+    """
+    predict_date = datetime.combine(predict_date, time())
+    HorizonPredictions.query.filter_by(predict_date=predict_date).delete()
+    rows = []
+    for game, rest, prediction in zip(remaining_games, days_rest.tolist(),
+                                      predictions.tolist()):
+        rows.append({'predict_date': predict_date,
+                     'game_date': game['date'],
+                     'opponent': game['opponent'],
+                     'home_away': game['home/away'],
+                     'days_rest': rest,
+                     'predicted_pts': prediction[0],
+                     'predicted_rbs': prediction[1],
+                     'predicted_ast': prediction[2]})
+    database.session.bulk_insert_mappings(HorizonPredictions, rows)
+    database.session.commit()
+    logging.info('%d horizon predictions stored.', len(rows))
@@ -0,0 +1,202 @@
+"""Functions for making predictions from exported model coefficients.
+
+This module provides a lightweight alternative to the predict method of the
+trained_linear_models class in modelTrainingFunctions. It only depends on
+NumPy, so the daily update can score the upcoming game without importing
+pandas, scikit-learn or the SQLAlchemy engine used for model training. The
+coefficients are exported by trained_linear_models.export_coefficients each
+time a new model is trained.
+"""
+
+import os
+import numpy as np
+
+
+COEFFICIENTS_PATH = 'model_coefficients.npz'
+RESPONSES = ['pts', 'rbs', 'ast']
+HOME_AWAY_CODES = {'home': 1, 'away': 0}
+INTERVAL_LEVEL = 0.9
+
+
+def save_coefficients(columns, coef, intercept, path=COEFFICIENTS_PATH,
+                      boot_coef=None, boot_residuals=None):
+    """Function to write model coefficients to disk.
+
+    The file is written to a temporary path first and then renamed, so a
+    process reading the coefficients never sees a partially written file.
+
+    Args:
+        columns (list): names of the predictor columns, in the order that
+            matches the columns of coef
+        coef (np.ndarray): array of shape (3, number of predictors) with one
+            row of coefficients per response, in the order of RESPONSES
+        intercept (np.ndarray): array of shape (3,) with the intercept of each
+            response model
+        path (str): file to write the coefficients to
+        boot_coef (np.ndarray): optional array of shape (resamples, number of
+            predictors + 1, 3) with intercepts and coefficients fit to
+            bootstrap resamples, used for prediction intervals
+        boot_residuals (np.ndarray): optional array of shape (resamples, 3)
+            with resampled residuals matching boot_coef
+
+    Returns:
+        None
+    """
+    arrays = {'columns': np.array(columns),
+              'coef': np.asarray(coef, float),
+              'intercept': np.asarray(intercept, float)}
+    if boot_coef is not None:
+        arrays['boot_coef'] = np.asarray(boot_coef, float)
+        arrays['boot_residuals'] = np.asarray(boot_residuals, float)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        np.savez(f, **arrays)
+    os.replace(tmp_path, path)
+
+
+def load_coefficients(path=COEFFICIENTS_PATH):
+    """Function to read model coefficients written by save_coefficients.
+
+    Args:
+        path (str): file the coefficients were written to
+
+    Returns:
+        coefficients (dict): dictionary with keys 'columns' (list of predictor
+            names), 'coef' (np.ndarray of shape (3, number of predictors)) and
+            'intercept' (np.ndarray of shape (3,)), as well as 'boot_coef' and
+            'boot_residuals' if they were saved
+    """
+    with np.load(path) as exported:
+        coefficients = {'columns': [str(c) for c in exported['columns']],
+                        'coef': exported['coef'],
+                        'intercept': exported['intercept']}
+        if 'boot_coef' in exported.files:
+            coefficients['boot_coef'] = exported['boot_coef']
+            coefficients['boot_residuals'] = exported['boot_residuals']
+    return coefficients
+
+
+def game_to_predictors(game, columns):
+    """Function to build a row of predictor values from a game.
+
+    Args:
+        game (app.models.Game): row of the game table to build predictors for
+        columns (list): names of the predictor columns, as stored with the
+            exported coefficients
+
+    Returns:
+        predictors (np.ndarray): 1-d array of predictor values in the order of
+            columns
+    """
+    values = []
+    for column in columns:
+        value = getattr(game, column)
+        if column == 'home_away':
+            value = HOME_AWAY_CODES[value]
+        values.append(value)
+    predictors = np.array(values, dtype=float)
+    return predictors
+
+
+def predict_rows(coefficients, predictors):
+    """Function to make predictions for one or many rows of predictors.
+
+    Args:
+        coefficients (dict): coefficients as returned by load_coefficients
+        predictors (np.ndarray): 1-d array for a single game or 2-d array with
+            one row per game, with columns ordered as coefficients['columns']
+
+    Returns:
+        predictions (np.ndarray): array of shape (number of games, 3) with
+            predicted points, rebounds and assists for each game
+    """
+    predictors = np.atleast_2d(np.asarray(predictors, dtype=float))
+    predictions = predictors.dot(coefficients['coef'].T) + coefficients[
+            'intercept']
+    return predictions
+
+
+def predict_intervals(coefficients, predictors, level=INTERVAL_LEVEL):
+    """Function to make bootstrap prediction intervals for rows of predictors.
+
+    Every row is scored with the coefficients of every bootstrap resample at
+    once, the matching resampled residuals are added, and the interval is
+    taken from the percentiles of the resulting predictions.
+
+    Args:
+        coefficients (dict): coefficients as returned by load_coefficients,
+            which must include 'boot_coef' and 'boot_residuals'
+        predictors (np.ndarray): 1-d array for a single game or 2-d array with
+            one row per game, with columns ordered as coefficients['columns']
+        level (float): share of the bootstrap predictions the interval covers
+
+    Returns:
+        lower (np.ndarray): array of shape (number of games, 3) with the lower
+            bound for points, rebounds and assists of each game
+        upper (np.ndarray): array of the same shape with the upper bounds
+    """
+    predictors = np.atleast_2d(np.asarray(predictors, dtype=float))
+    design = np.hstack([np.ones((predictors.shape[0], 1)), predictors])
+    boot_predictions = np.einsum('ni,bik->nbk', design, coefficients[
+            'boot_coef']) + coefficients['boot_residuals']
+    tail = 100 * (1 - level) / 2
+    lower, upper = np.percentile(boot_predictions, [tail, 100 - tail],
+                                 axis=1)
+    return lower, upper
+
+
+class exported_linear_models:
+    """Class making predictions with exported linear model coefficients.
+
+    Instances expose the same prediction attributes as the
+    trained_linear_models class in modelTrainingFunctions, so either can be
+    used to fill in a row of the predictions table.
+
+    Attributes:
+        coefficients (dict): coefficients as returned by load_coefficients
+        predicted_pts (float): predicted number of points for specified game
+        predicted_rbs (float): predicted number of rebounds for specified game
+        predicted_ast (float): predicted number of assists for specified game
+        predicted_pts_lower, predicted_pts_upper, predicted_rbs_lower,
+            predicted_rbs_upper, predicted_ast_lower, predicted_ast_upper
+            (float): bounds of the bootstrap prediction intervals for
+            specified game, or None if the exported coefficients do not
+            include bootstrap resamples
+        predicted_game_date (datetime.date()): date of game for which
+            predictions are made.
+    """
+
+    def __init__(self, path=COEFFICIENTS_PATH):
+        """Constructor for an exported_linear_models object.
+
+        Args:
+            path (str): file the coefficients were exported to
+        """
+        self.coefficients = load_coefficients(path)
+
+    def predict(self, predict_game):
+        """Method to make predictions for a single game.
+
+        Args:
+            predict_game (app.models.Game): row of the game table for the game
+                that predictions will be made for
+
+        Returns:
+            None
+        """
+        predictors = game_to_predictors(predict_game,
+                                        self.coefficients['columns'])
+        predictions = predict_rows(self.coefficients, predictors)[0]
+        self.predicted_pts = float(predictions[0])
+        self.predicted_rbs = float(predictions[1])
+        self.predicted_ast = float(predictions[2])
+        bounds = {}
+        if 'boot_coef' in self.coefficients:
+            lower, upper = predict_intervals(self.coefficients, predictors)
+            for i, response in enumerate(RESPONSES):
+                bounds[response] = (float(lower[0, i]), float(upper[0, i]))
+        for response in RESPONSES:
+            lower, upper = bounds.get(response, (None, None))
+            setattr(self, 'predicted_' + response + '_lower', lower)
+            setattr(self, 'predicted_' + response + '_upper', upper)
+        self.predicted_game_date = predict_game.date.date()
@@ -0,0 +1,171 @@
+"""Incremental parsing of the arrays in large JSON responses.
+
+Responses such as a season of player game logs are one JSON document with a
+single large array in it, like playergamelogs.gamelogs. Calling .json() on
+them builds the whole document in memory before any of it is used. This
+module instead reads the body chunk by chunk and yields the elements of the
+array at a given path one at a time, so only the element being yielded and
+the unparsed part of the current chunk are held in memory. Values that are
+not on the path are parsed and discarded as they are passed.
+"""
+
+import codecs
+import json
+import re
+
+
+_decoder = json.JSONDecoder()
+_whitespace = re.compile(r'[ \t\n\r]*')
+
+
+class _chunk_buffer:
+    """Class holding the part of a streamed body that has not been parsed.
+
+    Attributes:
+        chunks (iterator): remaining chunks of the body, as str or bytes
+        text (str): text read from the chunks and not yet discarded
+        pos (int): position in text of the next character to parse
+    """
+
+    def __init__(self, chunks):
+        """Constructor for a _chunk_buffer object.
+
+        Args:
+            chunks (iterable): chunks of the body, as str or UTF-8 bytes
+
+        Returns:
+            None
+        """
+        self.chunks = iter(chunks)
+        self.bytes_decoder = codecs.getincrementaldecoder('utf-8')()
+        self.text = ''
+        self.pos = 0
+
+    def fill(self):
+        """Method to add the next chunk, dropping the text already parsed.
+
+        Args:
+            None
+
+        Returns:
+            filled (bool): False if there are no chunks left
+        """
+        chunk = next(self.chunks, None)
+        if chunk is None:
+            return False
+        if isinstance(chunk, bytes):
+            chunk = self.bytes_decoder.decode(chunk)
+        self.text = self.text[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """Method to skip whitespace and return the next character.
+
+        Args:
+            None
+
+        Returns:
+            char (str): next character that is not whitespace. A ValueError
+                is raised if the body ends first.
+        """
+        while True:
+            self.pos = _whitespace.match(self.text, self.pos).end()
+            if self.pos < len(self.text):
+                return self.text[self.pos]
+            if not self.fill():
+                raise ValueError('JSON document ended unexpectedly.')
+
+    def expect(self, chars):
+        """Method to consume the next character, which must be one of chars.
+
+        Args:
+            chars (str): characters allowed next
+
+        Returns:
+            char (str): the character consumed
+        """
+        char = self.peek()
+        if char not in chars:
+            raise ValueError('Expected one of {!r} at {!r}.'.format(
+                    chars, self.text[self.pos:self.pos + 20]))
+        self.pos += 1
+        return char
+
+    def value(self):
+        """Method to parse the next complete JSON value.
+
+        Args:
+            None
+
+        Returns:
+            value: the parsed value
+        """
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.text, self.pos)
+            except json.JSONDecodeError:
+                if not self.fill():
+                    raise
+                continue
+            # a number or literal at the end of the text may continue in the
+            # next chunk
+            if end == len(self.text) and not isinstance(
+                    value, (dict, list, str)) and self.fill():
+                continue
+            self.pos = end
+            return value
+
+
+def iter_items(chunks, path):
+    """Generator yielding the elements of the array at a path in a document.
+
+    Args:
+        chunks (iterable): chunks of the body of a JSON document, as str or
+            UTF-8 bytes, such as the iter_content of a streamed response
+        path (list): keys leading to the array, such as
+            ['playergamelogs', 'gamelogs']
+
+    Yields:
+        item: each element of the array, parsed. Nothing is yielded if the
+            document has no array at the path.
+    """
+    buffer = _chunk_buffer(chunks)
+    yield from _iter_items(buffer, list(path))
+    # read the body to its end, so a streamed response is fully archived and
+    # its connection released
+    for _ in buffer.chunks:
+        pass
+
+
+def _iter_items(buffer, path):
+    """Yields the elements of the array at path inside the next value."""
+    if not path:
+        if buffer.peek() != '[':
+            buffer.value()
+            return
+        buffer.expect('[')
+        if buffer.peek() == ']':
+            buffer.expect(']')
+            return
+        while True:
+            yield buffer.value()
+            if buffer.expect(',]') == ']':
+                return
+    if buffer.peek() != '{':
+        buffer.value()
+        return
+    buffer.expect('{')
+    if buffer.peek() == '}':
+        buffer.expect('}')
+        return
+    while True:
+        key = buffer.value()
+        buffer.expect(':')
+        if key == path[0]:
+            yield from _iter_items(buffer, path[1:])
+        else:
+            buffer.value()
+        if buffer.expect(',}') == '}':
+            return
@@ -0,0 +1,153 @@
+"""Functions for computing every team's efficiency ratings on every date at once.
+
+The schedule class and opp_stat_update find an opponent's offensive and
+defensive efficiency ratings one opponent at a time, by adding up box scores
+in dictionaries of running totals. This module instead takes the box scores of
+every game in the league for a season and builds arrays of shape
+(dates, teams) holding each team's cumulative possessions-based efficiency
+ratings, wins and losses before each date, using cumulative sums. The ratings
+of any team at any date are then found with an array lookup.
+
+Efficiency ratings use the same formulas as calc_opp_efficiency: points scored
+(or allowed) per 100 possessions, with possessions estimated as field goal
+attempts - offensive rebounds + turnovers + 0.4 * free throw attempts.
+"""
+
+import sys
+sys.path.append("../")
+from develop import dataPullProcessFunctions as dppf
+from datetime import datetime
+import numpy as np
+
+
+TEAMS = ['ATL', 'BOS', 'BRO', 'CHA', 'CHI', 'CLE', 'DAL', 'DEN', 'DET', 'GSW',
+         'HOU', 'IND', 'LAC', 'LAL', 'MEM', 'MIA', 'MIL', 'MIN', 'NOP', 'NYK',
+         'OKL', 'ORL', 'PHI', 'PHX', 'POR', 'SAC', 'SAS', 'TOR', 'UTA', 'WAS']
+# team stats in a box score, in the order used by the arrays in this module
+BOX_SCORE_STATS = ['FgAtt', 'FtAtt', 'OffReb', 'Tov', 'Pts']
+
+
+def team_gamelogs_to_box_scores(gamelogs_json):
+    """Function to pair the team game logs of each game into a box score.
+
+    Args:
+        gamelogs_json (dict): output of the .json() method applied to the
+            response returned by dppf.send_request_team_gamelogs
+
+    Returns:
+        box_scores (list): list of dictionaries with the 'date', 'home' and
+            'away' team abbreviations and the 'home_stats' and 'away_stats'
+            of every game both teams' logs were returned for
+    """
+    games = {}
+    for gamelog in gamelogs_json['teamgamelogs'].get('gamelogs', []):
+        game = gamelog['game']
+        key = (game['date'], game['awayTeam']['Abbreviation'],
+               game['homeTeam']['Abbreviation'])
+        side = ('home' if gamelog['team']['Abbreviation'] == key[2] else
+                'away')
+        games.setdefault(key, {})[side + '_stats'] = [
+                int(gamelog['stats'][stat]['#text'])
+                for stat in BOX_SCORE_STATS]
+    box_scores = [dict(stats, date=datetime.strptime(key[0],
+                                                     '%Y-%m-%d').date(),
+                       away=key[1], home=key[2])
+                  for key, stats in games.items() if len(stats) == 2]
+    return box_scores
+
+
+def efficiency_matrix(box_scores, teams=TEAMS):
+    """Function to find every team's ratings before every date of a season.
+
+    Args:
+        box_scores (list): list of dictionaries as returned by
+            team_gamelogs_to_box_scores
+        teams (list): abbreviations of the teams, giving the order of the
+            team axis of the arrays
+
+    Returns:
+        matrix (dict): dictionary with keys 'dates' (np.ndarray of the dates
+            games were played on, sorted), 'teams' (list), and 'off_eff',
+            'def_eff', 'wins' and 'losses' (np.ndarray of shape
+            (dates + 1, teams)). Row i of the arrays holds the ratings and
+            record of each team over the games played on the first i dates,
+            so row 0 is the start of the season and is all 0.
+    """
+    team_index = {team: i for i, team in enumerate(teams)}
+    game_dates = np.array([np.datetime64(box_score['date'], 'D')
+                           for box_score in box_scores])
+    dates, date_rows = np.unique(game_dates, return_inverse=True)
+    home = np.array([team_index[box_score['home']]
+                     for box_score in box_scores], dtype=int)
+    away = np.array([team_index[box_score['away']]
+                     for box_score in box_scores], dtype=int)
+    home_stats = np.array([box_score['home_stats'] for box_score in
+                           box_scores], dtype=float).reshape(-1, 5)
+    away_stats = np.array([box_score['away_stats'] for box_score in
+                           box_scores], dtype=float).reshape(-1, 5)
+    home_won = (home_stats[:, 4] > away_stats[:, 4]).astype(float)
+    # every game adds a row for each team, with the team's stats, its
+    # opponent's stats and whether it won
+    rows = np.concatenate([date_rows, date_rows])
+    columns = np.concatenate([home, away])
+    values = np.hstack([
+            np.vstack([home_stats, away_stats]),
+            np.vstack([away_stats, home_stats]),
+            np.concatenate([home_won, 1 - home_won])[:, None],
+            np.concatenate([1 - home_won, home_won])[:, None]])
+    totals = np.zeros((len(dates) + 1, len(teams), values.shape[1]))
+    np.add.at(totals, (rows + 1, columns), values)
+    totals = np.cumsum(totals, axis=0)
+    matrix = {'dates': dates,
+              'teams': list(teams),
+              'off_eff': _per_100_possessions(totals[..., :5]),
+              'def_eff': _per_100_possessions(totals[..., 5:10]),
+              'wins': totals[..., 10].astype(int),
+              'losses': totals[..., 11].astype(int)}
+    return matrix
+
+
+def _per_100_possessions(stats):
+    """Finds points per 100 possessions, giving 0 where there are none."""
+    possessions = stats[..., 0] - stats[..., 2] + stats[..., 3] + 0.4 * stats[
+            ..., 1]
+    return np.where(possessions > 0, 100 * stats[..., 4] / np.where(
+            possessions > 0, possessions, 1), 0)
+
+
+def lookup(matrix, team, date):
+    """Function to find a team's ratings and record at the start of a date.
+
+    Args:
+        matrix (dict): dictionary as returned by efficiency_matrix
+        team (str): 3 letter abbreviation of the team, such as 'BOS'
+        date (datetime.date()): date to find the ratings at. Only games played
+            before this date are counted.
+
+    Returns:
+        ratings (dict): dictionary with the team's 'opp_def_eff',
+            'opp_off_eff', 'OPPW' and 'OPPL', as for opp_stat_update
+    """
+    row = np.searchsorted(matrix['dates'], np.datetime64(date, 'D'))
+    column = matrix['teams'].index(team)
+    ratings = {'opp_def_eff': float(matrix['def_eff'][row, column]),
+               'opp_off_eff': float(matrix['off_eff'][row, column]),
+               'OPPW': int(matrix['wins'][row, column]),
+               'OPPL': int(matrix['losses'][row, column])}
+    return ratings
+
+
+def season_efficiency_matrix(season, daterange=None):
+    """Function to request a season's team game logs and build its matrix.
+
+    Args:
+        season (str): season, like '2017-2018-regular'
+        daterange (str): dates to include, as for dppf.send_request_schedule.
+            If None, the whole season is included.
+
+    Returns:
+        matrix (dict): dictionary as returned by efficiency_matrix
+    """
+    gamelogs_json = dppf.send_request_team_gamelogs(season, daterange,
+                                                    TEAMS).json()
+    return efficiency_matrix(team_gamelogs_to_box_scores(gamelogs_json))
@@ -9,33 +9,52 @@ training the model and using it to make predictions.
 
 import sys
 sys.path.append("../")
-from app import app, db
+from app import app, db, backend
 from app.models import Game
-from app.awsdbconfig import SQLALCHEMY_DATABASE_URI
-from sqlalchemy import create_engine
 import numpy as np
 import pandas as pd
 from sklearn import linear_model
 from datetime import datetime
+from develop import inferenceFunctions as iF
+from develop import formFunctions as fF
+from develop import dataPullProcessFunctions as dppf
 import logging
 
 
-def pandas_from_db():
-    """Function for putting the entire games table into a pandas dataframe.
+PREDICTOR_COLUMNS = ['home_away',
+                     'lbj_days_rest',
+                     'lbj_2pt_pct',
+                     'lbj_3pt_pct',
+                     'lbj_ft_pct',
+                     'lbj_2pt_mpg',
+                     'lbj_3pt_mpg',
+                     'lbj_ft_mpg',
+                     'lbj_rbs_pgm',
+                     'lbj_ast_pgm',
+                     'lbj_plusminpg',
+                     'opp_def_eff',
+                     'opp_off_eff']
 
-    This function queries the game table in the database for all rows and
-    places the return into a pandas dataframe.
+
+def pandas_from_db(player=dppf.PLAYER):
+    """Function for putting a player's games into a pandas dataframe.
+
+    This function queries the game table in the database the app is
+    configured with for all rows of the player, in date order, and places the
+    return into a pandas dataframe. The query is run with DuckDB if the app's
+    ANALYTIC_BACKEND setting is 'duckdb'.
 
     Args:
-        None
+        player (str): player whose games to read, such as 'lebron-james'
 
     Returns:
-        data (pd.DataFrame): pandas dataframe containing full contents of game
-            table from database
+        data (pd.DataFrame): pandas dataframe containing the player's rows of
+            the game table from database
     """
-    engine = create_engine(SQLALCHEMY_DATABASE_URI)
-    sql = "select * from game"
-    data = pd.read_sql_query(sql, con=engine)
+    sql = "select * from game where player = '{}' order by date".format(
+            player.replace("'", "''"))
+    data = backend.read_frame(sql, db.engine,
+                              app.config.get('ANALYTIC_BACKEND', 'sqlalchemy'))
     logging.debug('SQL query executed.')
     return data
 
@@ -64,7 +83,8 @@ def extract_predictors(df):
 
     This function will return a new dataframe that is a slice of the inputed
     dataframe but only containing the columns relevant to prediction of the
-    responses.
+    responses. LeBron James' recent form columns are included when the
+    dataframe has them filled in for every row.
 
     Args:
         df (pd.DataFrame): pandas dataframe to be sliced
@@ -73,19 +93,9 @@ def extract_predictors(df):
         predictors (pd.DataFrame): pandas dataframe with only the predictor
             columns
     """
-    predictors = df.loc[:, ['home_away',
-                            'lbj_days_rest',
-                            'lbj_2pt_pct',
-                            'lbj_3pt_pct',
-                            'lbj_ft_pct',
-                            'lbj_2pt_mpg',
-                            'lbj_3pt_mpg',
-                            'lbj_ft_mpg',
-                            'lbj_rbs_pgm',
-                            'lbj_ast_pgm',
-                            'lbj_plusminpg',
-                            'opp_def_eff',
-                            'opp_off_eff']]
+    form_columns = [column for column in fF.FORM_COLUMNS
+                    if column in df.columns and df[column].notnull().all()]
+    predictors = df.loc[:, PREDICTOR_COLUMNS + form_columns]
     return predictors
 
 
@@ -112,7 +122,7 @@ def create_training_data(date=datetime.now().date()):
     data = pandas_from_db()
     convert_home_away(data)
     good_rows = data.loc[data.opp_def_eff != 0]
-    good_rows = good_rows.loc[data.date < date]
+    good_rows = good_rows.loc[data.date < pd.Timestamp(date)]
     good_rows = good_rows.loc[good_rows.lbj_DNP == 0]
     return good_rows
 
@@ -136,6 +146,59 @@ def create_upcoming_game():
     return predict_row
 
 
+def bootstrap_coefficients(predictors, responses, n_resamples=2000, seed=0):
+    """Fits linear models to bootstrap resamples of the training data.
+
+    Each resample is drawn as an array of row indices and turned into a count
+    of how often each row was drawn. The normal equations of every resample
+    are then built with two matrix products and solved together, so no model
+    is refit in a Python loop. Residuals of the fit to the full training data
+    are also resampled, so that predictions made with the bootstrap
+    coefficients reflect the spread of individual game results as well as
+    the uncertainty in the coefficients.
+
+    Args:
+        predictors (np.ndarray): array of shape (games, predictors) with the
+            training predictors
+        responses (np.ndarray): array of shape (games, 3) with the points,
+            rebounds, and assists recorded in each training game
+        n_resamples (int): number of bootstrap resamples to draw
+        seed (int): seed for the random number generator, fixed by default so
+            that models can be reproduced
+
+    Returns:
+        boot_coef (np.ndarray): array of shape (n_resamples, predictors + 1, 3)
+            with the intercept and coefficients fit to each resample
+        boot_residuals (np.ndarray): array of shape (n_resamples, 3) with one
+            resampled residual per resample and response
+    """
+    rng = np.random.RandomState(seed)
+    n_games = predictors.shape[0]
+    design = np.hstack([np.ones((n_games, 1)), predictors])
+    n_terms = design.shape[1]
+    responses = np.asarray(responses, dtype=float)
+    # row counts of each resample, from arrays of drawn row indices
+    indices = rng.randint(0, n_games, size=(n_resamples, n_games))
+    offsets = n_games * np.arange(n_resamples)[:, None]
+    counts = np.bincount((indices + offsets).ravel(),
+                         minlength=n_resamples * n_games).reshape(
+                                 n_resamples, n_games).astype(float)
+    # X'WX and X'WY for every resample at once
+    cross_design = (design[:, :, None] * design[:, None, :]).reshape(
+            n_games, -1)
+    cross_response = (design[:, :, None] * responses[:, None, :]).reshape(
+            n_games, -1)
+    xtx = counts.dot(cross_design).reshape(n_resamples, n_terms, n_terms)
+    xty = counts.dot(cross_response).reshape(n_resamples, n_terms, -1)
+    boot_coef = np.matmul(np.linalg.pinv(xtx), xty)
+    full_coef = np.linalg.pinv(design.T.dot(design)).dot(
+            design.T.dot(responses))
+    residuals = responses - design.dot(full_coef)
+    boot_residuals = residuals[rng.randint(0, n_games, size=n_resamples)]
+    logging.debug('Bootstrap coefficients fit to %d resamples.', n_resamples)
+    return boot_coef, boot_residuals
+
+
 class trained_linear_models:
     """Class containing predictive models and the predictions they yield.
 
@@ -152,6 +215,12 @@ class trained_linear_models:
             for predicting rebounds.
         ast_model (sklearn.linear_model): scikit-learn trained linear model
             for predicting assists.
+        predictor_columns (list): names of the predictor columns the models
+            were trained on, in order.
+        boot_coef (np.ndarray): intercepts and coefficients of linear models
+            fit to bootstrap resamples of the training data, used for
+            prediction intervals.
+        boot_residuals (np.ndarray): resampled residuals matching boot_coef.
         predicted_pts (float): predicted number of points for specified game
         predicted_rbs (float): predicted number of rebounds for specified game
         predicted_ast (float): predicted number of assists for specified game
@@ -170,6 +239,7 @@ class trained_linear_models:
         """
         train_data = create_training_data(date)
         train_predictors = extract_predictors(train_data)
+        self.predictor_columns = list(train_predictors.columns)
         response_pts = train_data.loc[:, ['pts']]
         response_rbs = train_data.loc[:, ['rbs']]
         response_ast = train_data.loc[:, ['ast']]
@@ -179,6 +249,9 @@ class trained_linear_models:
                 train_predictors, response_rbs)
         self.ast_model = linear_model.LinearRegression().fit(
                 train_predictors, response_ast)
+        self.boot_coef, self.boot_residuals = bootstrap_coefficients(
+                train_predictors.values.astype(float),
+                train_data.loc[:, iF.RESPONSES].values)
         logging.debug('Linear models trained.')
 
     def predict(self, predict_game):
@@ -196,7 +269,8 @@ class trained_linear_models:
         Returns:
             None
         """
-        predictor_values = extract_predictors(predict_game)
+        predictor_values = predict_game.loc[:, getattr(
+                self, 'predictor_columns', PREDICTOR_COLUMNS)]
         self.predicted_pts = np.asscalar(self.pts_model.predict(
                 predictor_values)[0])
         self.predicted_rbs = np.asscalar(self.rbs_model.predict(
@@ -207,3 +281,27 @@ class trained_linear_models:
                 predict_game.date.values[0].astype(str)[:10], '%Y-%m-%d').date(
                         )
         logging.debug('Predictions generated.')
+
+    def export_coefficients(self, path=iF.COEFFICIENTS_PATH):
+        """Method to export the trained coefficients for lightweight inference.
+
+        The exported file can be loaded by the inferenceFunctions module to
+        make predictions without pandas or scikit-learn.
+
+        Args:
+            path (str): file to write the coefficients to
+
+        Returns:
+            None
+        """
+        models = [self.pts_model, self.rbs_model, self.ast_model]
+        coef = np.vstack([model.coef_.ravel() for model in models])
+        intercept = np.array([np.ravel(model.intercept_)[0]
+                              for model in models])
+        # models pickled before predictor_columns was recorded used the
+        # default predictor columns
+        columns = getattr(self, 'predictor_columns', PREDICTOR_COLUMNS)
+        iF.save_coefficients(columns, coef, intercept, path,
+                             getattr(self, 'boot_coef', None),
+                             getattr(self, 'boot_residuals', None))
+        logging.debug('Model coefficients exported.')
@@ -0,0 +1,155 @@
+"""Runner for a pipeline of stages that only re-runs stages whose inputs changed.
+
+This module provides a small runner for the steps of the daily update. Each
+stage names the stages it depends on and can describe its inputs, such as the
+ids and versions of the rows of the games table it reads. A fingerprint of a
+stage's inputs and of the fingerprints of the stages it depends on is saved
+after the stage runs, and on the next run the stage is skipped if its
+fingerprint is unchanged. Stages that do not describe their inputs, such as
+pulling new data from the API, always run.
+"""
+
+from datetime import datetime
+import hashlib
+import json
+import time
+import os
+import logging
+
+
+PIPELINE_STATE_PATH = 'pipeline_state.json'
+
+
+def stage(name, run, inputs=None, depends_on=()):
+    """Function to describe a stage of a pipeline.
+
+    Args:
+        name (str): name of the stage
+        run (function): function making the stage's changes. It is passed the
+            pipeline's context, a dictionary shared by all stages of a run.
+        inputs (function): function returning a JSON serializable description
+            of everything the stage reads other than the results of the
+            stages it depends on. It is passed the pipeline's context. If
+            None, the stage runs every time.
+        depends_on (tuple): names of stages that must run before this one
+
+    Returns:
+        stage (dict): description of the stage
+    """
+    return {'name': name,
+            'run': run,
+            'inputs': inputs,
+            'depends_on': tuple(depends_on)}
+
+
+def fingerprint(value):
+    """Function to hash a JSON serializable value."""
+    return hashlib.sha1(json.dumps(value, sort_keys=True, default=str).encode(
+            'utf-8')).hexdigest()
+
+
+class pipeline:
+    """Class running stages in order, skipping those with unchanged inputs.
+
+    Attributes:
+        stages (list): stages as returned by stage, in an order in which every
+            stage comes after the stages it depends on
+        state_path (str): file the fingerprint of each stage is saved to
+        state (dict): dictionary keyed by stage name whose values are
+            dictionaries with the stage's 'fingerprint', the time it last ran
+            and the seconds it took
+    """
+
+    def __init__(self, stages, state_path=PIPELINE_STATE_PATH):
+        """Constructor for pipeline object.
+
+        Args:
+            stages (list): stages as returned by stage
+            state_path (str): file the state of the stages is saved to
+
+        Returns:
+            None
+        """
+        names = set()
+        for pipeline_stage in stages:
+            missing = set(pipeline_stage['depends_on']) - names
+            if missing:
+                raise ValueError('Stage {} depends on {}, which must come '
+                                 'before it.'.format(pipeline_stage['name'],
+                                                     ', '.join(missing)))
+            names.add(pipeline_stage['name'])
+        self.stages = stages
+        self.state_path = state_path
+        if os.path.exists(state_path):
+            with open(state_path) as f:
+                self.state = json.load(f)
+        else:
+            self.state = {}
+
+    def dependents(self, names):
+        """Method to find the given stages and every stage depending on them.
+
+        Args:
+            names (iterable): names of stages
+
+        Returns:
+            dependents (set): names of the stages and of every stage that
+                depends on them, directly or not
+        """
+        dependents = set(names)
+        for pipeline_stage in self.stages:
+            if dependents & set(pipeline_stage['depends_on']):
+                dependents.add(pipeline_stage['name'])
+        return dependents
+
+    def run(self, context=None, force=()):
+        """Method to run every stage whose inputs have changed.
+
+        The state is saved after each stage, so if a stage fails the stages
+        before it are not run again on the next attempt.
+
+        Args:
+            context (dict): dictionary passed to every stage
+            force (iterable): names of stages to run even if their inputs are
+                unchanged. Stages depending on them are run as well.
+
+        Returns:
+            ran (list): names of the stages that were run
+        """
+        context = {} if context is None else context
+        unknown = set(force) - {s['name'] for s in self.stages}
+        if unknown:
+            raise ValueError('Unknown stages: {}'.format(', '.join(unknown)))
+        forced = self.dependents(force)
+        fingerprints = {}
+        ran = []
+        for pipeline_stage in self.stages:
+            name = pipeline_stage['name']
+            if pipeline_stage['inputs'] is None:
+                fingerprints[name] = None
+            else:
+                fingerprints[name] = fingerprint({
+                        'inputs': pipeline_stage['inputs'](context),
+                        'depends_on': [fingerprints[dependency] for
+                                       dependency in
+                                       pipeline_stage['depends_on']]})
+            previous = self.state.get(name, {}).get('fingerprint')
+            if (name not in forced and fingerprints[name] is not None and
+                    fingerprints[name] == previous):
+                logging.info('Stage %s is up to date.', name)
+                continue
+            logging.info('Running stage %s.', name)
+            start = time.perf_counter()
+            pipeline_stage['run'](context)
+            self.state[name] = {'fingerprint': fingerprints[name],
+                                'last_run': str(datetime.now()),
+                                'seconds': time.perf_counter() - start}
+            self.save_state()
+            ran.append(name)
+        return ran
+
+    def save_state(self):
+        """Method to write the state of the stages to disk."""
+        with open(self.state_path + '.tmp', 'w') as f:
+            json.dump(self.state, f, indent=2)
+        os.replace(self.state_path + '.tmp', self.state_path)
@@ -0,0 +1,88 @@
+"""Rate limiter shared by every thread calling the MySportsFeeds API.
+
+The API limits a user to 250 requests every 5 minutes. A single thread stays
+under the limit by waiting between its calls, but threads pulling several
+seasons at once must share it. This module provides a limiter that grants
+calls one at a time, a minimum interval apart and no more than the quota in
+each window. When several threads are waiting, the call with the highest
+priority is granted first, so requests that unblock the most work, such as
+the game logs and schedule that start a season, are not held up behind box
+scores.
+"""
+
+import heapq
+import itertools
+import threading
+import time
+
+
+class rate_limiter:
+    """Class granting calls to an API an interval apart, by priority.
+
+    Attributes:
+        interval (float): minimum seconds between two calls
+        quota (int): maximum calls in a window
+        window_seconds (float): length of the quota window
+        waiting (list): heap of the (priority, order) of the waiting calls
+    """
+
+    def __init__(self, interval, quota, window_seconds):
+        """Constructor for a rate_limiter object.
+
+        Args:
+            interval (float): minimum seconds between two calls
+            quota (int): maximum calls in a window
+            window_seconds (float): length of the quota window
+
+        Returns:
+            None
+        """
+        self.interval = interval
+        self.quota = quota
+        self.window_seconds = window_seconds
+        self.waiting = []
+        self.next_time = 0
+        self.window = None
+        self.window_calls = 0
+        self.order = itertools.count()
+        self.condition = threading.Condition()
+
+    def _ready_time(self, now):
+        """Returns the earliest time the next call can be granted."""
+        window = int(now // self.window_seconds)
+        if window == self.window and self.window_calls >= self.quota:
+            return max(self.next_time, (window + 1) * self.window_seconds)
+        return self.next_time
+
+    def acquire(self, priority=0):
+        """Method to wait until a call may be made.
+
+        Args:
+            priority (int): priority of the call, lower numbers first. Calls
+                with the same priority are granted in the order they came.
+
+        Returns:
+            waited (float): seconds spent waiting
+        """
+        start = time.time()
+        ticket = (priority, next(self.order))
+        with self.condition:
+            heapq.heappush(self.waiting, ticket)
+            # a waiting call of lower priority must give way to this one
+            self.condition.notify_all()
+            while True:
+                now = time.time()
+                ready = self._ready_time(now)
+                if self.waiting[0] == ticket and now >= ready:
+                    break
+                self.condition.wait(ready - now if self.waiting[0] == ticket
+                                    else None)
+            heapq.heappop(self.waiting)
+            window = int(now // self.window_seconds)
+            if window != self.window:
+                self.window = window
+                self.window_calls = 0
+            self.window_calls += 1
+            self.next_time = now + self.interval
+            self.condition.notify_all()
+        return now - start
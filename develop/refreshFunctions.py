@@ -0,0 +1,231 @@
+"""Functions for picking up corrections to the stats of games already stored.
+
+The NBA revises box scores after games are played, but the daily update
+writes a game's stats once, the day after it is played. This module provides
+functions that request a season of a player's game logs, compare the stats of
+each game with those stored, using the hash of the stats written with them,
+and rewrite the games whose stats changed. Because the season totals, per
+game averages, games missed and recent form of every later game are built
+from the stats of the games before it, those features are recomputed for the
+rows after the earliest corrected game, and the rows before it are left
+untouched.
+"""
+
+import sys
+sys.path.append("../")
+from develop import dataPullProcessFunctions as dppf
+from develop import formFunctions as fF
+from develop import updateFunctions as uf
+from develop import featureView as fV
+from app.models import Game
+from datetime import datetime
+import numpy as np
+import logging
+
+
+def fetch_season_stats(season, first_date, last_date, player=dppf.PLAYER):
+    """Function to request a player's stats for every game between two dates.
+
+    Args:
+        season (str): season of the games, like '2017-2018-regular'
+        first_date (datetime.date()): date of the first game
+        last_date (datetime.date()): date of the last game
+        player (str): player, 'lebron-james' by default
+
+    Returns:
+        last_updated_on (str): 'lastUpdatedOn' stamp of the game log feed
+        stats (dict): dictionary keyed by datetime.date() of each game whose
+            values are the player's stats as returned by
+            dppf.extract_lbj_stats
+    """
+    gamelogs_json = dppf.send_request_gamelogs(
+            season, 'from-' + dppf.date_to_api_format(first_date) + '-to-' +
+            dppf.date_to_api_format(last_date), [player]).json()
+    stats = {}
+    for gamelog in gamelogs_json['playergamelogs'].get('gamelogs', []):
+        game_date = datetime.strptime(gamelog['game']['date'],
+                                      '%Y-%m-%d').date()
+        stats[game_date] = dppf.extract_lbj_stats(gamelog)
+    return gamelogs_json['playergamelogs'].get('lastUpdatedOn'), stats
+
+
+def stats_changed(game, game_stats):
+    """Function to check whether the stats stored for a game are out of date.
+
+    Args:
+        game (app.models.Game): row of the game
+        game_stats (dict): the game's stats from the API, as returned by
+            dppf.extract_lbj_stats
+
+    Returns:
+        changed (bool): whether the stats differ from those written to the
+            row. Rows written before stats hashes were stored are compared on
+            their points, rebounds, assists and DNP status.
+    """
+    if game.stats_hash is not None:
+        return game.stats_hash != dppf.stats_hash(game_stats)
+    return (game.pts, game.rbs, game.ast, game.lbj_DNP) != (
+            game_stats['Pts'], game_stats['Rbs'], game_stats['Ast'],
+            game_stats['MinutesPlayed'] == 0)
+
+
+def season_features(season_stats):
+    """Function to find the season stats going into every game of a season.
+
+    Uses the same formulas as full_daily_update: per game averages are over
+    the games played so far, and shooting percentages are over the attempts
+    so far.
+
+    Args:
+        season_stats (list): list with, for every game of the season in date
+            order, the player's stats as returned by dppf.extract_lbj_stats,
+            or None if he has no stats for the game
+
+    Returns:
+        features (list): list of dictionaries keyed by Game column name with
+            the season stats and games missed at the start of each game
+    """
+    totals = dict.fromkeys(['Rbs', 'Ast', 'PlusMinus', '2ptMade', '2ptAtt',
+                            '3ptMade', '3ptAtt', 'FtMade', 'FtAtt'], 0)
+    missed = 0
+    features = []
+    for game_index, game_stats in enumerate(season_stats):
+        played = game_index - missed
+        features.append({
+                'lbj_games_missed': missed,
+                'lbj_rbs_pgm': _ratio(totals['Rbs'], played),
+                'lbj_ast_pgm': _ratio(totals['Ast'], played),
+                'lbj_plusminpg': _ratio(totals['PlusMinus'], played),
+                'lbj_2pt_mpg': _ratio(totals['2ptMade'], played),
+                'lbj_3pt_mpg': _ratio(totals['3ptMade'], played),
+                'lbj_ft_mpg': _ratio(totals['FtMade'], played),
+                'lbj_2pt_pct': _ratio(totals['2ptMade'], totals['2ptAtt']),
+                'lbj_3pt_pct': _ratio(totals['3ptMade'], totals['3ptAtt']),
+                'lbj_ft_pct': _ratio(totals['FtMade'], totals['FtAtt'])})
+        if game_stats is None or game_stats['MinutesPlayed'] == 0:
+            missed += 1
+            continue
+        for stat in totals:
+            totals[stat] += game_stats[stat]
+    return features
+
+
+def _ratio(numerator, denominator):
+    """Divides numerator by denominator, giving 0 when the denominator is 0."""
+    return numerator / denominator if denominator else 0
+
+
+def refresh_season(season, database, today, player=dppf.PLAYER):
+    """Function to rewrite games whose stats were corrected by the API.
+
+    Args:
+        season (str): season to refresh, like '2017-2018-regular'
+        database (flask_sqlalchemy.SQLAlchemy): database to write to
+        today (datetime.date()): date of 'today'. Games on or after it have
+            not been played and are not compared, but their features are
+            recomputed if an earlier game was corrected.
+        player (str): player whose games to refresh, 'lebron-james' by
+            default
+
+    Returns:
+        corrected (list): datetime.date() of each game whose stats were
+            corrected
+    """
+    games = uf.pull_from_db(season, player)
+    completed = [game for game in games if game.date.date() < today]
+    if not completed:
+        return []
+    last_updated_on, api_stats = fetch_season_stats(
+            season, completed[0].date.date(), completed[-1].date.date(),
+            player)
+    # games whose stats were never written are left to the daily update
+    written = [game for game in completed
+               if game.pts is not None or game.stats_hash is not None]
+    written_ids = {game.id for game in written}
+    stamps = [game.stats_updated_on for game in written
+              if game.stats_updated_on is not None]
+    if (stamps and max(stamps) == last_updated_on and
+            all(game.stats_hash is not None for game in written)):
+        logging.info('Game log feed unchanged since %s.', last_updated_on)
+        return []
+    first_corrected = None
+    corrected = []
+    for game_index, game in enumerate(games):
+        game_stats = api_stats.get(game.date.date())
+        if game.id not in written_ids or game_stats is None:
+            continue
+        if stats_changed(game, game_stats):
+            logging.info('Stats of game on %s corrected.', game.date.date())
+            game.pts = game_stats['Pts']
+            game.rbs = game_stats['Rbs']
+            game.ast = game_stats['Ast']
+            game.lbj_DNP = game_stats['MinutesPlayed'] == 0
+            fV.save_facts(database, game, **fV.stats_facts(game_stats))
+            corrected.append(game.date.date())
+            if first_corrected is None:
+                first_corrected = game_index
+        elif game.stats_hash is not None:
+            continue
+        game.stats_hash = dppf.stats_hash(game_stats)
+        game.stats_updated_on = last_updated_on
+    if first_corrected is not None:
+        recompute_features(games, api_stats, first_corrected + 1)
+        if games[-1].season == Game.query.filter_by(player=player).order_by(
+                Game.date.desc()).first().season:
+            save_form_state(season, games, api_stats, player)
+    database.session.commit()
+    if corrected:
+        fV.refresh_features(database, season, player)
+    logging.info('%d games corrected in %s.', len(corrected), season)
+    return corrected
+
+
+def recompute_features(games, api_stats, start):
+    """Function to recompute the features built from the games before a row.
+
+    Args:
+        games (list): the season's app.models.Game rows, in date order
+        api_stats (dict): the player's stats keyed by game date, as returned
+            by fetch_season_stats
+        start (int): index of the first row to recompute
+
+    Returns:
+        None
+    """
+    season_stats = [api_stats.get(game.date.date()) for game in games]
+    features = season_features(season_stats)
+    played = [game_stats is not None and game_stats['MinutesPlayed'] != 0
+              for game_stats in season_stats]
+    form_stats = [fF.form_stat_vector(game_stats) if game_played else
+                  [0] * len(fF.FORM_STATS)
+                  for game_stats, game_played in zip(season_stats, played)]
+    form_features = fF.season_form_features(form_stats, played).tolist()
+    for game, game_features, game_form in zip(games[start:], features[start:],
+                                              form_features[start:]):
+        for column, value in game_features.items():
+            setattr(game, column, value)
+        for column, value in zip(fF.FORM_COLUMNS, game_form):
+            setattr(game, column, value)
+
+
+def save_form_state(season, games, api_stats, player=dppf.PLAYER):
+    """Function to rebuild and save the recent form state after corrections.
+
+    Args:
+        season (str): season of the games
+        games (list): the season's app.models.Game rows, in date order
+        api_stats (dict): the player's stats keyed by game date
+        player (str): player the state is for
+
+    Returns:
+        None
+    """
+    dates = [game.date.date() for game in games
+             if game.date.date() in api_stats]
+    stats = [api_stats[game_date] for game_date in dates]
+    played = [game_stats['MinutesPlayed'] != 0 for game_stats in stats]
+    form_stats = np.array([fF.form_stat_vector(game_stats) for game_stats in
+                           stats]).reshape(-1, len(fF.FORM_STATS))
+    fF.save_form_state(fF.season_form_state(season, form_stats, played,
+                                            dates),
+                       uf.form_state_path(player))
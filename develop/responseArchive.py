@@ -0,0 +1,255 @@
+"""Append-only archive of the raw responses received from the API.
+
+Every successful response from the MySportsFeeds API is appended, with the
+endpoint, URL and parameters of the request, to a gzip compressed JSON lines
+segment in the archive directory. Each record is compressed on its own, so it
+can be read back by seeking to its offset, and segments are closed once they
+reach a maximum size. An index file has a line per record with the request,
+the time it was made and where the record is stored.
+
+In offline mode requests are answered from the archive instead of the API,
+with the latest archived response to an identical request. This is used by
+rebuild_db.py to rebuild the games table after changing how features are
+computed, without pulling hours of data from the API again.
+"""
+
+import threading
+import gzip
+import json
+import os
+from datetime import datetime
+
+
+ARCHIVE_DIR = 'archive'
+ARCHIVE_INDEX = 'index.jsonl'
+SEGMENT_MAX_BYTES = 64 * 1024 * 1024
+
+
+def request_key(endpoint, url, params):
+    """Function to identify a request by its endpoint, URL and parameters."""
+    return json.dumps([endpoint, url, params], sort_keys=True)
+
+
+class archived_response:
+    """Class standing in for a requests response read from the archive.
+
+    Attributes:
+        text (str): body of the response
+        content (bytes): body of the response as bytes
+        status_code (int): always 200, as only successful responses are
+            archived
+    """
+
+    def __init__(self, text):
+        """Constructor for an archived_response object."""
+        self.text = text
+        self.content = text.encode('utf-8')
+        self.status_code = 200
+
+    def json(self):
+        """Method to parse the body of the response as JSON."""
+        return json.loads(self.text)
+
+    def iter_content(self, chunk_size=1, decode_unicode=False):
+        """Generator yielding the body in chunks, as for a requests response.
+
+        Args:
+            chunk_size (int): number of characters in each chunk
+            decode_unicode (bool): ignored, chunks are always str
+
+        Yields:
+            chunk (str): next part of the body
+        """
+        for start in range(0, len(self.text), chunk_size):
+            yield self.text[start:start + chunk_size]
+
+
+class response_archive:
+    """Class appending API responses to, and reading them from, the archive.
+
+    Attributes:
+        directory (str): directory holding the segments and the index
+        offline (bool): whether requests should be answered from the archive
+            instead of the API
+        index (dict): dictionary keyed by request_key whose values are the
+            index entries of the latest response to each request. Only loaded
+            in offline mode.
+    """
+
+    def __init__(self, directory=ARCHIVE_DIR,
+                 segment_max_bytes=SEGMENT_MAX_BYTES):
+        """Constructor for a response_archive object.
+
+        Args:
+            directory (str): directory holding the segments and the index
+            segment_max_bytes (int): size above which a new segment is started
+
+        Returns:
+            None
+        """
+        self.directory = directory
+        self.segment_max_bytes = segment_max_bytes
+        self.offline = False
+        self.index = None
+        self.lock = threading.Lock()
+
+    def segments(self):
+        """Method to list the names of the segments, oldest first."""
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(name for name in os.listdir(self.directory)
+                      if name.endswith('.jsonl.gz'))
+
+    def append(self, endpoint, url, params, text):
+        """Method to add a response to the archive.
+
+        Args:
+            endpoint (str): name of the endpoint called
+            url (str): URL of the request
+            params (dict): query parameters of the request
+            text (str): body of the response
+
+        Returns:
+            None
+        """
+        fetched_at = str(datetime.now())
+        record = gzip.compress((json.dumps({
+                'endpoint': endpoint, 'url': url, 'params': params,
+                'fetched_at': fetched_at, 'text': text}) + '\n').encode(
+                        'utf-8'))
+        self._add_record(endpoint, url, params, fetched_at, record)
+
+    def append_stream(self, endpoint, url, params, chunks):
+        """Generator adding a response to the archive as its body is read.
+
+        Each chunk of the body is passed through and compressed into a
+        temporary file as it goes, so the body is never held in memory as a
+        whole. The record, in the same format as written by append, is added
+        to the archive once the last chunk has been read. If the body is not
+        read to the end nothing is archived.
+
+        Args:
+            endpoint (str): name of the endpoint called
+            url (str): URL of the request
+            params (dict): query parameters of the request
+            chunks (iterable): chunks of the body of the response, as str
+
+        Yields:
+            chunk (str): each chunk of the body, unchanged
+        """
+        fetched_at = str(datetime.now())
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, 'stream-{}-{}.tmp'.format(
+                os.getpid(), threading.get_ident()))
+        try:
+            with gzip.open(path, 'wb') as f:
+                f.write((json.dumps({
+                        'endpoint': endpoint, 'url': url, 'params': params,
+                        'fetched_at': fetched_at})[:-1] +
+                        ', "text": "').encode('utf-8'))
+                for chunk in chunks:
+                    # escapes the chunk exactly as json.dumps escapes it as
+                    # part of the whole body
+                    f.write(json.dumps(chunk)[1:-1].encode('utf-8'))
+                    yield chunk
+                f.write('"}\n'.encode('utf-8'))
+            with open(path, 'rb') as f:
+                record = f.read()
+            self._add_record(endpoint, url, params, fetched_at, record)
+        finally:
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _add_record(self, endpoint, url, params, fetched_at, record):
+        """Writes a compressed record to the current segment and the index."""
+        with self.lock:
+            os.makedirs(self.directory, exist_ok=True)
+            segments = self.segments()
+            if not segments or os.path.getsize(os.path.join(
+                    self.directory, segments[-1])) >= self.segment_max_bytes:
+                segments.append('segment-%06d.jsonl.gz' % len(segments))
+            path = os.path.join(self.directory, segments[-1])
+            with open(path, 'ab') as f:
+                offset = f.tell()
+                f.write(record)
+            entry = {'key': request_key(endpoint, url, params),
+                     'endpoint': endpoint,
+                     'fetched_at': fetched_at,
+                     'segment': segments[-1],
+                     'offset': offset,
+                     'length': len(record)}
+            with open(os.path.join(self.directory, ARCHIVE_INDEX), 'a') as f:
+                f.write(json.dumps(entry) + '\n')
+            if self.index is not None:
+                self.index[entry['key']] = entry
+
+    def load_index(self):
+        """Method to read the index, keeping the latest entry per request.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        self.index = {}
+        path = os.path.join(self.directory, ARCHIVE_INDEX)
+        if os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    entry = json.loads(line)
+                    self.index[entry['key']] = entry
+
+    def read(self, entry):
+        """Method to read a single record given its index entry.
+
+        Args:
+            entry (dict): index entry of the record
+
+        Returns:
+            record (dict): dictionary with the 'endpoint', 'url', 'params',
+                'fetched_at' and 'text' of the archived response
+        """
+        with open(os.path.join(self.directory, entry['segment']), 'rb') as f:
+            f.seek(entry['offset'])
+            data = f.read(entry['length'])
+        return json.loads(gzip.decompress(data).decode('utf-8'))
+
+    def replay(self, endpoint, url, params):
+        """Method to answer a request with the latest archived response to it.
+
+        Args:
+            endpoint (str): name of the endpoint called
+            url (str): URL of the request
+            params (dict): query parameters of the request
+
+        Returns:
+            response (archived_response): the archived response. A KeyError
+                is raised if the request was never archived.
+        """
+        if self.index is None:
+            self.load_index()
+        key = request_key(endpoint, url, params)
+        if key not in self.index:
+            raise KeyError('No archived response to {} {} {}'.format(
+                    endpoint, url, params))
+        return archived_response(self.read(self.index[key])['text'])
+
+    def records(self):
+        """Generator reading every record, one segment at a time.
+
+        Args:
+            None
+
+        Yields:
+            record (dict): archived response as returned by read, oldest first
+        """
+        for segment in self.segments():
+            with gzip.open(os.path.join(self.directory, segment), 'rt',
+                           encoding='utf-8') as f:
+                for line in f:
+                    yield json.loads(line)
+
+
+# archive shared by every API call made in this process
+archive = response_archive()
@@ -0,0 +1,81 @@
+"""Collapsing of identical calls that are in flight at the same time.
+
+When data is pulled from several threads, two of them can ask for the same
+response at the same moment, such as the box score of a game between two
+opponents of the team, before either has received it and cached it. This
+module provides a class that runs a call once for each key at a time: a
+thread asking for a key that is already being fetched waits for that call and
+gets its result, or its exception, instead of making the call again.
+"""
+
+import threading
+
+
+class _flight:
+    """Class holding the outcome of one call shared by its waiters.
+
+    Attributes:
+        done (threading.Event): set once the call has returned or raised
+        result: value returned by the call
+        error (Exception): exception raised by the call, or None
+        waiters (int): number of other threads waiting for the call
+    """
+
+    def __init__(self):
+        """Constructor for a _flight object."""
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class single_flight:
+    """Class making at most one call per key at a time.
+
+    Attributes:
+        flights (dict): dictionary keyed by the key of each call in flight
+            whose values are its _flight
+    """
+
+    def __init__(self):
+        """Constructor for a single_flight object with no calls in flight."""
+        self.flights = {}
+        self.lock = threading.Lock()
+
+    def do(self, key, call):
+        """Method to make a call, or wait for the identical call in flight.
+
+        Args:
+            key (hashable): key identifying the call, such as
+                responseArchive's request_key of a request
+            call (function): function taking no arguments that makes the call
+
+        Returns:
+            result: value returned by the call
+            shared (bool): whether the result came from a call made by
+                another thread
+        """
+        with self.lock:
+            flight = self.flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self.flights[key] = _flight()
+            else:
+                flight.waiters += 1
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result, True
+        try:
+            flight.result = call()
+        except Exception as error:
+            flight.error = error
+            raise
+        finally:
+            # later calls with the key are made again, for instance once a
+            # failed request may succeed
+            with self.lock:
+                del self.flights[key]
+            flight.done.set()
+        return flight.result, False
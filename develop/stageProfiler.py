@@ -0,0 +1,183 @@
+"""Timing of the stages of a run of update_db.py or create_initial_db.py.
+
+This module provides a profiler that wraps the functions making up each stage
+of a run, such as updateFunctions' make_update or the database commits, and
+records how many times each was called and the wall clock and CPU time spent
+in it. Stages can be nested, in which case the time of the inner stage is also
+counted in the outer one. Stages can be timed from several threads at once,
+such as the season pulls of create_initial_db.py --workers: the CPU time of
+a call is that of the thread making it, and a stage's times are summed over
+its calls in every thread, so they can exceed the wall clock time of the run.
+At the end of the run a report is written to the logs directory and the
+timings are appended to a history file, so slow runs can be compared to
+earlier ones. Optionally the whole run is also profiled with cProfile.
+"""
+
+from contextlib import contextmanager
+from datetime import datetime
+import functools
+import threading
+import cProfile
+import time
+import csv
+import os
+import logging
+
+
+PROFILE_DIR = 'logs'
+PROFILE_HISTORY_PATH = 'logs/profile_history.csv'
+HISTORY_COLUMNS = ['run', 'script', 'stage', 'calls', 'wall_seconds',
+                   'cpu_seconds']
+
+
+class stage_profiler:
+    """Class recording the time spent in each stage of a run.
+
+    Attributes:
+        stages (dict): dictionary keyed by stage name whose values are
+            dictionaries with the stage's 'calls', 'wall_seconds' and
+            'cpu_seconds'
+        started (datetime): time the run started, None until start is called
+        cprofile (cProfile.Profile): profile of the whole run, if requested
+    """
+
+    def __init__(self):
+        """Constructor for a stage_profiler object with no stages."""
+        self.stages = {}
+        self.started = None
+        self.cprofile = None
+        self.cprofile_path = None
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name):
+        """Context manager timing the code run inside it as a stage.
+
+        Args:
+            name (str): name of the stage
+
+        Returns:
+            None
+        """
+        wall_start = time.perf_counter()
+        cpu_start = time.thread_time()
+        try:
+            yield
+        finally:
+            wall_seconds = time.perf_counter() - wall_start
+            cpu_seconds = time.thread_time() - cpu_start
+            with self.lock:
+                timing = self.stages.setdefault(name, {'calls': 0,
+                                                       'wall_seconds': 0.0,
+                                                       'cpu_seconds': 0.0})
+                timing['calls'] += 1
+                timing['wall_seconds'] += wall_seconds
+                timing['cpu_seconds'] += cpu_seconds
+
+    def instrument(self, owner, names, stage=None):
+        """Method to replace functions of a module, class or object with timed
+        versions of themselves.
+
+        Because callers look the functions up on their owner when calling
+        them, calls made from other modules are timed as well.
+
+        Args:
+            owner (object): module, class or object the functions belong to
+            names (list): names of the functions to time
+            stage (str): name to record the functions under, defaults to the
+                name of each function
+
+        Returns:
+            None
+        """
+        for name in names:
+            function = getattr(owner, name)
+
+            @functools.wraps(function)
+            def timed(*args, _function=function, _stage=stage or name,
+                      **kwargs):
+                with self.stage(_stage):
+                    return _function(*args, **kwargs)
+            setattr(owner, name, timed)
+
+    def start(self, cprofile_path=None):
+        """Method to mark the start of a run.
+
+        Args:
+            cprofile_path (str): if given, the whole run is profiled with
+                cProfile and the stats are written to this file by finish
+
+        Returns:
+            None
+        """
+        self.started = datetime.now()
+        self.wall_start = time.perf_counter()
+        self.cpu_start = time.process_time()
+        if cprofile_path is not None:
+            self.cprofile_path = cprofile_path
+            self.cprofile = cProfile.Profile()
+            self.cprofile.enable()
+
+    def finish(self, script, report_dir=PROFILE_DIR,
+               history_path=PROFILE_HISTORY_PATH):
+        """Method to write the report of a run and add it to the history.
+
+        Args:
+            script (str): name of the entry point that was run, such as
+                'update_db'
+            report_dir (str): directory to write the report to
+            history_path (str): CSV file the timings are appended to
+
+        Returns:
+            report_path (str): path of the report written
+        """
+        if self.cprofile is not None:
+            self.cprofile.disable()
+            self.cprofile.dump_stats(self.cprofile_path)
+        self.stages['total'] = {
+                'calls': 1,
+                'wall_seconds': time.perf_counter() - self.wall_start,
+                'cpu_seconds': time.process_time() - self.cpu_start}
+        run = self.started.strftime('%Y%m%d_%H%M%S')
+        report_path = os.path.join(report_dir, 'profile_%s_%s.txt' % (
+                script, run))
+        with open(report_path, 'w') as f:
+            f.write(self.report())
+        new_history = not os.path.exists(history_path)
+        with open(history_path, 'a', newline='') as f:
+            writer = csv.writer(f)
+            if new_history:
+                writer.writerow(HISTORY_COLUMNS)
+            for name, timing in self.stages.items():
+                writer.writerow([run, script, name, timing['calls'],
+                                 '%.6f' % timing['wall_seconds'],
+                                 '%.6f' % timing['cpu_seconds']])
+        logging.info('Profile report written to %s.', report_path)
+        return report_path
+
+    def report(self):
+        """Method to format the stage timings as a table.
+
+        Stages are listed from the most to the least wall clock time. The
+        difference between wall clock and CPU time is mostly time spent
+        waiting, on the API, its rate limit or the database.
+
+        Args:
+            None
+
+        Returns:
+            text (str): table with a row for each stage
+        """
+        lines = ['%-30s %7s %12s %12s' % ('stage', 'calls', 'wall s',
+                                          'cpu s')]
+        for name, timing in sorted(self.stages.items(),
+                                   key=lambda item: -item[1]['wall_seconds']):
+            lines.append('%-30s %7d %12.3f %12.3f' % (
+                    name, timing['calls'], timing['wall_seconds'],
+                    timing['cpu_seconds']))
+        text = '\n'.join(lines) + '\n'
+        return text
+
+
+# profiler shared by the stages of a run
+profiler = stage_profiler()
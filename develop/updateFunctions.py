@@ -11,12 +11,43 @@ import sys
 sys.path.append("../")
 from app import app, db
 from develop import dataPullProcessFunctions as dppf
+from develop import formFunctions as fF
+from develop import featureView as fV
 from app.models import Game
 from datetime import datetime, timedelta
 import logging
 
 
-def pull_from_db(season):
+class StatsNotAvailableError(Exception):
+    """Raised when the API has not yet published stats for a completed game.
+
+    Attributes:
+        last_updated_on (str): the 'lastUpdatedOn' stamp of the API's game
+            log feed when it was checked, or None if the response had none
+    """
+
+    def __init__(self, last_updated_on):
+        super().__init__('Stats from last game not yet available. Last '
+                         'updated {}'.format(last_updated_on))
+        self.last_updated_on = last_updated_on
+
+
+def form_state_path(player=dppf.PLAYER):
+    """Function to find the file a player's recent form state is saved to.
+
+    Args:
+        player (str): player, such as 'lebron-james'
+
+    Returns:
+        path (str): fF.FORM_STATE_PATH for the default player, otherwise a
+            file named after the player
+    """
+    if player == dppf.PLAYER:
+        return fF.FORM_STATE_PATH
+    return 'form_state_{}.json'.format(player)
+
+
+def pull_from_db(season, player=dppf.PLAYER):
     """Function to pull all data from a given season into workspace.
 
     This function pulls all data from presumably the current season so that
@@ -25,16 +56,18 @@ def pull_from_db(season):
 
     Args:
         season (str): name of season data to pull in, like '2017-2018-regular'
+        player (str): player whose games to pull, 'lebron-james' by default
 
     Returns:
         games (list): list of app.models.Game objects
     """
-    games = Game.query.filter_by(season=season).all()
+    games = Game.query.filter_by(season=season, player=player).order_by(
+            Game.date).all()
     logging.debug('Succesfull pull of all game data from db.')
     return games
 
 
-def find_next_opponent(season, today):
+def find_next_opponent(season, today, team=dppf.TEAM):
     """Function to find basic details about the next game on the schedule
 
     This function finds the next game on the schedule that has not been played
@@ -43,6 +76,7 @@ def find_next_opponent(season, today):
     Args:
         today (datetime.date()): date object, if datetime.now().date() is
             passed, the real today will be used.
+        team (str): 3 letter abbreviation of the team, 'CLE' by default
 
     Returns:
         next_game_info (dict): dictionary with opponent, date, and home/away
@@ -55,14 +89,14 @@ def find_next_opponent(season, today):
     logging.debug('Searching for next game.')
     upcomingjson = dppf.send_request_schedule(
             season,
-            'CLE', 'from-' + today_code + '-to-' + search_date_end).json()
+            team, 'from-' + today_code + '-to-' + search_date_end).json()
     # confirm there are any upcoming games, otherwise return empty dictionary
     if len(upcomingjson['fullgameschedule']) > 1:
         logging.debug('Next game found.')
         nextgame = upcomingjson['fullgameschedule']['gameentry'][0]
         next_game_info['date'] = datetime.strptime(nextgame['date'],
                                                    '%Y-%m-%d').date()
-        if nextgame['awayTeam']['Abbreviation'] == 'CLE':
+        if nextgame['awayTeam']['Abbreviation'] == team:
             next_game_info['home/away'] = 'away'
             next_game_info['opponent'] = nextgame['homeTeam']['Abbreviation']
         else:
@@ -124,7 +158,8 @@ def opp_stat_update(season, season_start_date, today, opponent):
     Returns:
         upcoming_opp_stats (dict): dictionary with up-to-date wins, losses,
             defensive efficiency rating, and offensive efficiency rating for
-            opponent
+            opponent, or None if the opponent's schedule could not be
+            requested. The request is then queued in the dead letter queue.
     """
     logging.info("Updating opponent stats.")
     starting_values = {
@@ -143,6 +178,9 @@ def opp_stat_update(season, season_start_date, today, opponent):
     opponent_stats = dppf.find_opponent_stats(
             season, season_start_date, today - timedelta(days=1),
             starting_values, opponent)
+    if opponent_stats is None:
+        logging.warning("Stats of %s unavailable.", opponent)
+        return None
     upcoming_opp_stats = {
         'opp_def_eff': (opponent_stats['PtsAgainst']/(
             opponent_stats[
@@ -158,7 +196,8 @@ def opp_stat_update(season, season_start_date, today, opponent):
     return upcoming_opp_stats
 
 
-def full_daily_update(today, datapull, database):
+def full_daily_update(today, datapull, database, team=dppf.TEAM,
+                      player=dppf.PLAYER):
     """Function to write results of last game and return info on upcoming game
 
     This function is used when a game has been completed since the last time
@@ -176,12 +215,21 @@ def full_daily_update(today, datapull, database):
         datapull (list): the list of app.models.Game objects returned by pull
             from db for full season.
         db (flask_sqlalchemy.SQLAlchemy): database to write the edit to
+        team (str): 3 letter abbreviation of the team, 'CLE' by default
+        player (str): player whose stats to update, 'lebron-james' by default
 
     Returns:
         next_game (dict): dictionary with date, opponent, and home/away status
-            for next game on the schedule that is not yet in the database. This
-            is only returned if there is a new game within the next 15 days
+            for next game on the schedule that is not yet in the database, as
+            well as LeBron James' season and recent form stats going into it.
+            This is only returned if there is a new game within the next 15
+            days
         error_string (str): string returned if there is not a new game
+
+    Raises:
+        StatsNotAvailableError: if the API has not published LeBron James'
+            stats for the last game yet. Nothing is written to the database
+            in that case.
     """
     # datapull is result of Game.query.filter_by(season).all()
     # db is database to write updates to
@@ -192,29 +240,44 @@ def full_daily_update(today, datapull, database):
     logging.debug('last game was on %s against %s',
                   last_game.date, last_game.opponent)
     this_season = last_game.season
-    lastgamejson = dppf.send_request_lbj(this_season,
-                                         dppf.date_to_api_format(
-                                                 last_game.date.date())).json()
+    lastgamejson = dppf.send_request_gamelogs(this_season,
+                                              dppf.date_to_api_format(
+                                                  last_game.date.date()),
+                                              [player]).json()
     try:
         lastgamestats = dppf.extract_lbj_stats(
             lastgamejson['playergamelogs']['gamelogs'][0])
-    except:
-        logging.error('Stats from last game not yet available. Last updated ' + lastgamejson[
-                'playergamelogs']['lastUpdatedOn'])
+    except (KeyError, IndexError):
+        error = StatsNotAvailableError(
+                lastgamejson.get('playergamelogs', {}).get('lastUpdatedOn'))
+        logging.error(str(error))
+        raise error
     last_game.pts = lastgamestats['Pts']
     last_game.rbs = lastgamestats['Rbs']
     last_game.ast = lastgamestats['Ast']
+    last_game.stats_updated_on = lastgamejson['playergamelogs'].get(
+            'lastUpdatedOn')
+    last_game.stats_hash = dppf.stats_hash(lastgamestats)
     if lastgamestats['MinutesPlayed'] == 0:
         last_game.lbj_DNP = True
     else:
         last_game.lbj_DNP = False
+    fV.save_facts(database, last_game, **fV.stats_facts(lastgamestats))
     # add in game stats to bottom row of database-most recently completed game
     database.session.commit()
     logging.info('Last game stats added.')
+    # add last game to recent form, unless an earlier run already did
+    form_state = fF.load_form_state(this_season, form_state_path(player))
+    if not last_game.lbj_DNP and form_state['last_game_date'] != str(
+            last_game.date.date()):
+        fF.update_form_state(form_state, fF.form_stat_vector(lastgamestats),
+                             last_game.date.date())
+        fF.save_form_state(form_state, form_state_path(player))
     # now move on to upcoming game
-    next_game = find_next_opponent(this_season, today)
+    next_game = find_next_opponent(this_season, today, team)
     # confirm that we were able to find an upcoming game
     if len(next_game) > 0:
+        next_game.update(fF.form_features(form_state))
         delta = next_game['date'] - last_game.date.date()
         next_game['days_rest'] = delta.days - 1
         next_game['lbj_games_missed'] = last_game.lbj_games_missed + last_game.lbj_DNP
@@ -259,9 +322,9 @@ def full_daily_update(today, datapull, database):
         # find out if Cavs won last game
         last_game_date = dppf.date_to_api_format(last_game.date.date())
         last_game_json = dppf.send_request_cavsgame(
-                        last_game.season, last_game_date).json()
+                        last_game.season, last_game_date, team).json()
         if last_game_json['scoreboard']['gameScore'][0][
-                        'game']['homeTeam']['Abbreviation'] == "CLE":
+                        'game']['homeTeam']['Abbreviation'] == team:
             last_game_cavs = int(last_game_json['scoreboard'][
                             'gameScore'][0]['homeScore'])
             last_game_opp = int(last_game_json['scoreboard'][
@@ -271,6 +334,8 @@ def full_daily_update(today, datapull, database):
                             'gameScore'][0]['awayScore'])
             last_game_opp = int(last_game_json['scoreboard'][
                             'gameScore'][0]['homeScore'])
+        fV.save_facts(database, last_game,
+                      team_won=last_game_cavs > last_game_opp)
         if last_game_cavs > last_game_opp:
             next_game['cavsWins'] = last_game.cavsWins + 1
             next_game['cavsLosses'] = last_game.cavsLosses
@@ -282,6 +347,11 @@ def full_daily_update(today, datapull, database):
         upcoming_opp_stats = opp_stat_update(
                 last_game.season, season_firstgame_date, today, next_game[
                         'opponent'])
+        # efficiencies of 0 mark the game as unusable for training until the
+        # next update finds the opponent's stats
+        if upcoming_opp_stats is None:
+            upcoming_opp_stats = {'opp_def_eff': 0, 'opp_off_eff': 0,
+                                  'OPPW': 0, 'OPPL': 0}
         next_game['opp_def_eff'] = upcoming_opp_stats['opp_def_eff']
         next_game['opp_off_eff'] = upcoming_opp_stats['opp_off_eff']
         next_game['OPPW'] = upcoming_opp_stats['OPPW']
@@ -294,7 +364,7 @@ def full_daily_update(today, datapull, database):
         logging.warning("No upcoming games on regular season schedule.")
 
 
-def make_update(today, season, database):
+def make_update(today, season, database, team=dppf.TEAM, player=dppf.PLAYER):
     """Function to make required daily update to db.
 
     This function will, depending on the contents of the bottom row of the
@@ -313,25 +383,33 @@ def make_update(today, season, database):
         season (str): string representing current season, like '2017-2018-
             regular'
         db (flask_sqlalchemy.SQLAlchemy): database to pull from and write to
+        team (str): 3 letter abbreviation of the team, 'CLE' by default
+        player (str): player whose games to update, 'lebron-james' by default
 
     Returns:
         status (str): string describing type of update made, either
         "newgameupdate", "updatedstats", or "nogame".
+
+    Raises:
+        StatsNotAvailableError: if the last game in the database has been
+            played but the API has not published its stats yet
     """
     # pass datetime.now().date() to use today as argument
     # db is database to write to
-    datapull = pull_from_db(season)
+    datapull = pull_from_db(season, player)
     # check if most recent game in database has occurred
     # if so, we fill in its stats and add the next upcoming game as the bottom
     # row of the database
     if datapull[len(datapull) - 1].date.date() < today:
-        new_row = full_daily_update(today, datapull, db)
+        new_row = full_daily_update(today, datapull, db, team, player)
         # if there are no upcoming games, full_daily_update returns str
         # if there is an upcoming game, full_daily_update returns a dict of
         # stats for that game
         if isinstance(new_row, dict):
             new_row_model = Game(date=new_row['date'],
                                  season=season,
+                                 player=player,
+                                 team=team,
                                  opponent=new_row['opponent'],
                                  home_away=new_row['home/away'],
                                  lbj_days_rest=new_row['days_rest'],
@@ -351,11 +429,15 @@ def make_update(today, season, database):
                                  oppWins=new_row['OPPW'],
                                  oppLosses=new_row['OPPL'],
                                  lbj_games_missed=new_row['lbj_games_missed'])
+            for column in fF.FORM_COLUMNS:
+                setattr(new_row_model, column, new_row[column])
             database.session.add(new_row_model)
+            fV.save_facts(database, new_row_model)
             database.session.commit()
             status = "newgameupdate"
         else:
             status = "nogame"
+        fV.refresh_features(database, season, player)
         # if the most recent game in the database hasn't occurred yet,
         # we don't need to update Cavs stats,
         # instead we just pull opponent stats again to make sure they are
@@ -368,10 +450,12 @@ def make_update(today, season, database):
         opponent = upcoming_game.opponent
         bottom_row_update = opp_stat_update(this_season, this_season_start,
                                             today, opponent)
-        upcoming_game.opp_def_eff = bottom_row_update['opp_def_eff']
-        upcoming_game.opp_off_eff = bottom_row_update['opp_off_eff']
-        upcoming_game.oppWins = bottom_row_update['OPPW']
-        upcoming_game.oppLosses = bottom_row_update['OPPL']
-        db.session.commit()
+        # keep the stats of the last update if the opponent's are unavailable
+        if bottom_row_update is not None:
+            upcoming_game.opp_def_eff = bottom_row_update['opp_def_eff']
+            upcoming_game.opp_off_eff = bottom_row_update['opp_off_eff']
+            upcoming_game.oppWins = bottom_row_update['OPPW']
+            upcoming_game.oppLosses = bottom_row_update['OPPL']
+            db.session.commit()
         status = "updatedstats"
     return status
@@ -0,0 +1,142 @@
+"""Functions for precomputing predictions over a grid of what-if scenarios.
+
+This module provides functions that take the next upcoming game in the
+database and make predictions for it under every combination of opponent,
+home/away status and days of rest. The predictions are stored as a compact
+array alongside a small index, so the web app can answer what-if questions
+with a constant time lookup instead of loading the model or querying the
+database.
+"""
+
+import sys
+sys.path.append("../")
+from develop import inferenceFunctions as iF
+import numpy as np
+import json
+import os
+import logging
+
+
+GRID_PATH = 'whatif_grid.npy'
+GRID_INDEX_PATH = 'whatif_grid.json'
+DAYS_REST_VALUES = [0, 1, 2, 3, 4]
+
+
+def build_grid(upcoming_game, efficiencies, coefficients,
+               days_rest_values=DAYS_REST_VALUES):
+    """Function to make predictions for every what-if scenario.
+
+    Every scenario starts from the predictors of the next upcoming game, so
+    LeBron James' current season stats are used throughout. Home/away status,
+    days of rest and opponent efficiency ratings are then replaced for each
+    scenario and all scenarios are scored at once.
+
+    Args:
+        upcoming_game (app.models.Game): bottom row of the game table
+        efficiencies (dict): dictionary keyed by opponent abbreviation whose
+            values are (defensive efficiency, offensive efficiency) tuples, as
+            returned by horizonFunctions' current_opponent_efficiencies
+        coefficients (dict): coefficients as returned by inferenceFunctions'
+            load_coefficients
+        days_rest_values (list): days of rest to make predictions for
+
+    Returns:
+        grid (dict): dictionary with keys 'values' (np.ndarray of shape
+            (opponents, 2, days of rest, 3) with predicted points, rebounds and
+            assists, where the second axis is indexed by
+            inferenceFunctions.HOME_AWAY_CODES), 'opponents' (list) and
+            'days_rest' (list)
+    """
+    efficiencies = dict(efficiencies)
+    efficiencies[upcoming_game.opponent] = (upcoming_game.opp_def_eff,
+                                            upcoming_game.opp_off_eff)
+    opponents = sorted(efficiencies)
+    columns = coefficients['columns']
+    ratings = np.array([efficiencies[opponent] for opponent in opponents])
+    shape = (len(opponents), 2, len(days_rest_values))
+    predictors = np.empty(shape + (len(columns),))
+    predictors[...] = iF.game_to_predictors(upcoming_game, columns)
+    for column, values in (
+            ('opp_def_eff', ratings[:, 0, None, None]),
+            ('opp_off_eff', ratings[:, 1, None, None]),
+            ('home_away', np.arange(2)[None, :, None]),
+            ('lbj_days_rest', np.array(days_rest_values)[None, None, :])):
+        if column in columns:
+            predictors[..., columns.index(column)] = values
+    predictions = iF.predict_rows(coefficients,
+                                  predictors.reshape(-1, len(columns)))
+    grid = {'values': predictions.reshape(shape + (3,)).astype(np.float32),
+            'opponents': opponents,
+            'days_rest': list(days_rest_values)}
+    return grid
+
+
+def save_grid(grid, path=GRID_PATH, index_path=GRID_INDEX_PATH):
+    """Function to write a what-if grid to disk.
+
+    Both files are written to temporary paths first and then renamed, so a
+    reader never sees a partially written grid.
+
+    Args:
+        grid (dict): grid as returned by build_grid
+        path (str): file to write the array of predictions to
+        index_path (str): file to write the opponents and days of rest to
+
+    Returns:
+        None
+    """
+    with open(path + '.tmp', 'wb') as f:
+        np.save(f, grid['values'])
+    with open(index_path + '.tmp', 'w') as f:
+        json.dump({'opponents': grid['opponents'],
+                   'days_rest': grid['days_rest']}, f)
+    os.replace(path + '.tmp', path)
+    os.replace(index_path + '.tmp', index_path)
+    logging.debug('What-if grid saved.')
+
+
+def load_grid(path=GRID_PATH, index_path=GRID_INDEX_PATH, mmap_mode=None):
+    """Function to read a what-if grid written by save_grid.
+
+    Args:
+        path (str): file the array of predictions was written to
+        index_path (str): file the opponents and days of rest were written to
+        mmap_mode (str): if 'r', the array of predictions is memory-mapped
+            read-only instead of read into memory, so processes loading the
+            same file share a single copy of it
+
+    Returns:
+        grid (dict): grid as returned by build_grid, with the additional keys
+            'opponent_index' and 'days_rest_index' mapping values to positions
+            along the corresponding axis
+    """
+    with open(index_path) as f:
+        grid = json.load(f)
+    grid['values'] = np.load(path, mmap_mode=mmap_mode)
+    grid['opponent_index'] = {opponent: i for i, opponent in enumerate(
+            grid['opponents'])}
+    grid['days_rest_index'] = {days: i for i, days in enumerate(
+            grid['days_rest'])}
+    return grid
+
+
+def lookup(grid, opponent, home_away, days_rest):
+    """Function to find the predictions for a single what-if scenario.
+
+    Args:
+        grid (dict): grid as returned by load_grid
+        opponent (str): 3 letter abbreviation for opponent, such as 'BOS'
+        home_away (str): 'home' or 'away'
+        days_rest (int): days of rest before the game
+
+    Returns:
+        prediction (dict): dictionary with predicted points, rebounds and
+            assists. A KeyError is raised if the scenario is not in the grid.
+    """
+    values = grid['values'][grid['opponent_index'][opponent],
+                            iF.HOME_AWAY_CODES[home_away],
+                            grid['days_rest_index'][days_rest]]
+    prediction = {'predicted_pts': float(values[0]),
+                  'predicted_rbs': float(values[1]),
+                  'predicted_ast': float(values[2])}
+    return prediction
@@ -0,0 +1,146 @@
+"""Retries the API requests that failed while the games table was built.
+
+When a box score, scoreboard or schedule request fails during
+create_initial_db.py or the daily update, the rest of the games are still
+built and the request is queued in the dead letter queue with the rows built
+without it. This module retries each queued request and, once it succeeds,
+patches only those rows: the opponent stats of the later games against the
+teams of a missing box score, the win-loss record of the games after a
+missing scoreboard, or the games of a season that could not be pulled.
+Requests that fail again stay in the queue for the next run.
+
+Example:
+    python drain_dead_letters.py
+"""
+
+from app import app, db
+from app.models import Game, GameFact
+from develop import dataPullProcessFunctions as dppf
+from develop import formFunctions as fF
+from develop import updateFunctions as uf
+from develop import deadLetters as dL
+from develop import apiMetrics as aM
+from datetime import datetime
+import create_initial_db
+import logging
+
+
+# endpoints whose responses do not change once a game is played
+CACHEABLE_ENDPOINTS = ['game_boxscore', 'scoreboard']
+
+
+def retry(entry):
+    """Retries the request of a dead letter entry and patches its rows.
+
+    Args:
+        entry (dict): entry of the dead letter queue
+
+    Returns:
+        None. dppf.RequestFailedError is raised if the request fails again.
+    """
+    response = dppf.send_request(
+            entry['endpoint'], entry['url'], entry['params'],
+            cacheable=entry['endpoint'] in CACHEABLE_ENDPOINTS)
+    affects = entry['affects']
+    patch = {'opponent_stats': patch_opponent_stats,
+             'team_record': patch_team_record,
+             'season': patch_season}[affects['kind']]
+    try:
+        patch(affects, response)
+    except Exception:
+        db.session.rollback()
+        raise
+    db.session.commit()
+    logging.info('Dead letter for %s resolved.', entry['url'])
+
+
+def patch_opponent_stats(affects, response):
+    """Recomputes the opponent stats of the games after a missing box score.
+
+    Args:
+        affects (dict): 'season', 'date' of the game whose stats were missing
+            and 'teams' whose later stats were built without it
+        response (requests.models.Response): response of the request retried,
+            which is cached for the recomputation
+
+    Returns:
+        None
+    """
+    season_start = db.session.query(db.func.min(Game.date)).filter(
+            Game.season == affects['season']).scalar()
+    after = datetime.strptime(affects['date'], '%Y-%m-%d')
+    for game in Game.query.filter(Game.season == affects['season'],
+                                  Game.opponent.in_(affects['teams']),
+                                  Game.date > after).all():
+        opp_stats = uf.opp_stat_update(affects['season'], season_start.date(),
+                                       game.date.date(), game.opponent)
+        # the schedule request failed again and is queued for the next run
+        if opp_stats is None:
+            continue
+        game.opp_def_eff = opp_stats['opp_def_eff']
+        game.opp_off_eff = opp_stats['opp_off_eff']
+        game.oppWins = opp_stats['OPPW']
+        game.oppLosses = opp_stats['OPPL']
+
+
+def patch_team_record(affects, response):
+    """Adds the result of a game to the record of the team's later games.
+
+    Args:
+        affects (dict): 'season', 'team' and 'date' of the game whose score
+            was missing
+        response (requests.models.Response): scoreboard of the game
+
+    Returns:
+        None
+    """
+    won = dppf.team_won(response.json(), affects['team'])
+    after = datetime.strptime(affects['date'], '%Y-%m-%d')
+    GameFact.query.filter_by(season=affects['season'], team=affects['team'],
+                             date=after).update({'team_won': won},
+                                                synchronize_session=False)
+    for game in Game.query.filter(Game.season == affects['season'],
+                                  Game.team == affects['team'],
+                                  Game.date > after).all():
+        if won:
+            game.cavsWins += 1
+        else:
+            game.cavsLosses += 1
+
+
+def patch_season(affects, response):
+    """Adds the games of a season that could not be pulled.
+
+    Args:
+        affects (dict): 'season', 'until_date', 'team' and 'players' of the
+            season, as for create_initial_db.add_season
+        response (requests.models.Response): response of the request retried
+
+    Returns:
+        None
+    """
+    for model in [Game, GameFact]:
+        model.query.filter(model.season == affects['season'],
+                           model.team == affects['team'],
+                           model.player.in_(affects['players'])).delete(
+                                   synchronize_session=False)
+    schedules = create_initial_db.add_season(
+            affects['season'], affects['until_date'], affects['team'],
+            affects['players'])
+    for player, player_schedule in schedules.items():
+        if Game.query.filter_by(player=player).order_by(
+                Game.date.desc()).first().season == affects['season']:
+            fF.save_form_state(player_schedule.form_state,
+                               uf.form_state_path(player))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(filename="logs/drain_dead_letters.log",
+                        level=logging.DEBUG)
+    try:
+        with app.app_context():
+            resolved, remaining = dL.queue.drain(retry)
+        print('{} dead letters resolved, {} remaining'.format(
+                len(resolved), len(remaining)))
+    finally:
+        aM.registry.dump()
@@ -1,14 +1,173 @@
-from flask import render_template
-from app import app
+from flask import render_template, request, jsonify, abort, make_response
+from flask import send_from_directory
+from app import app, api, cache, snapshot
 from app.models import Game, Predictions
+from develop import whatIfFunctions as wF
+from develop import dataPullProcessFunctions as dppf
+from datetime import datetime, timezone
+import argparse
+import hashlib
+import os
+
+
+# rendered index page kept in memory between requests, rendered again only
+# after the daily update has invalidated it
+index_cache = {'stamp': None, 'key': None, 'body': None, 'etag': None,
+               'last_modified': None}
+# what-if grid memory-mapped between requests, mapped again when the daily
+# update writes a new one
+whatif_cache = {'mtime': None, 'grid': None}
+
+
+def whatif_grid():
+    """Function to get the current what-if grid, loading it only if changed.
+
+    The array of predictions is memory-mapped, so worker processes forked by
+    serve.py after it was loaded, or that load the same file, share one copy.
+
+    Args:
+        None
+
+    Returns:
+        grid (dict): grid as returned by whatIfFunctions' load_grid, or None
+            if the daily update has not written one yet
+    """
+    try:
+        mtime = os.stat(wF.GRID_INDEX_PATH).st_mtime
+    except FileNotFoundError:
+        return None
+    if mtime != whatif_cache['mtime']:
+        whatif_cache['grid'] = wF.load_grid(mmap_mode='r')
+        whatif_cache['mtime'] = mtime
+    return whatif_cache['grid']
+
+
+def cached_index():
+    """Function to get the rendered index page, querying the db only if stale.
+
+    The database is only queried when the render stamp written by the daily
+    update has changed since the page was last rendered, or if the daily
+    update has never written one. The page is only rendered again if the
+    latest prediction or the version of the next game's row has changed.
+
+    Args:
+        None
+
+    Returns:
+        index_cache (dict): dictionary with the rendered page, its ETag and
+            the time the daily update last changed the data, or None if it
+            never has
+    """
+    stamp = cache.render_stamp()
+    if stamp is None or stamp != index_cache['stamp']:
+        next_game = Game.query.filter_by(player=dppf.PLAYER).order_by(
+                Game.date.desc()).first()
+        predictions = Predictions.query.order_by(
+                Predictions.predict_date.desc()).first()
+        key = (predictions.id, next_game.id, next_game.version)
+        if key != index_cache['key']:
+            index_cache['body'] = render_template(
+                    'index.html', next_game=next_game,
+                    predictions=predictions)
+            index_cache['etag'] = hashlib.sha1(
+                    repr(key).encode('utf-8')).hexdigest()
+            index_cache['key'] = key
+        # the time of the data rather than of the render, so every worker
+        # sends the same Last-Modified
+        index_cache['last_modified'] = (
+                None if stamp is None else
+                datetime.fromtimestamp(int(stamp), timezone.utc))
+        index_cache['stamp'] = stamp
+    return index_cache
 
 
 @app.route('/')
 def index():
-    return render_template('index.html', next_game=Game.query.order_by(
-            Game.date.desc()).first(), predictions=Predictions.query.order_by(
-                    Predictions.predict_date.desc()).first())
+    if app.config.get('SERVE_SNAPSHOT'):
+        return send_from_directory(os.path.abspath(snapshot.SNAPSHOT_DIR),
+                                   snapshot.SNAPSHOT_PAGE)
+    page = cached_index()
+    response = make_response(page['body'])
+    response.set_etag(page['etag'])
+    response.last_modified = page['last_modified']
+    return response.make_conditional(request)
+
+
+@app.route('/predictions.json')
+def predictions_json():
+    if app.config.get('SERVE_SNAPSHOT'):
+        return send_from_directory(os.path.abspath(snapshot.SNAPSHOT_DIR),
+                                   snapshot.SNAPSHOT_PAYLOAD)
+    return jsonify(snapshot.snapshot_payload(
+            Game.query.filter_by(player=dppf.PLAYER).order_by(
+                    Game.date.desc()).first(),
+            Predictions.query.order_by(
+                    Predictions.predict_date.desc()).first()))
+
+
+@app.route('/whatif')
+def whatif():
+    grid = whatif_grid()
+    if grid is None:
+        return jsonify({'error': 'the what-if predictions have not been '
+                        'built yet'}), 503
+    try:
+        prediction = wF.lookup(grid,
+                               request.args['opponent'],
+                               request.args['home_away'],
+                               int(request.args['days_rest']))
+    except (KeyError, ValueError):
+        abort(400)
+    return jsonify(prediction)
+
+
+@app.route('/api/games')
+def api_games():
+    query = Game.query
+    if 'season' in request.args:
+        query = query.filter(Game.season == request.args['season'])
+    if 'opponent' in request.args:
+        query = query.filter(Game.opponent == request.args['opponent'])
+    try:
+        rows, next_cursor = api.fetch_page(
+                query, Game, Game.date, request.args.get('cursor'),
+                api.page_size(request.args.get('limit')))
+    except ValueError:
+        abort(400)
+    columns = [column.name for column in Game.__table__.columns]
+    return app.response_class(api.page_json(rows, columns, next_cursor),
+                              mimetype='application/json')
+
+
+@app.route('/api/predictions')
+def api_predictions():
+    query = Predictions.query
+    if 'season' in request.args or 'opponent' in request.args:
+        # the games table holds a row per player on each date, so only the
+        # player the predictions are for is joined
+        query = query.join(Game, (Game.date == Predictions.game_date) &
+                           (Game.player == dppf.PLAYER))
+    if 'season' in request.args:
+        query = query.filter(Game.season == request.args['season'])
+    if 'opponent' in request.args:
+        query = query.filter(Game.opponent == request.args['opponent'])
+    try:
+        rows, next_cursor = api.fetch_page(
+                query, Predictions, Predictions.predict_date,
+                request.args.get('cursor'),
+                api.page_size(request.args.get('limit')))
+    except ValueError:
+        abort(400)
+    columns = [column.name for column in Predictions.__table__.columns]
+    return app.response_class(api.page_json(rows, columns, next_cursor),
+                              mimetype='application/json')
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Run the web app.')
+    parser.add_argument('--static', action='store_true',
+                        help='serve the snapshot published by the daily '
+                        'update instead of querying the database')
+    args = parser.parse_args()
+    app.config['SERVE_SNAPSHOT'] = args.static
     app.run(host='0.0.0.0')
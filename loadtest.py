@@ -0,0 +1,253 @@
+"""Load tests the web app and reports throughput and latency percentiles.
+
+By default this module seeds a SQLite database in a temporary directory with
+synthetic games, predictions and a what-if grid, starts the web app against it
+in a background thread, and then requests each path from a number of
+concurrent clients. It reports, for each path, the requests made, errors,
+throughput, 50th/95th/99th percentile latency and the number of database
+queries made per request. With --url it instead loads an instance that is
+already running elsewhere, in which case database queries cannot be counted.
+
+Example:
+    python loadtest.py --concurrency 8 --requests 2000
+"""
+
+from datetime import datetime, timedelta
+from urllib.request import urlopen
+from urllib.error import HTTPError
+import concurrent.futures
+import threading
+import argparse
+import random
+import tempfile
+import time
+import os
+import logging
+
+
+DEFAULT_PATHS = ['/',
+                 '/predictions.json',
+                 '/api/games?limit=50',
+                 '/api/predictions?limit=50',
+                 '/whatif?opponent=BOS&home_away=home&days_rest=1']
+OPPONENTS = ['ATL', 'BOS', 'BRO', 'CHA', 'CHI', 'DAL', 'DEN', 'DET', 'GSW',
+             'HOU', 'IND', 'LAC', 'LAL', 'MEM', 'MIA', 'MIL', 'MIN', 'NOP',
+             'NYK', 'OKL', 'ORL', 'PHI', 'PHX', 'POR', 'SAC', 'SAS', 'TOR',
+             'UTA', 'WAS']
+
+
+def seed_database(n_games, seed=0):
+    """Function to fill an empty database with synthetic games.
+
+    Every game gets a prediction made the day before it, so the history
+    endpoints have as many predictions as games to page through.
+
+    Args:
+        n_games (int): number of games to add
+        seed (int): seed for the random number generator
+
+    Returns:
+        None
+    """
+    from app import app, db
+    from app.models import Game, Predictions
+    rng = random.Random(seed)
+    start = datetime(2015, 10, 27)
+    with app.app_context():
+        db.create_all()
+        for i in range(n_games):
+            date = start + timedelta(days=2 * i)
+            db.session.add(Game(
+                    date=date, season='%d-%d-regular' % (
+                            2015 + i // 82, 2016 + i // 82),
+                    opponent=rng.choice(OPPONENTS),
+                    home_away=rng.choice(['home', 'away']),
+                    lbj_days_rest=1, lbj_2pt_pct=rng.uniform(0.5, 0.6),
+                    lbj_3pt_pct=rng.uniform(0.3, 0.4),
+                    lbj_ft_pct=rng.uniform(0.65, 0.75),
+                    lbj_2pt_mpg=rng.uniform(7, 9),
+                    lbj_3pt_mpg=rng.uniform(1, 2),
+                    lbj_ft_mpg=rng.uniform(4, 5),
+                    lbj_rbs_pgm=rng.uniform(7, 9),
+                    lbj_ast_pgm=rng.uniform(7, 9),
+                    lbj_plusminpg=rng.uniform(-2, 8),
+                    opp_def_eff=rng.uniform(100, 110),
+                    opp_off_eff=rng.uniform(100, 110),
+                    pts=rng.randint(15, 40), rbs=rng.randint(3, 15),
+                    ast=rng.randint(3, 15), cavsWins=0, cavsLosses=0,
+                    oppWins=0, oppLosses=0, lbj_games_missed=0,
+                    lbj_DNP=False))
+            db.session.add(Predictions(
+                    game_date=date, predict_date=date - timedelta(days=1),
+                    predicted_pts=rng.uniform(20, 30),
+                    predicted_rbs=rng.uniform(6, 10),
+                    predicted_ast=rng.uniform(6, 10)))
+        db.session.commit()
+
+
+def seed_whatif_grid():
+    """Function to write a what-if grid of synthetic predictions.
+
+    Args:
+        None
+
+    Returns:
+        None
+    """
+    from develop import whatIfFunctions as wF
+    import numpy as np
+    values = np.random.RandomState(0).uniform(5, 30, size=(
+            len(OPPONENTS), 2, len(wF.DAYS_REST_VALUES), 3))
+    wF.save_grid({'values': values.astype(np.float32),
+                  'opponents': OPPONENTS,
+                  'days_rest': wF.DAYS_REST_VALUES})
+
+
+def start_local_server(n_games):
+    """Function to start the web app against a seeded local database.
+
+    The working directory is changed to a new temporary directory holding the
+    database and the files written by the daily update.
+
+    Args:
+        n_games (int): number of synthetic games to seed the database with
+
+    Returns:
+        base_url (str): URL the app is listening on
+        query_counts (dict): dictionary keyed by path that is updated with
+            the number of database queries made while serving that path
+    """
+    workdir = tempfile.mkdtemp(prefix='lbjapp-loadtest-')
+    os.chdir(workdir)
+    with open('loadtest_settings.py', 'w') as f:
+        f.write("SQLALCHEMY_DATABASE_URI = 'sqlite:///%s'\n" % os.path.join(
+                workdir, 'loadtest.db'))
+        f.write("SQLALCHEMY_TRACK_MODIFICATIONS = False\n")
+    os.environ['LBJAPP_SETTINGS'] = os.path.join(workdir,
+                                                 'loadtest_settings.py')
+    from flask import has_request_context, request
+    from sqlalchemy import event
+    from werkzeug.serving import make_server
+    from app import app, db, cache
+    import lbjapp
+    seed_database(n_games)
+    seed_whatif_grid()
+    cache.invalidate_render_cache()
+    query_counts = {}
+    lock = threading.Lock()
+
+    def count_query(*args):
+        if has_request_context():
+            path = request.full_path.rstrip('?')
+            with lock:
+                query_counts[path] = query_counts.get(path, 0) + 1
+
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', count_query)
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    server = make_server('127.0.0.1', 0, lbjapp.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = 'http://127.0.0.1:%d' % server.server_port
+    return base_url, query_counts
+
+
+def timed_request(url):
+    """Function to request a URL and time the response.
+
+    Args:
+        url (str): URL to request
+
+    Returns:
+        latency (float): seconds until the full response was read
+        ok (bool): whether the response was successful
+    """
+    start = time.perf_counter()
+    try:
+        with urlopen(url) as response:
+            response.read()
+        ok = True
+    except HTTPError:
+        ok = False
+    latency = time.perf_counter() - start
+    return latency, ok
+
+
+def percentile(values, share):
+    """Function to find a percentile of a list of values by nearest rank."""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(share * len(ordered)))]
+
+
+def run_load(base_url, paths, requests_per_path, concurrency):
+    """Function to request every path from concurrent clients.
+
+    Args:
+        base_url (str): URL the app is listening on
+        paths (list): paths to request
+        requests_per_path (int): number of times to request each path
+        concurrency (int): number of clients requesting at the same time
+
+    Returns:
+        results (dict): dictionary keyed by path with the latency of each
+            request, the number of errors and the seconds the path took
+    """
+    results = {}
+    with concurrent.futures.ThreadPoolExecutor(concurrency) as executor:
+        for path in paths:
+            start = time.perf_counter()
+            outcomes = list(executor.map(
+                    timed_request, [base_url + path] * requests_per_path))
+            results[path] = {
+                    'latencies': [latency for latency, ok in outcomes],
+                    'errors': sum(not ok for latency, ok in outcomes),
+                    'elapsed': time.perf_counter() - start}
+    return results
+
+
+def report(results, query_counts):
+    """Function to print throughput, latency and query counts for each path.
+
+    Args:
+        results (dict): dictionary returned by run_load
+        query_counts (dict): database queries made for each path, or None if
+            they were not counted
+
+    Returns:
+        None
+    """
+    print('%-50s %7s %6s %9s %8s %8s %8s %9s' % (
+            'path', 'reqs', 'errors', 'req/s', 'p50 ms', 'p95 ms', 'p99 ms',
+            'queries'))
+    for path, result in results.items():
+        latencies = result['latencies']
+        if query_counts is None:
+            queries = 'n/a'
+        else:
+            queries = '%.2f' % (query_counts.get(path, 0) / len(latencies))
+        print('%-50s %7d %6d %9.1f %8.2f %8.2f %8.2f %9s' % (
+                path, len(latencies), result['errors'],
+                len(latencies) / result['elapsed'],
+                1000 * percentile(latencies, 0.5),
+                1000 * percentile(latencies, 0.95),
+                1000 * percentile(latencies, 0.99), queries))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+            description='Load test the web app.')
+    parser.add_argument('--url', help='load an already running instance '
+                        'instead of starting one on a seeded local database')
+    parser.add_argument('--games', type=int, default=500,
+                        help='synthetic games to seed the local database with')
+    parser.add_argument('--requests', type=int, default=500,
+                        help='requests to make to each path')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--path', action='append', dest='paths',
+                        help='path to request, may be repeated')
+    args = parser.parse_args()
+    if args.url is None:
+        base_url, query_counts = start_local_server(args.games)
+    else:
+        base_url, query_counts = args.url.rstrip('/'), None
+    report(run_load(base_url, args.paths or DEFAULT_PATHS, args.requests,
+                    args.concurrency), query_counts)
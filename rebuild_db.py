@@ -0,0 +1,124 @@
+"""Rebuilds the games table from the archive of raw API responses.
+
+Every response received from the API is kept in responseArchive's archive.
+This module rebuilds the games table the same way create_initial_db.py builds
+it, but with every request answered from the archive instead of the API, so
+a change to how features are computed can be applied to the historical games
+in minutes, without network access. Each archived response is read on its own
+from its segment when it is requested, so memory use does not grow with the
+size of the archive.
+
+A request is answered with the latest archived response to an identical
+request, so the games the initial build added are rebuilt as of the last time
+its requests were made. Games added to the table after them, by the daily
+updates, are not in the initial build's requests; each player's rows dated
+after the last game rebuilt for the player are kept as they were, with the
+player's recent form state, rather than lost. Stat corrections made by
+refresh_stats.py to rebuilt games are not in the archive either, and can be
+made again by running it for each rebuilt season. Requests that were never
+made, for instance because the archive was started after the initial
+database was built, raise a KeyError. Other tables, such as the predictions,
+are left as they are.
+
+Example:
+    python rebuild_db.py --archive archive
+"""
+
+from app import db
+from app.models import Game, GameFact
+from develop import responseArchive as rA
+from develop import apiMetrics as aM
+from develop import updateFunctions as uf
+import create_initial_db
+import os
+import argparse
+import logging
+
+
+def rebuild_db(directory=rA.ARCHIVE_DIR, players=create_initial_db.PLAYERS):
+    """Recreates the games table from archived API responses.
+
+    Args:
+        directory (str): directory of the archive
+        players (list): players the initial build added games for
+
+    Returns:
+        kept (dict): dictionary keyed by player with the number of the
+            player's games newer than the rebuilt ones that were kept
+    """
+    rA.archive.directory = directory
+    rA.archive.offline = True
+    rA.archive.load_index()
+    logging.info('Rebuilding games table from %d archived responses.',
+                 len(rA.archive.index))
+    tables = [Game.__table__, GameFact.__table__]
+    rows = {table.name: [] for table in tables}
+    for table in tables:
+        if db.inspect(db.engine).has_table(table.name):
+            with db.engine.connect() as connection:
+                rows[table.name] = [dict(row) for row in connection.execute(
+                        table.select()).mappings()]
+    form_states = {}
+    for player in players:
+        if os.path.exists(uf.form_state_path(player)):
+            with open(uf.form_state_path(player)) as f:
+                form_states[player] = f.read()
+    for table in tables:
+        table.drop(db.engine, checkfirst=True)
+        table.create(db.engine)
+    create_initial_db.add_historical_games(players=players)
+    return keep_newer_rows(tables, rows, form_states)
+
+
+def keep_newer_rows(tables, rows, form_states):
+    """Adds back the rows of each player dated after the rebuilt games.
+
+    Args:
+        tables (list): tables the rows were read from
+        rows (dict): dictionary keyed by table name of the rows the tables
+            held before they were rebuilt, as dictionaries
+        form_states (dict): dictionary keyed by player of the contents of
+            the player's recent form state file before the rebuild
+
+    Returns:
+        kept (dict): dictionary keyed by player with the number of the
+            player's games kept
+    """
+    last_dates = dict(db.session.query(Game.player, db.func.max(Game.date))
+                      .group_by(Game.player).all())
+    kept = {}
+    with db.engine.begin() as connection:
+        for table in tables:
+            newer = [{column: value for column, value in row.items()
+                      if column != 'id'} for row in rows[table.name]
+                     if last_dates.get(row['player']) is None or
+                     row['date'] > last_dates[row['player']]]
+            if newer:
+                connection.execute(table.insert(), newer)
+            if table is Game.__table__:
+                for row in newer:
+                    kept[row['player']] = kept.get(row['player'], 0) + 1
+    for player, n_games in kept.items():
+        logging.warning('Kept %d games of %s newer than the archived '
+                        'initial build.', n_games, player)
+        # the rebuild saved the form state as of the last rebuilt game
+        if player in form_states:
+            with open(uf.form_state_path(player), 'w') as f:
+                f.write(form_states[player])
+    return kept
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+            description='Rebuild the games table from archived API '
+            'responses.')
+    parser.add_argument('--archive', default=rA.ARCHIVE_DIR,
+                        help='directory of the archive')
+    args = parser.parse_args()
+    logging.basicConfig(filename="logs/rebuild_db.log", level=logging.DEBUG)
+    try:
+        for player, n_games in rebuild_db(args.archive).items():
+            print('{}: {} games newer than the archive kept'.format(
+                    player, n_games))
+    finally:
+        aM.registry.dump()
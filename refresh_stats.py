@@ -0,0 +1,63 @@
+"""Picks up corrections to the stats of games already in the games table.
+
+The daily update checks the current season for corrected stats on every run.
+This module runs the same check on demand, for any seasons and players, for
+instance after the API announces corrections to an earlier season. Only the
+games whose stats changed, and the features of the games after them in the
+same season, are rewritten.
+
+Example:
+    python refresh_stats.py --season 2016-2017-regular --player lebron-james
+"""
+
+from app import app, db
+from develop import refreshFunctions as rF
+from develop import dataPullProcessFunctions as dppf
+from develop import apiMetrics as aM
+from datetime import datetime
+import update_db
+import argparse
+import logging
+
+
+def refresh_stats(seasons, players):
+    """Rewrites the games whose stats were corrected in the given seasons.
+
+    Args:
+        seasons (list): seasons to check, like ['2017-2018-regular']
+        players (list): players whose games to check, like ['lebron-james']
+
+    Returns:
+        corrected (dict): dictionary keyed by (season, player) whose values
+            are the dates of the games corrected
+    """
+    today = datetime.now().date()
+    corrected = {}
+    for season in seasons:
+        for player in players:
+            corrected[(season, player)] = rF.refresh_season(season, db, today,
+                                                            player)
+    return corrected
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+            description='Rewrite games whose stats have been corrected.')
+    parser.add_argument('--season', action='append',
+                        help='season to check, may be repeated. Defaults to '
+                        'the current season.')
+    parser.add_argument('--player', action='append',
+                        help='player to check, may be repeated. Defaults to '
+                        'LeBron James.')
+    args = parser.parse_args()
+    logging.basicConfig(filename="logs/refresh_stats.log",
+                        level=logging.DEBUG)
+    try:
+        with app.app_context():
+            for (season, player), dates in refresh_stats(
+                    args.season or [update_db.SEASON],
+                    args.player or [dppf.PLAYER]).items():
+                print('{} {}: {} games corrected'.format(season, player,
+                                                         len(dates)))
+    finally:
+        aM.registry.dump()
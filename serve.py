@@ -0,0 +1,197 @@
+"""Runs the web app with several pre-forked worker processes.
+
+lbjapp.py on its own runs Flask's single-threaded development server. This
+module binds the listening socket once, loads the what-if grid (memory-mapped)
+and then forks a number of worker processes that all accept connections on
+that socket, so the read-only data is shared between them rather than copied
+into each one.
+
+The server writes its process id to a file. Sending it SIGHUP, as the daily
+update does after publishing new files, starts a new set of workers from
+freshly loaded data and then lets the old workers finish the request they are
+handling before they exit. SIGTERM or SIGINT stops the server.
+"""
+
+from werkzeug.serving import make_server
+from app import cache
+import lbjapp
+import argparse
+import os
+import signal
+import socket
+import time
+import logging
+
+
+# signals received by the master process, acted upon in its main loop
+master_signals = {'reload': False, 'stop': False}
+# set in a worker when it has been asked to exit
+worker_stopping = {'stop': False}
+
+
+def preload_shared_state():
+    """Function to load read-only data in the master before forking workers.
+
+    Args:
+        None
+
+    Returns:
+        None
+    """
+    if lbjapp.whatif_grid() is None:
+        logging.warning('No what-if grid to preload.')
+
+
+def run_worker(sock, host, port):
+    """Function run by each worker process to serve requests until stopped.
+
+    The worker handles one request at a time and checks between requests
+    whether it has been asked to stop, so a request it has started is always
+    completed.
+
+    Args:
+        sock (socket.socket): listening socket bound by the master
+        host (str): address the socket is bound to
+        port (int): port the socket is bound to
+
+    Returns:
+        None
+    """
+    signal.signal(signal.SIGHUP, signal.SIG_IGN)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM,
+                  lambda signum, frame: worker_stopping.update(stop=True))
+    server = make_server(host, port, lbjapp.app, fd=sock.fileno())
+    server.timeout = 1
+    while not worker_stopping['stop']:
+        server.handle_request()
+    os._exit(0)
+
+
+def spawn_workers(sock, host, port, count):
+    """Function to fork worker processes.
+
+    Args:
+        sock (socket.socket): listening socket bound by the master
+        host (str): address the socket is bound to
+        port (int): port the socket is bound to
+        count (int): number of workers to fork
+
+    Returns:
+        pids (set): process ids of the new workers
+    """
+    pids = set()
+    for i in range(count):
+        pid = os.fork()
+        if pid == 0:
+            run_worker(sock, host, port)
+        pids.add(pid)
+    return pids
+
+
+def stop_workers(pids):
+    """Function to ask worker processes to exit once their request is done.
+
+    Args:
+        pids (set): process ids of the workers to stop
+
+    Returns:
+        None
+    """
+    for pid in pids:
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except OSError:
+            pass
+
+
+def reap_workers():
+    """Function to collect the exit status of workers that have exited.
+
+    Args:
+        None
+
+    Returns:
+        exited (set): process ids of workers that have exited
+    """
+    exited = set()
+    while True:
+        try:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            break
+        if pid == 0:
+            break
+        exited.add(pid)
+    return exited
+
+
+def serve(host, port, workers, pid_path=cache.SERVER_PID_PATH):
+    """Function to run the pre-forking server until it is stopped.
+
+    Args:
+        host (str): address to listen on
+        port (int): port to listen on
+        workers (int): number of worker processes
+        pid_path (str): file to write the master's process id to
+
+    Returns:
+        None
+    """
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(128)
+    # workers that lose the race for a connection return to waiting instead
+    # of blocking in accept
+    sock.setblocking(False)
+    with open(pid_path, 'w') as f:
+        f.write(str(os.getpid()))
+    signal.signal(signal.SIGHUP,
+                  lambda signum, frame: master_signals.update(reload=True))
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum,
+                      lambda signum, frame: master_signals.update(stop=True))
+    preload_shared_state()
+    current = spawn_workers(sock, host, port, workers)
+    retiring = set()
+    logging.info('Serving on %s:%d with %d workers.', host, port, workers)
+    while not master_signals['stop']:
+        time.sleep(0.5)
+        exited = reap_workers()
+        retiring -= exited
+        if exited & current:
+            current -= exited
+            logging.warning('%d workers exited, replacing them.',
+                            len(exited))
+            current |= spawn_workers(sock, host, port, workers - len(current))
+        if master_signals['reload']:
+            master_signals['reload'] = False
+            logging.info('Reloading workers.')
+            preload_shared_state()
+            retiring |= current
+            current = spawn_workers(sock, host, port, workers)
+            stop_workers(retiring)
+    stop_workers(current | retiring)
+    for pid in current | retiring:
+        try:
+            os.waitpid(pid, 0)
+        except ChildProcessError:
+            pass
+    os.remove(pid_path)
+    sock.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+            description='Run the web app with pre-forked workers.')
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--static', action='store_true',
+                        help='serve the snapshot published by the daily '
+                        'update instead of querying the database')
+    args = parser.parse_args()
+    logging.basicConfig(filename="logs/server.log", level=logging.INFO)
+    lbjapp.app.config['SERVE_SNAPSHOT'] = args.static
+    serve(args.host, args.port, args.workers)
@@ -0,0 +1,64 @@
+import pytest
+import sys
+sys.path.append("../")
+from app import app, db
+from app.models import Game, Predictions
+from datetime import datetime
+import sqlalchemy
+
+
+@pytest.fixture
+def app_db(tmpdir, monkeypatch):
+    """Points the app at an empty SQLite database for the length of a test.
+
+    Yields the app's database, with its tables created, inside an app context.
+    """
+    engine = sqlalchemy.create_engine('sqlite:///' + str(tmpdir.join(
+            'app.db')))
+    with app.app_context():
+        monkeypatch.setitem(db.engines, None, engine)
+        db.create_all()
+        yield db
+        db.session.remove()
+    engine.dispose()
+
+
+def make_game(game_date, season='2017-2018-regular', player='lebron-james',
+              opponent='BOS'):
+    """Makes a row of the games table with every feature set to 0."""
+    features = {column.name: 0 for column in Game.__table__.columns
+                if not column.nullable and column.name not in
+                ['id', 'date', 'season', 'player', 'team', 'opponent',
+                 'home_away', 'version']}
+    return Game(date=game_date, season=season, player=player,
+                opponent=opponent, home_away='home', **features)
+
+
+def make_prediction(game_date, predict_date=None):
+    """Makes a row of the predictions table for a game."""
+    return Predictions(game_date=game_date,
+                       predict_date=predict_date or game_date,
+                       predicted_pts=25.0, predicted_rbs=7.0,
+                       predicted_ast=7.0)
+
+
+def walk_pages(client, url, filters, limit):
+    """Requests every page of a paginated endpoint, following its cursors.
+
+    Returns the column names and the rows of all the pages, in order.
+    """
+    rows = []
+    cursor = None
+    while True:
+        query = dict(filters, limit=limit)
+        if cursor is not None:
+            query['cursor'] = cursor
+        response = client.get(url, query_string=query)
+        assert response.status_code == 200
+        page = response.get_json()
+        assert len(page['rows']) <= limit
+        rows.extend(page['rows'])
+        cursor = page['next']
+        if cursor is None:
+            return page['columns'], rows
+        assert len(page['rows']) == limit
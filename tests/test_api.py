@@ -0,0 +1,112 @@
+import sys
+sys.path.append("../")
+from app import app, api
+from app.models import Predictions
+from datetime import datetime
+from types import SimpleNamespace
+from conftest import make_game, make_prediction, walk_pages
+import sqlalchemy
+import lbjapp  # noqa: F401 (registers the app's routes)
+
+
+def test_cursor_round_trip():
+    """Tests that a cursor decodes to the date and id of its row."""
+    row = SimpleNamespace(id=152, predict_date=datetime(2018, 3, 10))
+    cursor = api.encode_cursor(row, Predictions.predict_date)
+    assert cursor == '2018-03-10T00:00:00_152'
+    assert api.decode_cursor(cursor) == (datetime(2018, 3, 10), 152)
+
+
+def test_page_size():
+    """Tests that requested page sizes are kept within limits."""
+    assert api.page_size(None) == api.DEFAULT_PAGE_SIZE
+    assert api.page_size('0') == 1
+    assert api.page_size('100000') == api.MAX_PAGE_SIZE
+
+
+def test_predictions_with_several_players(app_db):
+    """Tests that filtered predictions are paged completely when the games
+    table holds several players' games on the same dates."""
+    dates = [datetime(2018, 1, day) for day in range(1, 8)]
+    for game_date in dates:
+        app_db.session.add(make_prediction(game_date))
+        for player in ['lebron-james', 'kevin-love']:
+            app_db.session.add(make_game(game_date, player=player))
+    app_db.session.commit()
+    client = app.test_client()
+    _, rows = walk_pages(client, '/api/predictions',
+                         {'season': '2017-2018-regular'}, 3)
+    assert [row[1] for row in rows] == [game_date.isoformat() for game_date
+                                        in reversed(dates)]
+
+
+def test_paging(app_db):
+    """Tests that walking the pages of the games and predictions, with and
+    without filters, returns every row once, newest first."""
+    games = []
+    predictions = []
+    for day in range(1, 11):
+        game_date = datetime(2018, 1, day)
+        season = '2016-2017-regular' if day <= 4 else '2017-2018-regular'
+        opponent = ['BOS', 'CHI', 'TOR'][day % 3]
+        for player in ['lebron-james', 'kevin-love']:
+            games.append(make_game(game_date, season, player, opponent))
+        # predictions made on the same day share a predict_date
+        predictions.append(make_prediction(game_date,
+                                           datetime(2018, 1, day // 2)
+                                           if day > 1 else game_date))
+    app_db.session.add_all(games + predictions)
+    app_db.session.commit()
+    client = app.test_client()
+    for filters in [{}, {'season': '2017-2018-regular'},
+                    {'opponent': 'BOS'},
+                    {'season': '2017-2018-regular', 'opponent': 'CHI'}]:
+        expected = sorted([game for game in games if all(
+                getattr(game, key) == value for key, value in
+                filters.items())], key=lambda game: (game.date, game.id),
+                reverse=True)
+        for limit in [1, 3, 50]:
+            columns, rows = walk_pages(client, '/api/games', filters, limit)
+            assert [row[columns.index('id')] for row in rows] == [
+                    game.id for game in expected]
+        predicted = {game.date for game in expected
+                     if game.player == 'lebron-james'}
+        expected = sorted([prediction for prediction in predictions
+                           if prediction.game_date in predicted],
+                          key=lambda prediction: (prediction.predict_date,
+                                                  prediction.id),
+                          reverse=True)
+        for limit in [1, 3, 50]:
+            columns, rows = walk_pages(client, '/api/predictions', filters,
+                                       limit)
+            assert [row[columns.index('id')] for row in rows] == [
+                    prediction.id for prediction in expected]
+
+
+def test_bad_cursor(app_db):
+    """Tests that a malformed cursor is rejected."""
+    response = app.test_client().get('/api/games?cursor=yesterday')
+    assert response.status_code == 400
+
+
+def test_pages_use_indexes(app_db):
+    """Tests that the pages of games, with or without filters, are read in
+    order from an index instead of being sorted, and that filtered pages
+    only read the rows that match."""
+    statements = []
+    sqlalchemy.event.listen(app_db.engine, 'before_cursor_execute',
+                            lambda connection, cursor, statement, parameters,
+                            *args: statements.append((statement, parameters)))
+    client = app.test_client()
+    for filters in [{}, {'season': '2017-2018-regular'}, {'opponent': 'BOS'}]:
+        for cursor in [None, '2018-01-05T00:00:00_3']:
+            query = dict(filters, cursor=cursor) if cursor else filters
+            assert client.get('/api/games', query_string=query).status_code \
+                == 200
+            statement, parameters = statements[-1]
+            with app_db.engine.connect() as connection:
+                plan = ' '.join(row[-1] for row in connection.exec_driver_sql(
+                        'EXPLAIN QUERY PLAN ' + statement, parameters))
+            assert 'USING INDEX' in plan
+            assert plan.startswith('SEARCH' if filters else 'SCAN')
+            assert 'TEMP B-TREE' not in plan
@@ -0,0 +1,29 @@
+import sys
+sys.path.append("../")
+from develop import apiMetrics as aM
+import json
+
+
+def test_metrics_registry(tmpdir):
+    """Tests recording calls, quota windows and dumping the registry."""
+    registry = aM.metrics_registry()
+    registry.record_call('player_gamelogs', 0.3, 1000, now=600)
+    registry.record_call('player_gamelogs', 20, 500, now=650)
+    registry.record_sleep('player_gamelogs', 3)
+    registry.record_cache_hit('game_boxscore')
+    metrics = registry.endpoints['player_gamelogs']
+    assert metrics['calls'] == 2
+    assert metrics['bytes'] == 1500
+    assert metrics['latency_buckets'][2] == 1
+    assert metrics['latency_buckets'][-1] == 1
+    assert registry.remaining_quota(now=899) == aM.QUOTA_REQUESTS - 2
+    assert registry.remaining_quota(now=900) == aM.QUOTA_REQUESTS
+    json_path = str(tmpdir.join('metrics.json'))
+    prom_path = str(tmpdir.join('metrics.prom'))
+    registry.dump(json_path, prom_path)
+    with open(json_path) as f:
+        assert json.load(f)['endpoints']['game_boxscore']['cache_hits'] == 1
+    with open(prom_path) as f:
+        text = f.read()
+    assert ('msf_api_latency_seconds_bucket{endpoint="player_gamelogs",'
+            'le="+Inf"} 2') in text
@@ -0,0 +1,75 @@
+import sys
+sys.path.append("../")
+from app import backend
+from app.models import Game, GameFact
+from conftest import make_game
+from datetime import datetime
+from sqlalchemy.orm import Session
+import sqlalchemy
+import transfer_db
+
+
+def test_local_sqlite(tmpdir):
+    """Tests local settings, WAL mode and reading a table into a DataFrame."""
+    path = str(tmpdir.join('local.db'))
+    settings = backend.local_settings(path)
+    engine = sqlalchemy.create_engine(settings['SQLALCHEMY_DATABASE_URI'])
+    with engine.connect() as connection:
+        assert connection.exec_driver_sql(
+                'PRAGMA journal_mode').scalar() == 'wal'
+        connection.exec_driver_sql('create table game (date datetime, pts '
+                                   'integer)')
+        connection.exec_driver_sql("insert into game values "
+                                   "('2018-01-02 00:00:00.000000', 30)")
+        connection.commit()
+    data = backend.read_frame('select * from game', engine)
+    assert data.date[0] == datetime(2018, 1, 2)
+    assert data.pts[0] == 30
+
+
+def test_transfer(tmpdir):
+    """Tests copying tables between databases, replacing the target's rows."""
+    source_uri = 'sqlite:///' + str(tmpdir.join('source.db'))
+    target_uri = 'sqlite:///' + str(tmpdir.join('target.db'))
+    source = sqlalchemy.create_engine(source_uri)
+    GameFact.__table__.create(source)
+    with source.begin() as connection:
+        connection.execute(GameFact.__table__.insert(), [
+                {'date': datetime(2018, 1, day), 'season': '2017-2018-regular',
+                 'player': 'lebron-james', 'team': 'CLE', 'opponent': 'BOS',
+                 'home_away': 'home', 'pts': day} for day in range(1, 8)])
+    copied = transfer_db.transfer(source_uri, target_uri, batch_rows=3)
+    assert copied == {'game_fact': 7}
+    assert transfer_db.transfer(source_uri, target_uri) == copied
+    target = sqlalchemy.create_engine(target_uri)
+    with target.connect() as connection:
+        assert connection.execute(sqlalchemy.select(
+                sqlalchemy.func.sum(GameFact.pts))).scalar() == 28
+        assert connection.execute(sqlalchemy.select(
+                sqlalchemy.func.count()).select_from(
+                Game.__table__)).scalar() == 0
+        assert connection.exec_driver_sql(
+                'select count(*) from game_features').scalar() == 7
+
+
+def test_transfer_without_version(tmpdir):
+    """Tests copying games from a database created before games had a
+    version, which then start at version 1."""
+    source_uri = 'sqlite:///' + str(tmpdir.join('source.db'))
+    target_uri = 'sqlite:///' + str(tmpdir.join('target.db'))
+    source = sqlalchemy.create_engine(source_uri)
+    Game.__table__.create(source)
+    with Session(source) as session:
+        session.add_all([make_game(datetime(2018, 1, day))
+                         for day in range(1, 4)])
+        session.commit()
+    with source.begin() as connection:
+        connection.exec_driver_sql('alter table game drop column version')
+    assert transfer_db.transfer(source_uri, target_uri)['game'] == 3
+    target = sqlalchemy.create_engine(target_uri)
+    with Session(target) as session:
+        games = session.query(Game).order_by(Game.date).all()
+        assert [game.version for game in games] == [1, 1, 1]
+        games[0].pts = 30
+        session.commit()
+        assert games[0].version == 2
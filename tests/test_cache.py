@@ -0,0 +1,52 @@
+import sys
+sys.path.append("../")
+from app import app, cache
+from conftest import make_game, make_prediction
+from datetime import datetime, timezone
+import lbjapp
+import os
+import sqlalchemy
+
+
+def test_render_stamp(tmpdir):
+    """Tests that invalidating the render cache changes its stamp."""
+    path = str(tmpdir.join('render_stamp'))
+    assert cache.render_stamp(path) is None
+    cache.invalidate_render_cache(path)
+    assert cache.render_stamp(path) is not None
+
+
+def test_index_revalidation(app_db, tmpdir, monkeypatch):
+    """Tests that the index page is sent with an ETag, answered with 304 when
+    unchanged, and only queried from the database after an update."""
+    monkeypatch.chdir(tmpdir)
+    monkeypatch.setattr(lbjapp, 'index_cache', dict(lbjapp.index_cache,
+                                                    stamp=None, key=None))
+    app_db.session.add_all([make_game(datetime(2018, 1, 2)),
+                            make_prediction(datetime(2018, 1, 2))])
+    app_db.session.commit()
+    cache.invalidate_render_cache()
+    os.utime('render_stamp', (1500000000, 1500000000))
+    queries = []
+    sqlalchemy.event.listen(app_db.engine, 'before_cursor_execute',
+                            lambda *args: queries.append(args[2]))
+    client = app.test_client()
+    response = client.get('/')
+    assert response.status_code == 200
+    etag = response.headers['ETag']
+    assert response.last_modified == datetime.fromtimestamp(1500000000,
+                                                            timezone.utc)
+    n_queries = len(queries)
+    assert n_queries > 0
+    response = client.get('/', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    response = client.get('/', headers={
+            'If-Modified-Since': 'Fri, 14 Jul 2017 02:40:00 GMT'})
+    assert response.status_code == 304
+    assert len(queries) == n_queries
+    # an update that did not change the page queries the database again but
+    # keeps the ETag
+    os.utime('render_stamp', (1500000100, 1500000100))
+    response = client.get('/', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert len(queries) > n_queries
@@ -2,6 +2,7 @@ import pytest
 import sys
 sys.path.append("../")
 from develop import dataPullProcessFunctions as dppf
+from develop import gameRecord as gR
 from datetime import datetime
 
 
@@ -35,3 +36,33 @@ def test_extract_lbj_stats():
                                                 'FtMade': 9,
                                                 'PlusMinus': 10,
                                                 'MinutesPlayed': 10}
+
+
+def test_gamelogs_by_player():
+    """Tests splitting the game logs of a batched call by player."""
+    testjson = {'playergamelogs': {'gamelogs': [
+            {'player': {'FirstName': 'LeBron', 'LastName': 'James'}, 'n': 1},
+            {'player': {'FirstName': 'Kevin', 'LastName': 'Love'}, 'n': 2},
+            {'player': {'FirstName': 'LeBron', 'LastName': 'James'}, 'n': 3},
+            {'player': {'FirstName': 'J.R.', 'LastName': 'Smith'}, 'n': 4}]}}
+    gamelogs = dppf.gamelogs_by_player(testjson, ['lebron-james', 'kevin-love',
+                                                  'jr-smith'])
+    assert [log['n'] for log in gamelogs['lebron-james']] == [1, 3]
+    assert [log['n'] for log in gamelogs['kevin-love']] == [2]
+    assert [log['n'] for log in gamelogs['jr-smith']] == [4]
+
+
+def test_game_logs_matched_by_date():
+    """Tests that game logs are matched to games by date, and that a game
+    with no game log is recorded as a DNP."""
+    season_schedule = dppf.schedule.__new__(dppf.schedule)
+    season_schedule.player = 'lebron-james'
+    season_schedule.games = [gR.game_record(date=datetime(2018, 1, day).date())
+                             for day in [2, 4, 6]]
+    played = dict(dppf.DNP_STATS, Pts=30, MinutesPlayed=36)
+    # the log of an unscheduled game is ignored
+    season_schedule.gamelog_stats = {datetime(2018, 1, 3).date(): played,
+                                     datetime(2018, 1, 6).date(): played}
+    season_schedule.find_lebron_stats_all_games()
+    assert [game.lbj_pts for game in season_schedule.games] == [0, 0, 30]
+    assert [game.DNP for game in season_schedule.games] == [True, True, False]
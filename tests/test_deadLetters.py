@@ -0,0 +1,29 @@
+import sys
+sys.path.append("../")
+from develop import deadLetters as dL
+
+
+def test_add_and_drain(tmpdir):
+    """Tests queueing failed requests once and keeping those failing again."""
+    queue = dL.dead_letter_queue(str(tmpdir.join('dead_letters.jsonl')))
+    assert queue.entries() == []
+    affects = {'kind': 'team_record', 'season': '2017-2018-regular',
+               'team': 'CLE', 'date': '2017-10-24'}
+    assert queue.add('scoreboard', 'https://a/scoreboard.json',
+                     {'team': ['CLE']}, 'HTTP status 500', affects)
+    assert not queue.add('scoreboard', 'https://a/scoreboard.json',
+                         {'team': ['CLE']}, 'timed out', affects)
+    assert queue.add('game_boxscore', 'https://a/game_boxscore.json', {},
+                     'HTTP status 502', {'kind': 'opponent_stats'})
+    assert len(queue.entries()) == 2
+
+    def retry(entry):
+        if entry['endpoint'] == 'scoreboard':
+            raise ValueError('still failing')
+
+    resolved, remaining = queue.drain(retry)
+    assert [entry['endpoint'] for entry in resolved] == ['game_boxscore']
+    assert [entry['endpoint'] for entry in remaining] == ['scoreboard']
+    assert queue.entries() == remaining
+    assert remaining[0]['attempts'] == 2
+    assert remaining[0]['error'] == 'still failing'
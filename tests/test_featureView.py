@@ -0,0 +1,64 @@
+import pytest
+import sys
+sys.path.append("../")
+from develop import featureView as fV
+from develop import refreshFunctions as rF
+from app import app
+from app.models import GameFact
+from conftest import make_game
+from datetime import datetime
+import sqlalchemy
+
+
+def game_stats(scale, minutes=30):
+    """Makes stats for a game as returned by extract_lbj_stats."""
+    return {'Pts': 10 * scale, 'Rbs': scale, 'Ast': 2 * scale,
+            '2ptAtt': 4 * scale, '2ptMade': 2 * scale, '3ptAtt': 2 * scale,
+            '3ptMade': scale, 'FtAtt': 5 * scale, 'FtMade': 4 * scale,
+            'PlusMinus': scale, 'MinutesPlayed': minutes}
+
+
+def test_feature_select():
+    """Tests features derived in SQL against those computed in Python."""
+    engine = sqlalchemy.create_engine('sqlite://')
+    GameFact.__table__.create(engine)
+    season_stats = [game_stats(1), game_stats(2, 0), None, game_stats(3),
+                    None]
+    dates = [datetime(2017, 10, day) for day in [17, 18, 21, 25, 26]]
+    with engine.begin() as connection:
+        for game_date, stats, won in zip(dates, season_stats,
+                                         [True, False, None, True, None]):
+            facts = fV.stats_facts(stats) if stats else {}
+            connection.execute(GameFact.__table__.insert().values(
+                    date=game_date, season='2017-2018-regular',
+                    player='lebron-james', team='CLE', opponent='BOS',
+                    home_away='home', team_won=won, **facts))
+        features = connection.execute(
+                fV.feature_select('2017-2018-regular').order_by(
+                        'date')).mappings().all()
+    assert [row['lbj_days_rest'] for row in features] == [0, 0, 2, 3, 0]
+    assert [row['cavsWins'] for row in features] == [0, 1, 1, 1, 2]
+    assert [row['cavsLosses'] for row in features] == [0, 0, 1, 1, 1]
+    for row, expected in zip(features, rF.season_features(season_stats)):
+        for column, value in expected.items():
+            assert row[column] == pytest.approx(value)
+
+
+@pytest.mark.parametrize('feature_source', ['python', 'view'])
+def test_feature_source(app_db, monkeypatch, feature_source):
+    """Tests that facts are only written, and features derived from them,
+    when features come from the view."""
+    monkeypatch.setitem(app.config, 'FEATURE_SOURCE', feature_source)
+    games = [make_game(datetime(2017, 10, 17)),
+             make_game(datetime(2017, 10, 20))]
+    app_db.session.add_all(games)
+    for game in games:
+        fV.save_facts(app_db, game, team_won=True, **fV.stats_facts(
+                game_stats(1)))
+    app_db.session.commit()
+    fV.refresh_features(app_db, '2017-2018-regular', 'lebron-james')
+    app_db.session.expire_all()
+    derived = feature_source == 'view'
+    assert GameFact.query.count() == (2 if derived else 0)
+    assert [game.lbj_days_rest for game in games] == [0, 2 if derived else 0]
+    assert [game.cavsWins for game in games] == [0, 1 if derived else 0]
@@ -0,0 +1,35 @@
+import numpy as np
+import sys
+sys.path.append("../")
+from develop import formFunctions as fF
+from datetime import datetime, timedelta
+
+
+def test_update_form_state():
+    """Tests rolling and weighted averages once the ring buffer wraps."""
+    state = fF.new_form_state('2017-2018-regular', window=2, alpha=0.5)
+    for pts in [10, 20, 30]:
+        fF.update_form_state(state, [pts, 0, 0, 1, 2],
+                             datetime(2018, 1, pts).date())
+    features = fF.form_features(state)
+    assert features['lbj_pts_lastn'] == 25
+    assert features['lbj_pts_ewma'] == 22.5
+    assert features['lbj_fg_pct_lastn'] == 0.5
+    assert state['last_game_date'] == '2018-01-30'
+
+
+def test_season_form_features_match_daily_updates():
+    """Tests that the season backfill agrees with game-by-game updates."""
+    rng = np.random.RandomState(0)
+    stats = rng.randint(0, 30, size=(20, 5))
+    played = rng.rand(20) > 0.2
+    features = fF.season_form_features(stats, played)
+    state = fF.new_form_state('2017-2018-regular')
+    start = datetime(2017, 10, 17).date()
+    for i in range(20):
+        expected = fF.form_features(state)
+        assert np.allclose(features[i], [expected[column] for column in
+                                         fF.FORM_COLUMNS])
+        if played[i]:
+            fF.update_form_state(state, stats[i].tolist(),
+                                 start + timedelta(days=i))
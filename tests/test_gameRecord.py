@@ -0,0 +1,26 @@
+import sys
+sys.path.append("../")
+from develop import gameRecord as gR
+from datetime import date
+
+
+def test_game_record():
+    """Tests item access, Game columns and DataFrames of game records."""
+    record = gR.game_record(date=date(2018, 3, 10), opponent='BOS')
+    record['home/away'] = 'home'
+    assert record.home_away == 'home'
+    assert 'home/away' in record
+    assert 'DNP' not in record
+    record.update({field: 1 for field in gR.FIELDS[3:]})
+    record.DNP = False
+    columns = record.game_columns()
+    assert columns['home_away'] == 'home'
+    assert columns['oppWins'] == 1
+    assert columns['lbj_DNP'] is False
+    assert 'lbj_inactive' not in columns
+    record.DNP = None
+    assert record.game_columns()['lbj_inactive'] is True
+    df = gR.records_to_dataframe([record, gR.game_record()])
+    assert list(df.columns) == gR.FIELDS
+    assert df.loc[0, 'opponent'] == 'BOS'
+    assert df.shape == (2, len(gR.FIELDS))
@@ -0,0 +1,55 @@
+import sys
+sys.path.append("../")
+from develop import horizonFunctions as hF
+from develop import leagueEfficiency as lE
+from datetime import datetime
+from types import SimpleNamespace
+
+
+def test_current_opponent_efficiencies():
+    """Tests that each team's ratings are those before today, and teams
+    that have not played are left out."""
+    box_scores = [{'date': datetime(2018, 1, 1).date(), 'home': 'BOS',
+                   'away': 'CHI', 'home_stats': [80, 0, 10, 20, 90],
+                   'away_stats': [90, 0, 10, 20, 110]},
+                  {'date': datetime(2018, 1, 3).date(), 'home': 'BOS',
+                   'away': 'CHI', 'home_stats': [90, 10, 10, 10, 120],
+                   'away_stats': [90, 10, 10, 10, 80]}]
+    matrix = lE.efficiency_matrix(box_scores, teams=['BOS', 'CHI', 'MIA'])
+    assert hF.current_opponent_efficiencies(
+            matrix, datetime(2018, 1, 2).date()) == {'BOS': (110.0, 100.0),
+                                                     'CHI': (100.0, 110.0)}
+
+
+def test_build_horizon_predictors():
+    """Tests projected predictors for games after the upcoming one."""
+    upcoming = SimpleNamespace(home_away='home', lbj_days_rest=2,
+                               lbj_2pt_pct=0.5, opp_def_eff=100,
+                               opp_off_eff=101)
+    remaining = [{'date': datetime(2018, 3, 10).date(), 'opponent': 'BOS',
+                  'home/away': 'home'},
+                 {'date': datetime(2018, 3, 11).date(), 'opponent': 'CHI',
+                  'home/away': 'away'},
+                 {'date': datetime(2018, 3, 14).date(), 'opponent': 'MIA',
+                  'home/away': 'home'}]
+    columns = ['home_away', 'lbj_days_rest', 'lbj_2pt_pct', 'opp_def_eff',
+               'opp_off_eff']
+    predictors = hF.build_horizon_predictors(
+            upcoming, remaining, {'BOS': (90, 91), 'CHI': (110, 111)},
+            columns)
+    assert predictors.tolist() == [[1, 2, 0.5, 100, 101],
+                                   [0, 0, 0.5, 110, 111],
+                                   [1, 2, 0.5, 100, 101]]
+
+
+def test_build_horizon_predictors_no_ratings():
+    """Tests that without any ratings every game gets the upcoming game's."""
+    upcoming = SimpleNamespace(home_away='away', lbj_days_rest=1,
+                               opp_def_eff=100, opp_off_eff=101)
+    remaining = [{'date': datetime(2018, 3, 10).date(), 'opponent': 'BOS',
+                  'home/away': 'away'},
+                 {'date': datetime(2018, 3, 12).date(), 'opponent': 'CHI',
+                  'home/away': 'away'}]
+    columns = ['opp_def_eff', 'opp_off_eff']
+    predictors = hF.build_horizon_predictors(upcoming, remaining, {}, columns)
+    assert predictors.tolist() == [[100, 101], [100, 101]]
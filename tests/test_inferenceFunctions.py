@@ -0,0 +1,37 @@
+import numpy as np
+import sys
+sys.path.append("../")
+from develop import inferenceFunctions as iF
+
+
+def test_predict_rows():
+    """Tests function that scores rows of predictors with coefficients."""
+    coefficients = {'columns': ['a', 'b'],
+                    'coef': np.array([[1., 2.], [0., 1.], [3., 0.]]),
+                    'intercept': np.array([1., 2., 3.])}
+    predictions = iF.predict_rows(coefficients, np.array([[1., 1.],
+                                                          [2., 0.]]))
+    assert predictions.tolist() == [[4., 3., 6.], [3., 2., 9.]]
+
+
+def test_coefficients_round_trip(tmpdir):
+    """Tests that saved coefficients load back unchanged."""
+    path = str(tmpdir.join('coefficients.npz'))
+    iF.save_coefficients(['home_away', 'lbj_days_rest'],
+                         [[1, 2], [3, 4], [5, 6]], [7, 8, 9], path)
+    coefficients = iF.load_coefficients(path)
+    assert coefficients['columns'] == ['home_away', 'lbj_days_rest']
+    assert coefficients['coef'].tolist() == [[1, 2], [3, 4], [5, 6]]
+    assert coefficients['intercept'].tolist() == [7, 8, 9]
+
+
+def test_predict_intervals():
+    """Tests intervals from bootstrap coefficients and residuals."""
+    coefficients = {'boot_coef': np.zeros((3, 2, 3)),
+                    'boot_residuals': np.array([[-1., 0., 1.],
+                                                [0., 0., 0.],
+                                                [1., 0., -1.]])}
+    coefficients['boot_coef'][:, 0, :] = 10
+    lower, upper = iF.predict_intervals(coefficients, np.array([1.]), 1.0)
+    assert lower.tolist() == [[9., 10., 9.]]
+    assert upper.tolist() == [[11., 10., 11.]]
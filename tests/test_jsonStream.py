@@ -0,0 +1,23 @@
+import sys
+sys.path.append("../")
+from develop import jsonStream as jS
+import json
+
+
+def test_iter_items():
+    """Tests streaming the array at a path against parsing all at once."""
+    document = {'playergamelogs': {
+            'lastUpdatedOn': '2018-03-10 01:02:03',
+            'skipped': [{'gamelogs': [1]}, -1.5e3, None, True],
+            'gamelogs': [{'n': i, 'name': 'Dončić \U0001f3c0', 'v': 12345.25}
+                         for i in range(5)]},
+            'after': [1, 2]}
+    body = json.dumps(document, ensure_ascii=False).encode('utf-8')
+    for size in (1, 3, 64, len(body)):
+        chunks = [body[i:i + size] for i in range(0, len(body), size)]
+        items = list(jS.iter_items(chunks, ['playergamelogs', 'gamelogs']))
+        assert items == document['playergamelogs']['gamelogs']
+    text = json.dumps({'fullgameschedule': {'lastUpdatedOn': 'x'}})
+    assert list(jS.iter_items([text], ['fullgameschedule',
+                                       'gameentry'])) == []
+    assert list(jS.iter_items(['{"a": [ ]}'], ['a'])) == []
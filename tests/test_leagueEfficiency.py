@@ -0,0 +1,69 @@
+import sys
+sys.path.append("../")
+from develop import leagueEfficiency as lE
+from datetime import date, timedelta
+import numpy as np
+
+
+def naive_ratings(box_scores, team, day):
+    """Adds up a team's box scores before a date one game at a time."""
+    totals = {'for': np.zeros(5), 'against': np.zeros(5), 'W': 0, 'L': 0}
+    for box_score in box_scores:
+        if box_score['date'] >= day or team not in (box_score['home'],
+                                                    box_score['away']):
+            continue
+        side, other = (('home', 'away') if box_score['home'] == team else
+                       ('away', 'home'))
+        totals['for'] += box_score[side + '_stats']
+        totals['against'] += box_score[other + '_stats']
+        won = box_score[side + '_stats'][4] > box_score[other + '_stats'][4]
+        totals['W' if won else 'L'] += 1
+
+    def eff(stats):
+        possessions = stats[0] - stats[2] + stats[3] + 0.4 * stats[1]
+        return 100 * stats[4] / possessions if possessions > 0 else 0
+    return {'opp_def_eff': eff(totals['against']),
+            'opp_off_eff': eff(totals['for']),
+            'OPPW': totals['W'], 'OPPL': totals['L']}
+
+
+def test_efficiency_matrix():
+    """Tests the matrix lookups against adding up box scores in a loop."""
+    rng = np.random.RandomState(0)
+    teams = lE.TEAMS[:6]
+    start = date(2017, 10, 17)
+    box_scores = []
+    for _ in range(40):
+        home, away = rng.choice(teams, 2, replace=False)
+        box_scores.append({
+                'date': start + timedelta(days=int(rng.randint(0, 20))),
+                'home': home, 'away': away,
+                'home_stats': list(rng.randint(10, 120, size=5)),
+                'away_stats': list(rng.randint(10, 120, size=5))})
+    matrix = lE.efficiency_matrix(box_scores, teams)
+    assert matrix['off_eff'].shape == (len(matrix['dates']) + 1, len(teams))
+    for team in teams:
+        for days in range(0, 22, 3):
+            day = start + timedelta(days=days)
+            ratings = lE.lookup(matrix, team, day)
+            expected = naive_ratings(box_scores, team, day)
+            assert ratings['OPPW'] == expected['OPPW']
+            assert ratings['OPPL'] == expected['OPPL']
+            assert np.isclose(ratings['opp_off_eff'], expected['opp_off_eff'])
+            assert np.isclose(ratings['opp_def_eff'], expected['opp_def_eff'])
+
+
+def test_team_gamelogs_to_box_scores():
+    """Tests pairing the two team game logs of a game."""
+    def gamelog(team, points):
+        return {'game': {'date': '2017-10-17',
+                         'awayTeam': {'Abbreviation': 'BOS'},
+                         'homeTeam': {'Abbreviation': 'CLE'}},
+                'team': {'Abbreviation': team},
+                'stats': {stat: {'#text': str(points)}
+                          for stat in lE.BOX_SCORE_STATS}}
+    box_scores = lE.team_gamelogs_to_box_scores({'teamgamelogs': {
+            'gamelogs': [gamelog('CLE', 102), gamelog('BOS', 99)]}})
+    assert box_scores == [{'date': date(2017, 10, 17), 'home': 'CLE',
+                           'away': 'BOS', 'home_stats': [102] * 5,
+                           'away_stats': [99] * 5}]
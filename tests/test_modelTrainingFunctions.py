@@ -1,7 +1,10 @@
+import numpy as np
 import pandas as pd
 import sys
 sys.path.append("../")
 from develop import modelTrainingFunctions as mTF
+from conftest import make_game
+from datetime import datetime
 
 
 def test_convert_home_away():
@@ -35,4 +38,45 @@ def test_extract_predictors():
             'opp_def_eff': [1],
             'opp_off_eff': [1]})
     assert len(mTF.extract_predictors(testframe).columns) == 13
-   
\ No newline at end of file
+
+
+def test_extract_predictors_with_form():
+    """Tests that filled in recent form columns are used as predictors."""
+    testframe = pd.DataFrame.from_dict(
+            dict.fromkeys(mTF.PREDICTOR_COLUMNS + ['pts'], [1, 2]))
+    testframe['lbj_pts_lastn'] = [1, 2]
+    testframe['lbj_pts_ewma'] = [1, None]
+    assert len(mTF.extract_predictors(testframe).columns) == 14
+
+
+def test_bootstrap_coefficients():
+    """Tests that every bootstrap fit recovers an exact linear relation."""
+    predictors = np.random.RandomState(1).rand(40, 2)
+    responses = np.column_stack([1 + 2 * predictors[:, 0],
+                                 3 * predictors[:, 1],
+                                 predictors[:, 0] - predictors[:, 1]])
+    boot_coef, boot_residuals = mTF.bootstrap_coefficients(
+            predictors, responses, n_resamples=50)
+    assert boot_coef.shape == (50, 3, 3)
+    assert np.allclose(boot_coef, [[1, 0, 0], [2, 0, 1], [0, 3, -1]])
+    assert np.allclose(boot_residuals, 0)
+
+
+def test_reads_one_player(app_db):
+    """Tests that training and upcoming game data only hold the games of the
+    player predicted for, when the table holds another player's games."""
+    for day in range(1, 5):
+        for player in ['lebron-james', 'kevin-love']:
+            game = make_game(datetime(2018, 1, day), player=player)
+            game.opp_def_eff = 100
+            game.lbj_DNP = False
+            app_db.session.add(game)
+    # another player's game after the last game of the player predicted for
+    app_db.session.add(make_game(datetime(2018, 1, 6), player='kevin-love'))
+    app_db.session.commit()
+    training = mTF.create_training_data(datetime(2018, 1, 10).date())
+    assert list(training.player.unique()) == ['lebron-james']
+    assert len(training) == 4
+    upcoming = mTF.create_upcoming_game()
+    assert upcoming.player.iloc[0] == 'lebron-james'
+    assert upcoming.date.iloc[0] == datetime(2018, 1, 4)
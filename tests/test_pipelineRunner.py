@@ -0,0 +1,26 @@
+import pytest
+import sys
+sys.path.append("../")
+from develop import pipelineRunner as pR
+
+
+def test_pipeline_skips_unchanged_stages(tmpdir):
+    """Tests that stages only re-run when their inputs change or are forced."""
+    data = {'games': [1, 2]}
+    runs = []
+    stages = [
+        pR.stage('fetch', lambda context: runs.append('fetch')),
+        pR.stage('train', lambda context: runs.append('train'),
+                 inputs=lambda context: data['games'],
+                 depends_on=('fetch',)),
+        pR.stage('predict', lambda context: runs.append('predict'),
+                 inputs=lambda context: {}, depends_on=('train',))]
+    path = str(tmpdir.join('state.json'))
+    assert pR.pipeline(stages, path).run() == ['fetch', 'train', 'predict']
+    assert pR.pipeline(stages, path).run() == ['fetch']
+    data['games'] = [1, 2, 3]
+    assert pR.pipeline(stages, path).run() == ['fetch', 'train', 'predict']
+    assert pR.pipeline(stages, path).run(force=['predict']) == ['fetch',
+                                                                'predict']
+    with pytest.raises(ValueError):
+        pR.pipeline(stages[1:], path)
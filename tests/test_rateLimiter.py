@@ -0,0 +1,36 @@
+import sys
+sys.path.append("../")
+from develop import rateLimiter as rL
+import threading
+import time
+
+
+def test_rate_limiter_priority():
+    """Tests that waiting calls are granted by priority, an interval apart."""
+    limiter = rL.rate_limiter(0.05, 100, 300)
+    limiter.acquire()
+    granted = []
+
+    def call(priority):
+        limiter.acquire(priority)
+        granted.append((priority, time.time()))
+
+    threads = [threading.Thread(target=call, args=(priority,))
+               for priority in [3, 1, 2]]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert [priority for priority, _ in granted] == [1, 2, 3]
+    assert all(later - earlier >= 0.04 for (_, earlier), (_, later) in
+               zip(granted, granted[1:]))
+
+
+def test_rate_limiter_quota():
+    """Tests that no more calls than the quota are granted in a window."""
+    limiter = rL.rate_limiter(0, 2, 0.2)
+    start = time.time()
+    for _ in range(3):
+        limiter.acquire()
+    # the third call waits for the next window
+    assert time.time() >= (int(start // 0.2) + 1) * 0.2
@@ -0,0 +1,53 @@
+import sys
+sys.path.append("../")
+from app.models import Game, GameFact
+from conftest import make_game
+from datetime import datetime
+from develop import responseArchive as rA
+from develop import updateFunctions as uf
+import create_initial_db
+import rebuild_db
+
+
+def test_rebuild_keeps_daily_updates(app_db, tmpdir, monkeypatch):
+    """Tests that the games added by daily updates after the initial build,
+    and the form state as of them, survive a rebuild from the archive."""
+    monkeypatch.chdir(tmpdir)
+    monkeypatch.setattr(rA, 'archive', rA.response_archive(str(tmpdir)))
+    initial_dates = [datetime(2017, 10, day) for day in [17, 20, 24]]
+    daily_dates = [datetime(2017, 10, 27), datetime(2017, 10, 30)]
+
+    def add_historical_games(players):
+        # stands in for the initial build answered from the archive, with a
+        # changed feature
+        for game_date in initial_dates:
+            game = make_game(game_date)
+            game.lbj_days_rest = 9
+            app_db.session.add(game)
+            app_db.session.add(GameFact(
+                    date=game_date, season=game.season, player=game.player,
+                    team='CLE', opponent=game.opponent,
+                    home_away=game.home_away))
+        app_db.session.commit()
+        with open(uf.form_state_path(), 'w') as f:
+            f.write('rebuilt')
+    monkeypatch.setattr(create_initial_db, 'add_historical_games',
+                        add_historical_games)
+    for game_date in initial_dates + daily_dates:
+        app_db.session.add(make_game(game_date))
+    # the last daily update added the upcoming game, without its stats
+    upcoming = make_game(datetime(2017, 11, 1))
+    upcoming.lbj_days_rest = 1
+    app_db.session.add(upcoming)
+    app_db.session.commit()
+    with open(uf.form_state_path(), 'w') as f:
+        f.write('daily')
+    assert rebuild_db.rebuild_db(str(tmpdir)) == {'lebron-james': 3}
+    games = Game.query.order_by(Game.date).all()
+    assert [game.date for game in games] == (initial_dates + daily_dates +
+                                             [datetime(2017, 11, 1)])
+    assert [game.lbj_days_rest for game in games] == [9, 9, 9, 0, 0, 1]
+    assert games[-1].pts is None
+    assert GameFact.query.count() == 3
+    with open(uf.form_state_path()) as f:
+        assert f.read() == 'daily'
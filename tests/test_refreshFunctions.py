@@ -0,0 +1,40 @@
+import sys
+sys.path.append("../")
+from develop import refreshFunctions as rF
+from develop import dataPullProcessFunctions as dppf
+from types import SimpleNamespace
+
+
+def game_stats(scale, minutes=30):
+    """Makes stats for a game as returned by extract_lbj_stats."""
+    return {'Pts': 10 * scale, 'Rbs': scale, 'Ast': 2 * scale,
+            '2ptAtt': 4 * scale, '2ptMade': 2 * scale, '3ptAtt': 2 * scale,
+            '3ptMade': scale, 'FtAtt': 5 * scale, 'FtMade': 4 * scale,
+            'PlusMinus': scale, 'MinutesPlayed': minutes}
+
+
+def test_season_features():
+    """Tests season averages and games missed going into each game."""
+    features = rF.season_features([game_stats(1), game_stats(2, 0), None,
+                                   game_stats(3), None])
+    assert features[0]['lbj_rbs_pgm'] == 0
+    assert features[0]['lbj_2pt_pct'] == 0
+    assert features[1]['lbj_rbs_pgm'] == 1
+    assert features[3]['lbj_games_missed'] == 2
+    assert features[3]['lbj_rbs_pgm'] == 1
+    assert features[4]['lbj_games_missed'] == 2
+    assert features[4]['lbj_rbs_pgm'] == 2
+    assert features[4]['lbj_2pt_pct'] == 0.5
+    assert features[4]['lbj_ft_mpg'] == 8
+
+
+def test_stats_changed():
+    """Tests detecting corrections with and without a stored stats hash."""
+    stats = game_stats(1)
+    game = SimpleNamespace(stats_hash=dppf.stats_hash(stats), pts=10, rbs=1,
+                           ast=2, lbj_DNP=False)
+    assert not rF.stats_changed(game, stats)
+    assert rF.stats_changed(game, dict(stats, PlusMinus=-3))
+    game.stats_hash = None
+    assert not rF.stats_changed(game, dict(stats, PlusMinus=-3))
+    assert rF.stats_changed(game, dict(stats, Rbs=2))
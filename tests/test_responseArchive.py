@@ -0,0 +1,36 @@
+import pytest
+import sys
+sys.path.append("../")
+from develop import responseArchive as rA
+
+
+def test_response_archive(tmpdir):
+    """Tests appending, rotating segments and replaying the latest response."""
+    archive = rA.response_archive(str(tmpdir), segment_max_bytes=1)
+    params = {'player': ['lebron-james'], 'date': '20180101'}
+    archive.append('player_gamelogs', 'https://a/gamelogs.json', params,
+                   '{"version": 1}')
+    archive.append('player_gamelogs', 'https://a/gamelogs.json', params,
+                   '{"version": 2}')
+    assert len(archive.segments()) == 2
+    assert [r['text'] for r in archive.records()] == ['{"version": 1}',
+                                                      '{"version": 2}']
+    replay = rA.response_archive(str(tmpdir))
+    response = replay.replay('player_gamelogs', 'https://a/gamelogs.json',
+                             {'date': '20180101', 'player': ['lebron-james']})
+    assert response.json() == {'version': 2}
+    with pytest.raises(KeyError):
+        replay.replay('scoreboard', 'https://a/scoreboard.json', {})
+
+
+def test_append_stream(tmpdir):
+    """Tests archiving a response as its chunks are read."""
+    archive = rA.response_archive(str(tmpdir))
+    text = '{"name": "Don\u010di\u0107", "quote": "\\"\\n"}'
+    chunks = archive.append_stream('player_gamelogs', 'https://a/g.json', {},
+                                   [text[i:i + 4] for i in range(0, len(text),
+                                                                 4)])
+    assert ''.join(chunks) == text
+    assert [r['text'] for r in archive.records()] == [text]
+    replayed = archive.replay('player_gamelogs', 'https://a/g.json', {})
+    assert ''.join(replayed.iter_content(5)) == text
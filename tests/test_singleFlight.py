@@ -0,0 +1,46 @@
+import pytest
+import sys
+sys.path.append("../")
+from develop import singleFlight as sF
+import threading
+import time
+
+
+def test_single_flight():
+    """Tests that concurrent calls with a key share one call and its error."""
+    flights = sF.single_flight()
+    release = threading.Event()
+    calls = []
+    results = []
+
+    def call():
+        calls.append(1)
+        release.wait()
+        return {'gameboxscore': {}}
+
+    def request():
+        results.append(flights.do('20171024-BOS-MIA', call))
+
+    threads = [threading.Thread(target=request) for _ in range(4)]
+    threads[0].start()
+    while '20171024-BOS-MIA' not in flights.flights:
+        time.sleep(0.001)
+    for thread in threads[1:]:
+        thread.start()
+    while flights.flights['20171024-BOS-MIA'].waiters < 3:
+        time.sleep(0.001)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    assert sorted(shared for _, shared in results) == [False, True, True,
+                                                       True]
+    assert all(result is results[0][0] for result, _ in results)
+    assert flights.flights == {}
+
+    def fail():
+        raise ValueError('HTTP status 500')
+
+    with pytest.raises(ValueError):
+        flights.do('20171024-BOS-MIA', fail)
+    assert flights.do('20171024-BOS-MIA', lambda: 1) == (1, False)
@@ -0,0 +1,33 @@
+import sys
+sys.path.append("../")
+from app import app, snapshot
+from conftest import make_game, make_prediction
+from datetime import datetime
+import json
+import lbjapp  # noqa: F401 (registers the app's routes)
+import os
+
+
+def test_write_atomic(tmpdir):
+    """Tests that a file is replaced and no temporary file is left behind."""
+    path = str(tmpdir.join('index.html'))
+    snapshot.write_atomic(path, b'old')
+    snapshot.write_atomic(path, b'new')
+    assert open(path, 'rb').read() == b'new'
+    assert tmpdir.listdir() == [tmpdir.join('index.html')]
+
+
+def test_snapshot_of_one_player(app_db, tmpdir):
+    """Tests that the published and served next game is that of the player
+    predicted for, when another player has a later game."""
+    app_db.session.add_all([make_game(datetime(2018, 1, 2)),
+                            make_game(datetime(2018, 1, 3),
+                                      player='kevin-love'),
+                            make_prediction(datetime(2018, 1, 2))])
+    app_db.session.commit()
+    snapshot.publish_snapshot(str(tmpdir))
+    with open(os.path.join(str(tmpdir), snapshot.SNAPSHOT_PAYLOAD)) as f:
+        payload = json.load(f)
+    assert payload['next_game']['player'] == 'lebron-james'
+    served = app.test_client().get('/predictions.json').get_json()
+    assert served['next_game']['player'] == 'lebron-james'
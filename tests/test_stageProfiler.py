@@ -0,0 +1,42 @@
+import sys
+sys.path.append("../")
+from develop import stageProfiler as sP
+import threading
+import types
+
+
+def test_stage_profiler(tmpdir):
+    """Tests timing instrumented functions and writing the report/history."""
+    profiler = sP.stage_profiler()
+    module = types.SimpleNamespace(double=lambda x: 2 * x)
+    profiler.instrument(module, ['double'], 'doubling')
+    profiler.start()
+    assert module.double(2) == 4
+    assert module.double(3) == 6
+    assert profiler.stages['doubling']['calls'] == 2
+    history_path = str(tmpdir.join('history.csv'))
+    report_path = profiler.finish('test', str(tmpdir), history_path)
+    profiler.finish('test', str(tmpdir), history_path)
+    with open(report_path) as f:
+        assert 'doubling' in f.read()
+    with open(history_path) as f:
+        rows = f.read().splitlines()
+    assert rows[0] == ','.join(sP.HISTORY_COLUMNS)
+    assert len(rows) == 5
+
+
+def test_stage_profiler_threads():
+    """Tests that calls timed from several threads at once are all counted."""
+    profiler = sP.stage_profiler()
+    module = types.SimpleNamespace(double=lambda x: 2 * x)
+    profiler.instrument(module, ['double'], 'doubling')
+
+    def call_many():
+        for x in range(2000):
+            module.double(x)
+    threads = [threading.Thread(target=call_many) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert profiler.stages['doubling']['calls'] == 16000
@@ -2,6 +2,8 @@ import pytest
 import sys
 sys.path.append("../")
 from develop import updateFunctions as uF
+from datetime import datetime
+from types import SimpleNamespace
 
 
 def test_reverse_engineer_stats():
@@ -24,3 +26,35 @@ def test_reverse_engineer_stats():
                                                        'season_2pta': 100,
                                                        'season_3pta': 100,
                                                        'season_fta': 100}
+
+
+def test_full_daily_update_stats_not_available(monkeypatch):
+    """Tests that missing stats raise an error with the feed's update stamp."""
+    response = SimpleNamespace(json=lambda: {'playergamelogs': {
+            'lastUpdatedOn': '2018-01-02T01:00:00.000Z'}})
+    monkeypatch.setattr(uF.dppf, 'send_request_gamelogs',
+                        lambda season, daterange, players: response)
+    last_game = SimpleNamespace(date=datetime(2018, 1, 1), opponent='BOS',
+                                season='2017-2018-regular')
+    with pytest.raises(uF.StatsNotAvailableError) as error:
+        uF.full_daily_update(datetime(2018, 1, 2).date(), [last_game], None)
+    assert error.value.last_updated_on == '2018-01-02T01:00:00.000Z'
+
+
+def test_opp_stat_update_schedule_request_fails(monkeypatch):
+    """Tests that the opponent's stats are unavailable, and the request
+    queued, when its schedule cannot be requested."""
+    def send_request_schedule(season, team, daterange):
+        raise uF.dppf.RequestFailedError('season_schedule', 'url', {},
+                                         'HTTP status 502')
+    queued = []
+    monkeypatch.setattr(uF.dppf, 'send_request_schedule',
+                        send_request_schedule)
+    monkeypatch.setattr(uF.dppf, 'dead_letter',
+                        lambda error, affects: queued.append(affects))
+    assert uF.opp_stat_update('2017-2018-regular',
+                              datetime(2017, 10, 17).date(),
+                              datetime(2018, 1, 2).date(), 'BOS') is None
+    assert queued == [{'kind': 'opponent_stats',
+                       'season': '2017-2018-regular', 'date': '2017-10-17',
+                       'teams': ['BOS']}]
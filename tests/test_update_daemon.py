@@ -0,0 +1,14 @@
+import sys
+sys.path.append("../")
+import update_daemon
+
+
+def test_next_poll_delay():
+    """Tests backing off while the feed is unchanged and resetting after."""
+    delay = update_daemon.next_poll_delay(None, 'a', None, 60, 300)
+    assert delay == 60
+    delay = update_daemon.next_poll_delay(delay, 'a', 'a', 60, 300)
+    assert delay == 120
+    delay = update_daemon.next_poll_delay(240, 'a', 'a', 60, 300)
+    assert delay == 300
+    assert update_daemon.next_poll_delay(300, 'b', 'a', 60, 300) == 60
@@ -0,0 +1,52 @@
+import numpy as np
+import sys
+sys.path.append("../")
+from app import app
+from develop import whatIfFunctions as wF
+from types import SimpleNamespace
+import lbjapp
+
+
+def make_grid():
+    """Builds a grid of two opponents and two values of days rest."""
+    upcoming = SimpleNamespace(home_away='home', lbj_days_rest=1,
+                               opponent='BOS', opp_def_eff=100,
+                               opp_off_eff=110)
+    coefficients = {'columns': ['home_away', 'lbj_days_rest', 'opp_def_eff',
+                                'opp_off_eff'],
+                    'coef': np.array([[1., 2., 0., 0.],
+                                      [0., 0., 1., 0.],
+                                      [0., 0., 0., 1.]]),
+                    'intercept': np.array([10., 0., 0.])}
+    return wF.build_grid(upcoming, {'CHI': (90, 95)}, coefficients, [0, 1])
+
+
+def test_grid_lookup(tmpdir):
+    """Tests that a saved grid returns the prediction of each scenario."""
+    grid = make_grid()
+    path = str(tmpdir.join('grid.npy'))
+    index_path = str(tmpdir.join('grid.json'))
+    wF.save_grid(grid, path, index_path)
+    grid = wF.load_grid(path, index_path)
+    assert grid['values'].shape == (2, 2, 2, 3)
+    assert wF.lookup(grid, 'CHI', 'away', 1) == {'predicted_pts': 12,
+                                                 'predicted_rbs': 90,
+                                                 'predicted_ast': 95}
+    assert wF.lookup(grid, 'BOS', 'home', 0) == {'predicted_pts': 11,
+                                                 'predicted_rbs': 100,
+                                                 'predicted_ast': 110}
+
+
+def test_whatif_endpoint(tmpdir, monkeypatch):
+    """Tests that the endpoint answers 503 until a grid has been written."""
+    monkeypatch.chdir(tmpdir)
+    monkeypatch.setitem(lbjapp.whatif_cache, 'mtime', None)
+    client = app.test_client()
+    query = {'opponent': 'CHI', 'home_away': 'away', 'days_rest': 1}
+    response = client.get('/whatif', query_string=query)
+    assert response.status_code == 503
+    assert 'error' in response.get_json()
+    wF.save_grid(make_grid())
+    response = client.get('/whatif', query_string=query)
+    assert response.status_code == 200
+    assert response.get_json()['predicted_pts'] == 12
@@ -0,0 +1,86 @@
+"""Copies the app's tables between database backends in bulk.
+
+Every table of the app is copied from one database to another, such as from
+the MySQL database on AWS RDS to a local SQLite file, so the pipeline can be
+run locally against the same data, or back again. Rows are read and written
+in batches inside one transaction on the target, replacing the rows it had,
+and the game_features view is created on the target. Columns missing from
+an older source database are left to their defaults, so games copied from a
+database without the version column start at version 1.
+
+Example:
+    python transfer_db.py --to sqlite:///lbj_local.db
+    LBJAPP_LOCAL_DB=lbj_local.db python update_db.py
+"""
+
+from app import app, db
+from develop import featureView as fV
+from sqlalchemy import create_engine, inspect, select
+import argparse
+import logging
+
+
+# rows read and inserted at a time
+BATCH_ROWS = 5000
+
+
+def transfer(source_uri, target_uri, batch_rows=BATCH_ROWS):
+    """Copies every table of the app from one database to another.
+
+    Args:
+        source_uri (str): SQLAlchemy URI of the database to copy from
+        target_uri (str): SQLAlchemy URI of the database to copy to. Its
+            tables are created if needed and their rows replaced.
+        batch_rows (int): rows read and inserted at a time
+
+    Returns:
+        copied (dict): dictionary keyed by table name with the number of rows
+            copied
+    """
+    source = create_engine(source_uri)
+    target = create_engine(target_uri)
+    db.metadata.create_all(target)
+    source_tables = inspect(source).get_table_names()
+    copied = {}
+    with source.connect() as reading, target.begin() as writing:
+        for table in db.metadata.sorted_tables:
+            if table.name not in source_tables:
+                continue
+            source_columns = {column['name'] for column in
+                              inspect(source).get_columns(table.name)}
+            columns = [column for column in table.columns
+                       if column.name in source_columns]
+            writing.execute(table.delete())
+            result = reading.execution_options(stream_results=True).execute(
+                    select(*columns))
+            copied[table.name] = 0
+            while True:
+                rows = result.fetchmany(batch_rows)
+                if not rows:
+                    break
+                writing.execute(table.insert(),
+                                [dict(row._mapping) for row in rows])
+                copied[table.name] += len(rows)
+            logging.info('%d rows of %s copied.', copied[table.name],
+                         table.name)
+    fV.create_feature_view(target)
+    return copied
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+            description="Copy the app's tables between databases.")
+    parser.add_argument('--from', dest='source',
+                        default=app.config['SQLALCHEMY_DATABASE_URI'],
+                        help="URI of the database to copy from. Defaults to "
+                        "the app's database.")
+    parser.add_argument('--to', dest='target', required=True,
+                        help='URI of the database to copy to, such as '
+                        'sqlite:///lbj_local.db')
+    parser.add_argument('--batch-rows', type=int, default=BATCH_ROWS,
+                        help='rows read and inserted at a time')
+    args = parser.parse_args()
+    logging.basicConfig(filename="logs/transfer_db.log", level=logging.DEBUG)
+    for table, n_rows in transfer(args.source, args.target,
+                                  args.batch_rows).items():
+        print('{}: {} rows copied'.format(table, n_rows))
@@ -0,0 +1,167 @@
+"""Runs the daily update from a resident process instead of the crontab.
+
+Run once a day from the crontab, update_db.py finds out whether the stats of
+the last game are available only at that hour, and if they are not it has to
+wait for the next day's run. This module instead stays running, with its
+imports, database engine and HTTP session to the API kept between updates.
+Once the last game in the database has been played, it tries the update
+repeatedly until the API has published the game's stats, and runs it the
+moment they are there. The wait between attempts doubles after every attempt
+in which the API's game log feed has not changed, and goes back to the
+shortest wait whenever its 'lastUpdatedOn' stamp changes, as the stats are
+then likely being published. On days without a game waiting for its stats
+the update is run once, to refresh the upcoming opponent's stats.
+
+SIGTERM or SIGINT stops the daemon between updates.
+
+Example:
+    nohup python update_daemon.py &
+"""
+
+from app import app
+from app.models import Game
+from develop import updateFunctions as uf
+from develop import dataPullProcessFunctions as dppf
+from develop import apiMetrics as aM
+from datetime import datetime
+import update_db
+import argparse
+import signal
+import time
+import logging
+
+
+POLL_MIN_SECONDS = 300
+POLL_MAX_SECONDS = 3600
+IDLE_SECONDS = 1800
+
+# signals received by the daemon, acted upon in its main loop
+daemon_signals = {'stop': False}
+
+
+def stats_pending(today):
+    """Function to check if the last game in the database awaits its stats.
+
+    Args:
+        today (datetime.date()): date of 'today'
+
+    Returns:
+        pending (bool): whether the last game of dppf.PLAYER in the games
+            table was played before today and its stats have not been filled
+            in
+    """
+    last_game = Game.query.filter_by(player=dppf.PLAYER).order_by(
+            Game.date.desc()).first()
+    pending = last_game.date.date() < today and last_game.pts is None
+    return pending
+
+
+def next_poll_delay(delay, last_updated_on, previous_last_updated_on,
+                    poll_min=POLL_MIN_SECONDS, poll_max=POLL_MAX_SECONDS):
+    """Function to find how long to wait before asking the API again.
+
+    Args:
+        delay (float): seconds waited before the latest attempt, or None if
+            this is the first attempt for the game
+        last_updated_on (str): 'lastUpdatedOn' stamp of the game log feed
+            returned by the latest attempt
+        previous_last_updated_on (str): stamp returned by the attempt before
+        poll_min (float): shortest wait
+        poll_max (float): longest wait
+
+    Returns:
+        delay (float): seconds to wait before the next attempt
+    """
+    if delay is None or last_updated_on != previous_last_updated_on:
+        return poll_min
+    return min(2 * delay, poll_max)
+
+
+def wait(seconds):
+    """Function to sleep, returning early if the daemon is asked to stop."""
+    end = time.monotonic() + seconds
+    while not daemon_signals['stop'] and time.monotonic() < end:
+        time.sleep(min(1, end - time.monotonic()))
+
+
+def run_update():
+    """Function to run the daily update and write the API call metrics.
+
+    Args:
+        None
+
+    Returns:
+        update_status (str): the return of update_db's run_daily_update
+
+    Raises:
+        uf.StatsNotAvailableError: if the stats of the last game are not
+            available from the API yet
+    """
+    try:
+        with app.app_context():
+            update_status = update_db.run_daily_update()
+    finally:
+        aM.registry.dump()
+    logging.info('Daily update made: %s', update_status)
+    return update_status
+
+
+def run(poll_min=POLL_MIN_SECONDS, poll_max=POLL_MAX_SECONDS,
+        idle_seconds=IDLE_SECONDS):
+    """Function to keep the database and predictions up to date until stopped.
+
+    Args:
+        poll_min (float): shortest wait between attempts while waiting for
+            the stats of a game
+        poll_max (float): longest wait between attempts while waiting for the
+            stats of a game
+        idle_seconds (float): wait between checks when no game is waiting for
+            its stats
+
+    Returns:
+        None
+    """
+    last_run_date = None
+    delay = None
+    last_updated_on = None
+    while not daemon_signals['stop']:
+        today = datetime.now().date()
+        with app.app_context():
+            pending = stats_pending(today)
+        if pending or last_run_date != today:
+            try:
+                run_update()
+            except uf.StatsNotAvailableError as error:
+                delay = next_poll_delay(delay, error.last_updated_on,
+                                        last_updated_on, poll_min, poll_max)
+                last_updated_on = error.last_updated_on
+                logging.info('Trying again in %d seconds.', delay)
+                wait(delay)
+                continue
+            except Exception:
+                # keep running, the next check tries again
+                logging.exception('Daily update failed.')
+            last_run_date = today
+            delay = None
+            last_updated_on = None
+        wait(idle_seconds)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+            description='Keep the database and predictions up to date.')
+    parser.add_argument('--poll-min', type=float, default=POLL_MIN_SECONDS,
+                        help='shortest wait in seconds between attempts '
+                        'while waiting for the stats of a game')
+    parser.add_argument('--poll-max', type=float, default=POLL_MAX_SECONDS,
+                        help='longest wait in seconds between attempts')
+    parser.add_argument('--idle', type=float, default=IDLE_SECONDS,
+                        help='wait in seconds between checks when no game '
+                        'is waiting for its stats')
+    args = parser.parse_args()
+    logging.basicConfig(filename="logs/update_daemon.log",
+                        level=logging.DEBUG)
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum,
+                      lambda signum, frame: daemon_signals.update(stop=True))
+    run(args.poll_min, args.poll_max, args.idle)
@@ -6,17 +6,40 @@ information on all completed games as well as the next one upcoming, and then
 proceed to update the predictions table in the database with the latest
 prediction for the upcoming game. This should be executed daily via the
 crontab.
+
+The steps of the update run as a pipeline in which a step is skipped when its
+inputs have not changed since it last ran, so on most days only the games
+table is updated. Run with --force STAGE to run a step regardless.
+
+Run with --profile to write a report of the time spent in each stage of the
+update to the logs directory.
 """
 
-from app import db
-from app.models import Predictions
+from app import db, cache, snapshot
+from app.models import Game, Predictions
 from develop import updateFunctions as uf
-from develop import modelTrainingFunctions as mTF
+from develop import inferenceFunctions as iF
+from develop import horizonFunctions as hF
+from develop import whatIfFunctions as wF
+from develop import leagueEfficiency as lE
+from develop import apiMetrics as aM
+from develop import stageProfiler as sP
+from develop import dataPullProcessFunctions as dppf
+from develop import pipelineRunner as pR
+from develop import refreshFunctions as rF
 from datetime import datetime
+import argparse
+import hashlib
 import pickle
+import sys
+import os
 import logging
 
 
+SEASON = "2017-2018-regular"
+TEAM = "CLE"
+
+
 def update_db():
     """Function to run daily to update db with latest info.
 
@@ -32,16 +55,38 @@ def update_db():
              to the database. Possible values are 'newgameupdate',
              'updatedstats', and 'nogame'.
     """
-    update_status = uf.make_update(datetime.now().date(),
-                                   "2017-2018-regular", db)
+    update_status = uf.make_update(datetime.now().date(), SEASON, db)
     return update_status
 
 
+def refresh_stats():
+    """Function to pick up corrections to the stats of this season's games.
+
+    Rewrites the games whose stats the API has corrected since they were
+    written, along with the features of the games after them. A failure is
+    logged rather than raised, so it does not hold up the rest of the update.
+
+    Args:
+        None
+
+    Returns:
+        corrected (list): datetime.date() of each game whose stats were
+            corrected
+    """
+    try:
+        return rF.refresh_season(SEASON, db, datetime.now().date())
+    except Exception:
+        logging.exception('Refreshing corrected stats failed.')
+        db.session.rollback()
+        return []
+
+
 def update_model():
     """Function to run when needed to create new model with latest data.
 
     This function will run when new game results are available to retrain the
-    model.
+    model. The training stack (pandas, scikit-learn) is only imported here, so
+    days on which no retraining is needed do not pay for loading it.
 
     Args:
         None
@@ -51,31 +96,52 @@ def update_model():
             trained_linear_models which has attributes of models to predict
             points, assists, and rebounds
     """
+    from develop import modelTrainingFunctions as mTF
     logging.info('Training new model.')
     models = mTF.trained_linear_models(datetime.now().date())
     return models
 
 
 def make_new_predictions(models):
-    """Using the supplied trained_linear_models object, makes predictions.
+    """Using the supplied exported_linear_models object, makes predictions.
 
-    This function uses the custom class trained_linear_models' predict method
+    This function uses the custom class exported_linear_models' predict method
     to add or modify the attributes of that class that contain the predictions
     of points, rebounds, and assists for the upcoming game, as well as the date
     of the upcoming game.
 
     Args:
-        models (mTF.trained_linear_models): takes object of custom class
-            trained_linear_models to make predictions. After this function
+        models (iF.exported_linear_models): takes object of custom class
+            exported_linear_models to make predictions. After this function
             executes, this object will have attributes containing these
             predictions.
 
     Returns:
         None
     """
-    upcoming_predictors = mTF.create_upcoming_game()
+    upcoming_game = Game.query.filter_by(player=dppf.PLAYER).order_by(
+            Game.date.desc()).first()
     logging.info('Making new predictions')
-    models.predict(upcoming_predictors)
+    models.predict(upcoming_game)
+
+
+def train_models():
+    """Trains new models on every completed game and exports them.
+
+    The trained models are pickled, and their coefficients (with the
+    bootstrap coefficients used for prediction intervals) are exported for
+    making predictions without the pandas/scikit-learn stack.
+
+    Args:
+        None
+
+    Returns:
+        None
+    """
+    trained_models = update_model()
+    with open('models.pickle', 'wb') as f:
+        pickle.dump(trained_models, f)
+    trained_models.export_coefficients(iF.COEFFICIENTS_PATH)
 
 
 def update_predictions_db(update_status):
@@ -83,42 +149,41 @@ def update_predictions_db(update_status):
 
     Based on what type of update was made to the database table containing info
     on games, this function will take the proper steps in updating the table
-    containing predictions. If new game results were added to the former table
-    the model will be retrained and predictions will be made. Otherwise, the
-    most recent model will be recalled and used to make new predictions based
-    on any updated info pertaining to the upcoming game.
+    containing predictions. If there is an upcoming game, the most recently
+    trained model is used to make new predictions for it from the exported
+    model coefficients, so only retraining requires the pandas/scikit-learn
+    stack, and bootstrap prediction intervals are stored alongside the point
+    predictions.
 
     Args:
         update_status (str): the return of uf.make_update, and in turn the
             return of update_db(). Describes the type of update made to the
             games table and informs what process should be used for making new
-            predictions (build new model and predict, predict using most recent
-            model, or do nothing because there are no upcoming games).
+            predictions (predict using most recent model, or do nothing
+            because there are no upcoming games).
 
     Returns:
         None
     """
-    if update_status == "newgameupdate":
-        models = update_model()
-        with open('models.pickle', 'wb') as f:
-            pickle.dump(models, f)
+    if update_status in ("newgameupdate", "updatedstats"):
+        if not os.path.exists(iF.COEFFICIENTS_PATH):
+            # model was trained before coefficients were exported
+            with open('models.pickle', 'rb') as f:
+                pickle.load(f).export_coefficients(iF.COEFFICIENTS_PATH)
+        models = iF.exported_linear_models(iF.COEFFICIENTS_PATH)
         make_new_predictions(models)
         new_row_predict = Predictions(
                 game_date=models.predicted_game_date,
                 predict_date=datetime.now().date(),
                 predicted_pts=models.predicted_pts,
                 predicted_rbs=models.predicted_rbs,
-                predicted_ast=models.predicted_ast)
-    elif update_status == "updatedstats":
-        with open('models.pickle', 'rb') as f:
-            models = pickle.load(f)
-        make_new_predictions(models)
-        new_row_predict = Predictions(
-                game_date=models.predicted_game_date,
-                predict_date=datetime.now().date(),
-                predicted_pts=models.predicted_pts,
-                predicted_rbs=models.predicted_rbs,
-                predicted_ast=models.predicted_ast)
+                predicted_ast=models.predicted_ast,
+                predicted_pts_lower=models.predicted_pts_lower,
+                predicted_pts_upper=models.predicted_pts_upper,
+                predicted_rbs_lower=models.predicted_rbs_lower,
+                predicted_rbs_upper=models.predicted_rbs_upper,
+                predicted_ast_lower=models.predicted_ast_lower,
+                predicted_ast_upper=models.predicted_ast_upper)
     else:
         new_row_predict = Predictions(
                 game_date=datetime.now().date(),
@@ -131,9 +196,231 @@ def update_predictions_db(update_status):
     db.session.close()
 
 
+def update_horizon_predictions(update_status):
+    """Updates table in database containing predictions for remaining games.
+
+    Projects predictor rows for every game left on the schedule from the
+    current season stats in the bottom row of the games table and each
+    opponent's current efficiency ratings, and scores them all at once with
+    the exported model coefficients.
+
+    Args:
+        update_status (str): the return of update_db(). Nothing is predicted
+            if there are no upcoming games.
+
+    Returns:
+        None
+    """
+    if update_status == "nogame":
+        return
+    today = datetime.now().date()
+    games = uf.pull_from_db(SEASON, dppf.PLAYER)
+    upcoming_game = games[-1]
+    remaining_games = hF.remaining_schedule(SEASON, TEAM,
+                                            upcoming_game.date.date())
+    coefficients = iF.load_coefficients(iF.COEFFICIENTS_PATH)
+    efficiencies = hF.current_opponent_efficiencies(
+            lE.season_efficiency_matrix(SEASON), today)
+    predictors = hF.build_horizon_predictors(
+            upcoming_game, remaining_games, efficiencies,
+            coefficients['columns'])
+    logging.info('Making horizon predictions for %d games',
+                 len(remaining_games))
+    predictions = iF.predict_rows(coefficients, predictors)
+    hF.store_horizon_predictions(
+            db, today, remaining_games,
+            hF.horizon_days_rest(upcoming_game, remaining_games), predictions)
+    db.session.close()
+
+
+def update_whatif_grid(update_status):
+    """Precomputes predictions for the what-if grid served by the web app.
+
+    Predicts the upcoming game against every opponent, home and away, for each
+    number of days of rest in whatIfFunctions.DAYS_REST_VALUES, using the
+    current season stats in the bottom row of the games table.
+
+    Args:
+        update_status (str): the return of update_db(). Nothing is predicted
+            if there are no upcoming games.
+
+    Returns:
+        None
+    """
+    if update_status == "nogame":
+        return
+    games = uf.pull_from_db(SEASON, dppf.PLAYER)
+    coefficients = iF.load_coefficients(iF.COEFFICIENTS_PATH)
+    logging.info('Making what-if predictions')
+    efficiencies = hF.current_opponent_efficiencies(
+            lE.season_efficiency_matrix(SEASON), datetime.now().date())
+    grid = wF.build_grid(games[-1], efficiencies, coefficients)
+    wF.save_grid(grid)
+    db.session.close()
+
+
+def publish():
+    """Publishes the latest predictions to the web app.
+
+    Args:
+        None
+
+    Returns:
+        None
+    """
+    cache.invalidate_render_cache()
+    snapshot.publish_snapshot()
+    cache.reload_server()
+
+
+def game_versions(completed_only=False):
+    """Finds the id and version of every row of the games table.
+
+    Every change to a row increments its version, so the result changes
+    whenever the rows of the player predicted for do.
+
+    Args:
+        completed_only (bool): whether to only include games with results
+
+    Returns:
+        versions (list): list of [id, version] pairs of dppf.PLAYER's games
+            ordered by id
+    """
+    query = db.session.query(Game.id, Game.version).filter(
+            Game.player == dppf.PLAYER)
+    if completed_only:
+        query = query.filter(Game.pts.isnot(None))
+    versions = [list(row) for row in query.order_by(Game.id)]
+    return versions
+
+
+def file_fingerprint(path):
+    """Hashes the contents of a file, giving None if it does not exist."""
+    if not os.path.exists(path):
+        return None
+    with open(path, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def pipeline_stages():
+    """Describes the steps of the daily update as stages of a pipeline.
+
+    Pulling new data from the API, and checking it for corrections to the
+    stats of earlier games, always runs. Training only runs when the
+    completed games have changed, predicting for the upcoming game only when
+    its row or the model has changed, the horizon predictions and what-if
+    grid only when any game or the model has changed, and publishing only
+    when any of those ran.
+
+    Args:
+        None
+
+    Returns:
+        stages (list): stages as described by pR.stage
+    """
+    def predict_inputs(context):
+        return {'status': context['update_status'],
+                'upcoming': game_versions()[-1:],
+                'coefficients': file_fingerprint(iF.COEFFICIENTS_PATH)}
+
+    def season_inputs(context):
+        return {'status': context['update_status'],
+                'games': game_versions(),
+                'coefficients': file_fingerprint(iF.COEFFICIENTS_PATH)}
+
+    stages = [
+        pR.stage('update_games',
+                 lambda context: context.update(update_status=update_db())),
+        pR.stage('refresh_stats',
+                 lambda context: context.update(corrected=refresh_stats()),
+                 depends_on=('update_games',)),
+        pR.stage('train', lambda context: train_models(),
+                 inputs=lambda context: game_versions(completed_only=True),
+                 depends_on=('refresh_stats',)),
+        pR.stage('predict',
+                 lambda context: update_predictions_db(
+                         context['update_status']),
+                 inputs=predict_inputs, depends_on=('train',)),
+        pR.stage('horizon',
+                 lambda context: update_horizon_predictions(
+                         context['update_status']),
+                 inputs=season_inputs, depends_on=('train',)),
+        pR.stage('whatif',
+                 lambda context: update_whatif_grid(context['update_status']),
+                 inputs=season_inputs, depends_on=('train',)),
+        pR.stage('publish', lambda context: publish(),
+                 inputs=lambda context: {},
+                 depends_on=('predict', 'horizon', 'whatif'))]
+    return stages
+
+
+def run_daily_update(force=()):
+    """Runs the steps of the daily update whose inputs have changed.
+
+    Updates the games table, then, where needed, retrains the model, updates
+    the predictions, horizon predictions and what-if grid, and publishes the
+    results to the web app.
+
+    Args:
+        force (iterable): names of stages to run even if their inputs are
+            unchanged, along with the stages depending on them
+
+    Returns:
+        update_status (str): the return of update_db()
+
+    Raises:
+        uf.StatsNotAvailableError: if the last game has been played but its
+            stats are not available from the API yet
+    """
+    context = {}
+    ran = pR.pipeline(pipeline_stages()).run(context, force)
+    logging.info('Stages run: %s', ', '.join(ran))
+    return context['update_status']
+
+
+def profile_stages():
+    """Times each stage of the daily update with stageProfiler's profiler.
+
+    Args:
+        None
+
+    Returns:
+        None
+    """
+    sP.profiler.instrument(uf, ['make_update', 'full_daily_update',
+                                'opp_stat_update'])
+    sP.profiler.instrument(sys.modules[__name__], [
+            'update_db', 'refresh_stats', 'train_models', 'update_model',
+            'update_predictions_db', 'make_new_predictions',
+            'update_horizon_predictions', 'update_whatif_grid', 'publish'])
+    sP.profiler.instrument(dppf, ['send_request'], 'api_request')
+    sP.profiler.instrument(db.session, ['commit'], 'db_commit')
+
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+            description='Make the daily update to the database and '
+            'predictions.')
+    parser.add_argument('--profile', action='store_true',
+                        help='write a report of the time spent in each stage')
+    parser.add_argument('--cprofile', metavar='PATH',
+                        help='with --profile, also write cProfile stats of '
+                        'the whole run to PATH')
+    parser.add_argument('--force', action='append', default=[],
+                        metavar='STAGE',
+                        choices=[s['name'] for s in pipeline_stages()],
+                        help='run a stage, and the stages depending on it, '
+                        'even if its inputs are unchanged. May be repeated.')
+    args = parser.parse_args()
     logging.basicConfig(filename="logs/daily_update.log",
                         level=logging.DEBUG)
     logging.info('Logging for %s', str(datetime.now().date()))
-    update_status = update_db()
-    update_predictions_db(update_status)
+    if args.profile:
+        profile_stages()
+        sP.profiler.start(args.cprofile)
+    try:
+        run_daily_update(args.force)
+    finally:
+        aM.registry.dump()
+        if args.profile:
+            sP.profiler.finish('update_db')